@@ -0,0 +1,325 @@
+"""
+Offline review throughput benchmark.
+
+Replays PR fixtures through parse_git_diff, select_important_files, prompt
+construction and the sequential file review loop, then through the whole pipelined
+run_review_pipeline, against a local mock Ollama server without touching GitHub or a
+real model. Reports throughput, p50/p95 latency per stage and peak memory for each
+fixture. Imports and the Ollama session are warmed up before anything is timed.
+
+Fixtures are either synthetic (small, medium, huge) or recorded from a real PR:
+    python benchmarks/bench_review.py --record https://github.com/owner/repo/pull/123 benchmarks/fixtures/pr123.json
+    python benchmarks/bench_review.py --sizes small medium huge --fixtures benchmarks/fixtures/*.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rich.console import Console
+from rich.table import Table
+
+from pr_review import config
+from pr_review import review as review_module
+from pr_review.context import ReviewContext
+from pr_review.diff import parse_git_diff
+from pr_review.github_api import (
+    fetch_pr_files, format_files_content, get_pr_diff, load_pr_context,
+    select_important_files
+)
+from pr_review.llm import build_generate_payload, ollama_generate
+from pr_review.prompts import determine_pr_type, generate_custom_prompt
+from pr_review.review import review_files, run_review_pipeline
+from pr_review.review_cache import REVIEW_CACHE
+from pr_review.tracing import TRACE_SPANS
+from mock_ollama import start_mock_ollama
+
+console = Console()
+
+# Synthetic PR shapes: (number of files, lines per file, changed lines per file)
+SYNTHETIC_SIZES = {
+    "small": (3, 40, 5),
+    "medium": (25, 300, 30),
+    "huge": (200, 1200, 80)
+}
+
+
+def build_synthetic_fixture(name, num_files, lines_per_file, changed_lines):
+    """Build a deterministic fake PR with one diff hunk per file."""
+    contents = {}
+    files = []
+    diffs = []
+    for index in range(num_files):
+        extension = (".py", ".js", ".md", ".yml")[index % 4]
+        file_name = f"src/module_{index}/file_{index}{extension}"
+        lines = [f"value_{index}_{line} = compute({line}, items[{line} % len(items)])" for line in range(lines_per_file)]
+        contents[file_name] = "\n".join(lines) + "\n"
+
+        # The last changed_lines lines of the file are reported as added
+        start = lines_per_file - changed_lines + 1
+        hunk = [f" {line}" for line in lines[start - 4:start - 1]] + [f"+{line}" for line in lines[start - 1:]]
+        diffs.append("\n".join([
+            f"diff --git a/{file_name} b/{file_name}",
+            "index 1111111..2222222 100644",
+            f"--- a/{file_name}",
+            f"+++ b/{file_name}",
+            f"@@ -{start - 3},3 +{start - 3},{changed_lines + 3} @@",
+            *hunk
+        ]))
+        files.append({"filename": file_name, "additions": changed_lines, "deletions": 0})
+
+    return {
+        "name": name,
+        "title": f"Synthetic {name} PR",
+        "description": "Refactor compute helpers and add validation",
+        "diff": "\n".join(diffs) + "\n",
+        "files": files,
+        "contents": contents
+    }
+
+
+def load_fixture(path):
+    """Load a recorded fixture written by record_fixture."""
+    with open(path) as f:
+        fixture = json.load(f)
+    fixture.setdefault("name", os.path.splitext(os.path.basename(path))[0])
+    return fixture
+
+
+def record_fixture(pr_url, path):
+    """Record a real PR's diff, file list and raw contents into a fixture file."""
+    ctx = ReviewContext.from_url(pr_url)
+    diff = get_pr_diff(ctx)
+    pr_context = load_pr_context(ctx)
+    contents = fetch_pr_files(ctx, [file.filename for file in pr_context['changed_files']])
+
+    fixture = {
+        "name": os.path.splitext(os.path.basename(path))[0],
+        "title": pr_context['title'],
+        "description": pr_context['description'],
+        "diff": diff or "",
+        "files": [
+            {"filename": file.filename, "additions": file.additions, "deletions": file.deletions}
+            for file in pr_context['changed_files']
+        ],
+        "contents": contents
+    }
+    with open(path, "w") as f:
+        json.dump(fixture, f)
+    console.print(f"[green]Recorded {len(contents)} files from {pr_url} to {path}")
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def timed(samples, stage, func, *args, **kwargs):
+    """Call func and append its wall time to samples[stage]."""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    samples.setdefault(stage, []).append(time.perf_counter() - start)
+    return result
+
+
+def warm_up():
+    """Import the lazily loaded dependencies and open the Ollama session before anything is timed."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        ollama_generate(build_generate_payload("Warm up.", "Warm up."), "warm_up")
+    TRACE_SPANS.clear()
+
+
+def use_fixture_github(fixture, posted):
+    """
+    Serve the pipeline's GitHub reads from the fixture and collect its posts instead of sending them.
+
+    Returns:
+        ReviewContext: A context with the fixture's PR details already loaded
+    """
+    diff_files = parse_git_diff(fixture["diff"])
+    changed_files = [
+        SimpleNamespace(**file, status="modified", patch=diff_files.get(file["filename"], ""))
+        for file in fixture["files"]
+    ]
+    ctx = ReviewContext.from_url(f"https://github.com/benchmark/{fixture['name']}/pull/1")
+    ctx.head_sha = "fixture"
+    ctx.pr_context = {
+        "pull_request": None, "title": fixture["title"], "description": fixture["description"],
+        "changed_files": changed_files, "head_repo": ctx.repo, "head_sha": ctx.head_sha,
+        "commits": [SimpleNamespace(sha=ctx.head_sha)]
+    }
+
+    def get_pr_diff(ctx):
+        ctx.diff = fixture["diff"]
+        ctx.diff_files = parse_git_diff(fixture["diff"])
+        return ctx.diff
+
+    review_module.get_pr_diff = get_pr_diff
+    review_module.fetch_pr_files = lambda ctx, file_names: {
+        file_name: fixture["contents"][file_name] for file_name in file_names if file_name in fixture["contents"]
+    }
+    review_module.post_line_comments = lambda pr_url, file_reviews, pr=None, commit=None: posted.update(file_reviews)
+    review_module.post_comment_on_pr = lambda pr_url, comment, file_name: None
+    return ctx
+
+
+def run_pipeline_fixture(fixture, batch_small_files=False, max_files=None):
+    """
+    Replay one fixture through run_review_pipeline, with the fetches, reviews and summary overlapped.
+
+    Returns:
+        dict: Latency samples of the run and its model calls, its wall time and the
+        number of files and comments it posted
+    """
+    posted = {}
+    ctx = use_fixture_github(fixture, posted)
+    config.REVIEW_MAX_FILES = max_files or len(fixture["files"])
+    TRACE_SPANS.clear()
+    REVIEW_CACHE.clear()
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_review_pipeline(ctx, batch_small_files)
+    wall_time = time.perf_counter() - start
+
+    samples = {"pipeline:run_review_pipeline": [wall_time]}
+    for span in TRACE_SPANS:
+        if span["stage"] == "ollama":
+            samples.setdefault(f"pipeline:ollama:{span['purpose']}", []).append(span["wall_time"])
+    return {"samples": samples, "wall_time": wall_time, "files": len(posted),
+            "comments": sum(map(len, posted.values()))}
+
+
+def run_fixture(fixture, batch_small_files=False, max_files=None):
+    """
+    Replay one fixture through the review stages.
+
+    Returns:
+        dict: Per-stage latency samples, files reviewed, total wall time and peak memory
+    """
+    samples = {}
+    changed_files = [SimpleNamespace(**file) for file in fixture["files"]]
+    pr_context = {"title": fixture["title"], "description": fixture["description"], "changed_files": changed_files}
+
+    ctx = ReviewContext(pr_url=fixture["name"])
+    TRACE_SPANS.clear()
+    # Every run measures real reviews, not reviews reused from an earlier fixture or run
+    REVIEW_CACHE.clear()
+    tracemalloc.start()
+    start = time.perf_counter()
+
+    # The scripts print every prompt; keep the benchmark output readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        ctx.diff = fixture["diff"]
+        ctx.diff_files = timed(samples, "parse_git_diff", parse_git_diff, fixture["diff"])
+        important_files = timed(samples, "select_important_files", select_important_files,
+                                changed_files, max_files=max_files or len(changed_files))
+
+        for file in important_files:
+            if file.filename in fixture["contents"]:
+                ctx.files_content[file.filename] = fixture["contents"][file.filename]
+
+        files_content = format_files_content(ctx, important_files)
+        pr_type = timed(samples, "determine_pr_type", determine_pr_type,
+                        pr_context["title"], pr_context["description"], changed_files)
+        timed(samples, "summary_prompt", generate_custom_prompt, ctx, pr_type, pr_context, files_content)
+
+        pending_files = [
+            (file_name, ctx.diff_files[file_name])
+            for file_name in ctx.files_content
+            if file_name in ctx.diff_files
+        ]
+        file_reviews = timed(samples, "review_loop", review_files, None, ctx.files_content,
+                             pending_files, batch_small_files)
+
+    wall_time = time.perf_counter() - start
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Individual model calls come from the run trace
+    for span in TRACE_SPANS:
+        if span["stage"] == "ollama":
+            samples.setdefault(f"ollama:{span['purpose']}", []).append(span["wall_time"])
+
+    return {
+        "samples": samples,
+        "files": len(pending_files),
+        "comments": sum(len(comments) for comments in file_reviews.values()),
+        "wall_time": wall_time,
+        "peak_memory": peak_memory,
+        "content_memory": ctx.files_content.memory_bytes,
+        "content_spilled": ctx.files_content.spilled_bytes
+    }
+
+
+def print_results(name, results, pipeline):
+    """Print the benchmark results for one fixture, sequential stages first, then the pipelined run."""
+    table = Table(title=f"{name}: {results['files']} files, {results['comments']} comments")
+    for column in ("Stage", "Calls", "p50 (ms)", "p95 (ms)", "Total (ms)"):
+        table.add_column(column, justify="left" if column == "Stage" else "right")
+
+    for stage, values in {**results["samples"], **pipeline["samples"]}.items():
+        table.add_row(
+            stage,
+            str(len(values)),
+            f"{percentile(values, 0.5) * 1000:.2f}",
+            f"{percentile(values, 0.95) * 1000:.2f}",
+            f"{sum(values) * 1000:.2f}"
+        )
+
+    console.print(table)
+    throughput = results["files"] / results["wall_time"] if results["wall_time"] else 0
+    console.print(f"[green]Throughput: {throughput:.2f} files/s, wall time {results['wall_time']:.2f}s, "
+                  f"peak memory {results['peak_memory'] / (1024 * 1024):.1f} MiB, file contents "
+                  f"{results['content_memory'] / (1024 * 1024):.1f} MiB in memory / "
+                  f"{results['content_spilled'] / (1024 * 1024):.1f} MiB spilled")
+    # The pipeline also generates the summary, which the sequential stages only build a prompt for
+    console.print(f"[green]Pipeline: {pipeline['files'] / pipeline['wall_time']:.2f} files/s including the summary, "
+                  f"wall time {pipeline['wall_time']:.2f}s, {pipeline['comments']} comments posted\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Offline PR review benchmark')
+    parser.add_argument('--sizes', nargs='*', default=["small", "medium", "huge"], choices=list(SYNTHETIC_SIZES),
+                        help='Synthetic PR sizes to run')
+    parser.add_argument('--fixtures', nargs='*', default=[], help='Recorded fixture files to replay')
+    parser.add_argument('--record', nargs=2, metavar=('PR_URL', 'PATH'), help='Record a real PR as a fixture and exit')
+    parser.add_argument('--prefill-ms', type=float, default=0.05, help='Simulated milliseconds per prompt token')
+    parser.add_argument('--decode-ms', type=float, default=1.0, help='Simulated milliseconds per generated token')
+    parser.add_argument('--batch-small-files', action='store_true', help='Review small files in batched prompts')
+    parser.add_argument('--max-files', type=int, help='Limit reviewed files like select_important_files does')
+    args = parser.parse_args()
+
+    if args.record:
+        record_fixture(*args.record)
+        sys.exit(0)
+
+    server, url = start_mock_ollama(prefill_ms=args.prefill_ms, decode_ms=args.decode_ms)
+    config.OLLAMA_API_URL = url
+    # The mock reviews must never reach the user's persistent review cache
+    config.REVIEW_CACHE_DIR = ""
+    # The pipeline runs offline: no Semgrep download, progress comment or per-file GitHub fetch
+    config.SEMGREP_SCAN = False
+    config.PROGRESS_COMMENT = False
+    warm_up()
+
+    fixtures = [build_synthetic_fixture(size, *SYNTHETIC_SIZES[size]) for size in args.sizes]
+    fixtures += [load_fixture(path) for path in args.fixtures]
+
+    try:
+        for fixture in fixtures:
+            results = run_fixture(fixture, args.batch_small_files, args.max_files)
+            pipeline = run_pipeline_fixture(fixture, args.batch_small_files, args.max_files)
+            print_results(fixture["name"], results, pipeline)
+    finally:
+        server.shutdown()
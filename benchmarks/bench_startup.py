@@ -0,0 +1,89 @@
+"""
+Cold start benchmark for the pr_chatbot.py entry point.
+
+Every `/ai` comment starts a new Python process, so the time spent importing
+modules before the first request is paid on every reply. This starts a fresh
+interpreter per run for each mode, imports what that mode loads, and reports
+p50/p95 wall time and which heavy dependencies were pulled in:
+    python benchmarks/bench_startup.py --runs 20
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+from rich.console import Console
+from rich.table import Table
+
+from bench_review import percentile
+
+console = Console()
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imports each mode performs before doing any network I/O
+STARTUP_MODES = {
+    "interpreter": "pass",
+    "entry point": "import pr_chatbot",
+    "process-comment": "import pr_chatbot, pr_review.chat",
+    "review": "import pr_chatbot, pr_review.review, pr_review.github_api",
+    "eager (all deps)": "import pr_chatbot, pr_review.review, pr_review.chat, pr_review.analysis, "
+                        "requests, github, rich.progress, rich.table"
+}
+
+# Dependencies that dominate import time
+HEAVY_MODULES = ("requests", "github", "rich.progress", "rich.table")
+
+
+def run_startup(code, runs):
+    """Start a fresh interpreter `runs` times and return the wall time of each start."""
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, check=True)
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def loaded_heavy_modules(code):
+    """Return the heavy dependencies imported by code, read from -X importtime output."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=REPO_ROOT,
+                            capture_output=True, text=True, check=True)
+    imported = {line.rsplit("|", 1)[-1].strip() for line in result.stderr.splitlines() if "|" in line}
+    return [module for module in HEAVY_MODULES if module in imported]
+
+
+def print_results(results):
+    """Print startup latency and loaded dependencies per mode."""
+    table = Table(title="pr_chatbot.py cold start")
+    for column in ("Mode", "Runs", "p50 (ms)", "p95 (ms)", "Heavy imports"):
+        table.add_column(column, justify="left" if column in ("Mode", "Heavy imports") else "right")
+
+    for mode, (durations, heavy) in results.items():
+        table.add_row(
+            mode,
+            str(len(durations)),
+            f"{percentile(durations, 0.5) * 1000:.1f}",
+            f"{percentile(durations, 0.95) * 1000:.1f}",
+            ", ".join(heavy) or "-"
+        )
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='pr_chatbot.py startup benchmark')
+    parser.add_argument('--runs', type=int, default=10, help='Fresh interpreter starts per mode')
+    parser.add_argument('--modes', nargs='*', default=list(STARTUP_MODES), choices=list(STARTUP_MODES),
+                        help='Startup modes to measure')
+    args = parser.parse_args()
+
+    results = {}
+    for mode in args.modes:
+        code = STARTUP_MODES[mode]
+        # One untimed run warms the filesystem and bytecode caches
+        run_startup(code, 1)
+        results[mode] = (run_startup(code, args.runs), loaded_heavy_modules(code))
+
+    print_results(results)
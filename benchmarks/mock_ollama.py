@@ -0,0 +1,123 @@
+"""
+Mock Ollama server for offline benchmarks.
+
+Implements just enough of POST /api/generate (streaming and non-streaming) for the
+review scripts. Latency is simulated per token: prompt processing (prefill) costs
+prefill_ms per prompt token, and every generated token costs decode_ms.
+
+Run standalone to point the real scripts at it:
+    python benchmarks/mock_ollama.py --port 11434 --prefill-ms 0.2 --decode-ms 20
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Rough characters-per-token ratio used to size prompts without a tokenizer
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    """Approximate the token count of a string."""
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def build_response_text(system_prompt, prompt, response_format):
+    """Build a plausible model answer for the kind of prompt received."""
+    if "keyed by file name" in system_prompt:
+        # Batched review: one entry per file in the prompt
+        file_names = re.findall(r"^File: (.+)$", prompt, flags=re.MULTILINE)
+        return json.dumps({
+            name: [{"line": 1, "comment": "Consider adding a docstring here."}]
+            for name in file_names
+        })
+    if response_format:
+        return json.dumps({"comments": [
+            {"line": 1, "comment": "Consider validating this input before use."},
+            {"line": 2, "comment": "This lookup could use a set instead of a list."}
+        ]})
+    return ("This PR updates the request handling and adds validation for user input. "
+            "The changes are limited to the service layer and do not alter public interfaces.")
+
+
+class MockOllamaHandler(BaseHTTPRequestHandler):
+    """Request handler simulating Ollama's generate endpoint."""
+
+    prefill_ms = 0.05
+    decode_ms = 1.0
+
+    def do_POST(self):
+        if self.path != "/api/generate":
+            self.send_error(404)
+            return
+
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        system_prompt = payload.get("system", "")
+        prompt = payload.get("prompt", "")
+        text = build_response_text(system_prompt, prompt, payload.get("format"))
+
+        prompt_tokens = estimate_tokens(system_prompt + prompt)
+        output_tokens = estimate_tokens(text)
+        prefill_seconds = prompt_tokens * self.prefill_ms / 1000
+        decode_seconds = output_tokens * self.decode_ms / 1000
+        metrics = {
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": int(prefill_seconds * 1e9),
+            "eval_count": output_tokens,
+            "eval_duration": int(decode_seconds * 1e9),
+            "total_duration": int((prefill_seconds + decode_seconds) * 1e9)
+        }
+
+        time.sleep(prefill_seconds)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson" if payload.get("stream", True) else "application/json")
+        self.end_headers()
+
+        if payload.get("stream", True):
+            # Emit the answer in token-sized chunks, paced at the decode rate
+            chunk_size = CHARS_PER_TOKEN * 8
+            for start in range(0, len(text), chunk_size):
+                piece = text[start:start + chunk_size]
+                time.sleep(estimate_tokens(piece) * self.decode_ms / 1000)
+                self.wfile.write(json.dumps({"response": piece, "done": False}).encode() + b"\n")
+            self.wfile.write(json.dumps({"response": "", "done": True, **metrics}).encode() + b"\n")
+        else:
+            time.sleep(decode_seconds)
+            self.wfile.write(json.dumps({"response": text, "done": True, **metrics}).encode())
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_mock_ollama(port=0, prefill_ms=0.05, decode_ms=1.0):
+    """
+    Start the mock server on a background thread.
+
+    Returns:
+        tuple: (server, generate URL)
+    """
+    handler = type("ConfiguredMockOllamaHandler", (MockOllamaHandler,), {
+        "prefill_ms": prefill_ms,
+        "decode_ms": decode_ms
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/api/generate"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Mock Ollama server for benchmarks')
+    parser.add_argument('--port', type=int, default=11434)
+    parser.add_argument('--prefill-ms', type=float, default=0.05, help='Simulated milliseconds per prompt token')
+    parser.add_argument('--decode-ms', type=float, default=1.0, help='Simulated milliseconds per generated token')
+    args = parser.parse_args()
+
+    server, url = start_mock_ollama(args.port, args.prefill_ms, args.decode_ms)
+    print(f"Mock Ollama listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,54 @@
+from bench_review import build_synthetic_fixture, percentile, run_fixture, run_pipeline_fixture
+from mock_ollama import start_mock_ollama
+from pr_review import config, review
+from pr_review.diff import parse_git_diff
+from pr_review.llm import stream_json_generation
+from pr_review.review_cache import REVIEW_CACHE
+
+def use_mock_ollama(monkeypatch):
+    server, url = start_mock_ollama(prefill_ms=0, decode_ms=0)
+    monkeypatch.setattr(config, "OLLAMA_API_URL", url)
+    monkeypatch.setattr(config, "REVIEW_CACHE_DIR", "")
+    monkeypatch.setattr(config, "TRIAGE_MODEL", None)
+    return server
+
+def test_percentile():
+    assert percentile([], 0.5) == 0.0
+    assert percentile([4, 1, 3, 2, 5], 0.5) == 3
+    assert percentile(list(range(1, 101)), 0.95) == 95
+
+def test_synthetic_fixture_is_deterministic_and_parses():
+    fixture = build_synthetic_fixture("small", 3, 40, 5)
+    assert fixture == build_synthetic_fixture("small", 3, 40, 5)
+    diff_files = parse_git_diff(fixture["diff"])
+    assert sorted(diff_files) == sorted(file["filename"] for file in fixture["files"]) == sorted(fixture["contents"])
+
+def test_mock_ollama_streams_review_comments(monkeypatch):
+    server = use_mock_ollama(monkeypatch)
+    try:
+        extractor = stream_json_generation("Review.", "File: app.py", {"type": "object"})
+    finally:
+        server.shutdown()
+    assert extractor.parsed_cleanly()
+    assert [comment["line"] for comment in extractor.objects[:-1]] == [1, 2]
+
+def test_fixture_replays_through_both_review_paths(monkeypatch):
+    server = use_mock_ollama(monkeypatch)
+    # The pipeline run swaps the GitHub calls of the review module for the fixture's data
+    for name in ("get_pr_diff", "fetch_pr_files", "post_line_comments", "post_comment_on_pr"):
+        monkeypatch.setattr(review, name, getattr(review, name))
+    monkeypatch.setattr(config, "REVIEW_MAX_FILES", config.REVIEW_MAX_FILES)
+    monkeypatch.setattr(config, "SEMGREP_SCAN", False)
+    monkeypatch.setattr(config, "PROGRESS_COMMENT", False)
+    fixture = build_synthetic_fixture("small", 3, 40, 5)
+    try:
+        results = run_fixture(fixture)
+        pipeline = run_pipeline_fixture(fixture)
+    finally:
+        server.shutdown()
+        REVIEW_CACHE.clear()
+
+    assert (results["files"], results["comments"]) == (3, 6)
+    assert len(results["samples"]["ollama:review"]) == 3
+    assert (pipeline["files"], pipeline["comments"]) == (3, 6)
+    assert len(pipeline["samples"]["pipeline:ollama:review"]) == 3
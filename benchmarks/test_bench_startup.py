@@ -0,0 +1,19 @@
+import subprocess
+import sys
+
+from bench_startup import REPO_ROOT, STARTUP_MODES, loaded_heavy_modules, run_startup
+
+def test_entry_point_imports_no_dependencies():
+    code = "import sys, pr_chatbot; print(sorted(m for m in ('rich', 'requests', 'github') if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
+    assert loaded_heavy_modules(STARTUP_MODES["entry point"]) == []
+
+def test_process_comment_defers_its_dependencies():
+    # The chat module loads requests and PyGithub when it first calls them, and never progress bars or trace tables
+    assert loaded_heavy_modules(STARTUP_MODES["process-comment"]) == []
+    assert set(loaded_heavy_modules(STARTUP_MODES["eager (all deps)"])) == {"requests", "github", "rich.progress", "rich.table"}
+
+def test_run_startup_times_each_run():
+    durations = run_startup("pass", 2)
+    assert len(durations) == 2 and all(duration > 0 for duration in durations)
@@ -0,0 +1,17 @@
+"""
+Shared core of the AI PR review tools.
+
+pr_tool.py, pr_m3.py and pr_chatbot.py are thin entry points over these modules.
+Submodules are imported on demand so each entry point only loads what its mode uses:
+
+- config: endpoints, model name and concurrency limits
+- context: ReviewContext, the per-PR review state
+- clients: pooled HTTP session and cached GitHub client
+- github_api: diffs, PR details, file contents and comment posting
+- diff: git diff parsing
+- prompts: prompt templates and PR type classification
+- llm, json_extract: Ollama requests and tolerant JSON extraction
+- analysis: Semgrep and linters
+- summary, review, chat: the summary, line review and chatbot stages
+- tracing: per-stage timing and token instrumentation
+"""
@@ -0,0 +1,158 @@
+import os
+import json
+import shutil
+import subprocess
+
+from pr_review import config
+from pr_review.console import console
+from pr_review.github_api import get_pr_details, download_files, fetch_pr_files
+from pr_review.resilience import BackendUnavailable, circuit_breaker, run_command
+from pr_review.scheduling import rank_files
+from pr_review.tracing import trace_stage
+
+
+def run_semgrep(files):
+    """Runs Semgrep on the given files and returns findings."""
+    semgrep_results = []
+    
+    console.print("\n[cyan]Running Semgrep security scan...\n")
+    breaker = circuit_breaker("semgrep")
+    try:
+        breaker.check()
+        cmd = f"semgrep --config={config.SEMGREP_CONFIG} --json {' '.join(files)}"
+        with trace_stage("run_semgrep", files=len(files)) as span:
+            try:
+                result = run_command(cmd, "semgrep", shell=True, text=True)
+            except subprocess.TimeoutExpired:
+                breaker.record_failure()
+                raise
+            breaker.record_success()
+            span["bytes"] = len(result.stdout)
+        # print(result.stdout)
+        if result.returncode == 0 and result.stdout:
+            semgrep_output = json.loads(result.stdout)
+            for finding in semgrep_output.get("results", []):
+                semgrep_results.append({
+                    "file": finding["path"],
+                    "rule": finding["check_id"],
+                    "message": finding["extra"]["message"]
+                })
+    
+    except Exception as e:
+        console.print(f"[red]Error running Semgrep: {e}")
+    
+    return semgrep_results
+
+def scan_changed_files(ctx, changed_files):
+    """
+    Run Semgrep over a PR's changed files ahead of scheduling, setting ctx.semgrep_findings.
+
+    The contents are fetched once into ctx.files_content, where the review reuses them,
+    and written under ctx.download_dir for Semgrep. Findings point at the files' paths in
+    the repository. Nothing is scanned if config.SEMGREP_SCAN is off or Semgrep is not
+    installed.
+
+    Args:
+        ctx (ReviewContext): Review state of the PR
+        changed_files (list): Changed files of the PR (PyGithub Files)
+
+    Returns:
+        dict: File name to content of the files fetched for the scan
+    """
+    if not config.SEMGREP_SCAN:
+        return {}
+    if shutil.which("semgrep") is None:
+        console.print("[yellow]Semgrep is not installed, scheduling the review without its findings")
+        return {}
+
+    file_names = [
+        file.filename for file in rank_files(changed_files)
+        if getattr(file, "status", "") != "removed"
+    ][:config.SEMGREP_MAX_FILES]
+    contents = fetch_pr_files(ctx, file_names)
+    ctx.files_content.update(contents)
+
+    local_paths = {}
+    for file_name, content in contents.items():
+        # Repository paths are kept, so files with the same name in different directories don't collide
+        local_path = os.path.join(ctx.download_dir, file_name)
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        with open(local_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        local_paths[os.path.normpath(local_path)] = file_name
+
+    findings = run_semgrep(list(local_paths)) if local_paths else []
+    for finding in findings:
+        finding["file"] = local_paths.get(os.path.normpath(finding["file"]), finding["file"])
+    ctx.semgrep_findings = findings
+    console.print(f"[cyan]Semgrep found {len(findings)} issues in {len(local_paths)} changed files")
+    return contents
+
+def run_linter(cmd, cwd=None):
+    """
+    Run a linter command within the lint stage timeout.
+
+    Returns:
+        subprocess.CompletedProcess: The linter's result, or None if it timed out or the
+        linters keep timing out
+    """
+    breaker = circuit_breaker("lint")
+    try:
+        breaker.check()
+        result = run_command(cmd, "lint", shell=True, cwd=cwd, text=True)
+    except BackendUnavailable as e:
+        console.print(f"[yellow]{e}, skipping")
+        return None
+    except subprocess.TimeoutExpired as e:
+        breaker.record_failure()
+        console.print(f"[yellow]Linter timed out after {e.timeout:.0f}s")
+        return None
+    breaker.record_success()
+    return result
+
+def run_lint(ctx):
+    """Runs linters and Semgrep for all supported languages."""
+    repo, pr_number = ctx.repo, ctx.pr_number
+    if not repo or not pr_number:
+        return
+
+    console.print(f"\n[orange]Fetching details for PR #{pr_number} from {repo}...\n")
+    python_files, head_repo, head_branch = get_pr_details(ctx)
+
+    if not python_files:
+        console.print("[yellow]No valid files changed in this PR.")
+        return
+
+    console.print(f"[orange]Fetching files from forked repo: {head_repo}, branch: {head_branch}\n")
+    # Each PR gets its own download directory so concurrent reviews don't overwrite each other
+    temp_dir = ctx.download_dir
+    os.makedirs(temp_dir, exist_ok=True)
+
+    downloaded_files = download_files(ctx, temp_dir, python_files)
+    console.print("\n[cyan]Running static code analysis...\n")
+    ctx.semgrep_findings = run_semgrep(downloaded_files)
+    
+    for file in downloaded_files:
+        if file.endswith(".py"):
+            console.print(f"[blue]Running pylint for {file}...")
+            cmd = f"pylint {file}"
+            result = run_linter(cmd)
+            if result is None:
+                continue
+            console.print(f"[cyan]{result.stdout}")
+
+        elif file.endswith((".js", ".jsx", ".ts", ".tsx")):
+            if file == "package.json":
+                continue
+            console.print(f"[blue]Running eslint for {file}...")
+            cmd = f"npx eslint {file}"
+            result = run_linter(cmd, cwd=os.path.dirname(file))
+            if result is None:
+                continue
+            if result.stderr or not result.stdout:
+                console.print(f"[cyan]No issues found..")
+            else:
+                console.print(f"[cyan]{result.stdout}")
+        
+        else:
+            console.print(f"[yellow]No linter configured for {file}")
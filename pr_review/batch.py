@@ -0,0 +1,82 @@
+"""
+Batch review of many PRs in one process.
+
+Nightly sweeps review every matching open PR. Running them in one process sets up
+the GitHub client and rate-limit governor, the Ollama session and loaded model, the
+repository mirrors and the symbol cache once for the whole batch. The content
+memory cap and the Ollama slots are process-wide, so they bound the batch as a
+whole, and at most config.BATCH_PR_WORKERS PRs are in progress at a time.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from pr_review import config
+from pr_review.clients import github_client
+from pr_review.console import console
+from pr_review.context import ReviewContext
+from pr_review.rate_limit import github_call
+from pr_review.review import run_review_pipeline
+from pr_review.scheduling import deadline_passed
+from pr_review.tracing import trace_stage
+
+def find_pr_urls(repo, query=""):
+    """
+    List the open PRs of a repository that match a GitHub search filter.
+
+    Args:
+        repo (str): Repository as owner/name
+        query (str): Extra search qualifiers, e.g. "label:nightly -is:draft"
+
+    Returns:
+        list: URLs of the matching PRs, most recently updated first
+    """
+    search = f"repo:{repo} is:pr is:open {query}".strip()
+    return github_call(lambda: [
+        issue.html_url for issue in github_client().search_issues(search, sort="updated", order="desc")
+    ])
+
+def review_pr(pr_url, batch_small_files=False):
+    """
+    Review one PR of a batch.
+
+    Returns:
+        str: "reviewed", "failed" or "skipped" if the run's deadline passed before it started.
+        Failures are reported rather than raised, so one PR cannot stop the batch.
+    """
+    if deadline_passed():
+        return "skipped"
+    with trace_stage("batch_pr", pr=pr_url):
+        try:
+            run_review_pipeline(ReviewContext.from_url(pr_url), batch_small_files)
+        except Exception as e:
+            console.print(f"[red]Review of {pr_url} failed: {e}")
+            return "failed"
+    return "reviewed"
+
+def review_batch(pr_urls, batch_small_files=False, max_concurrent=None):
+    """
+    Review several PRs in one process, sharing clients, caches and Ollama slots.
+
+    Args:
+        pr_urls (list): URLs of the PRs to review; duplicates are reviewed once
+        batch_small_files (bool): Pack small files into shared multi-file prompts
+        max_concurrent (int): PRs in progress at once, defaults to config.BATCH_PR_WORKERS
+
+    Returns:
+        dict: PR URL to "reviewed", "failed" or "skipped"
+    """
+    from pr_review.worker import warm_up_model
+
+    pr_urls = list(dict.fromkeys(pr_urls))
+    max_concurrent = max_concurrent or config.BATCH_PR_WORKERS
+    console.print(f"[cyan]Reviewing {len(pr_urls)} PRs, {max_concurrent} at a time...\n")
+    # Load the model once for the whole batch
+    warm_up_model()
+
+    with ThreadPoolExecutor(max_workers=max_concurrent) as pool:
+        results = dict(zip(pr_urls, pool.map(lambda pr_url: review_pr(pr_url, batch_small_files), pr_urls)))
+
+    counts = {status: sum(1 for result in results.values() if result == status)
+              for status in ("reviewed", "failed", "skipped")}
+    console.print(f"[green]Batch done: {counts['reviewed']} reviewed, {counts['failed']} failed, "
+                  f"{counts['skipped']} skipped at the deadline")
+    return results
@@ -0,0 +1,271 @@
+import re
+import time
+
+from pr_review import config
+from pr_review.clients import get_pull_request
+from pr_review.console import console
+from pr_review.context import ReviewContext
+from pr_review.diff import parse_changed_lines
+from pr_review.github_api import get_file_contents, get_pr_diff, load_pr_context
+from pr_review.llm import ollama_generate
+from pr_review.rate_limit import github_call
+from pr_review.summary import generate_pr_summary
+from pr_review.symbols import context_ranges
+
+def file_snippet(ctx, file_name, max_chars=config.CHAT_SNIPPET_CHARS):
+    """
+    Cut the numbered lines of a file to show the chatbot, within a character budget.
+
+    Changed files contribute the definitions enclosing their changed lines (or windows
+    around them), so the model sees the edited code rather than the top of the file.
+    Files without a diff start at line 1.
+    """
+    files = ctx.files_content
+    windows = []
+    if file_name in ctx.diff_files:
+        changed_lines = parse_changed_lines(ctx.diff_files[file_name])
+        windows = [(start, end) for start, end, _ in context_ranges(files, file_name, changed_lines)]
+    if not windows:
+        # At least the first line, even if it alone is over the budget
+        return files.numbered_lines(file_name, 1, max(files.lines_within(file_name, max_chars), 1))[:max_chars]
+
+    sections = []
+    remaining = max_chars
+    for start, end in windows:
+        end = min(end, files.lines_within(file_name, remaining, start))
+        if end < start:
+            break
+        sections.append(files.numbered_lines(file_name, start, end))
+        remaining -= len(sections[-1])
+    return "\n...\n".join(sections)
+
+def get_chatbot_response(ctx, query, conversation_history=None):
+    """
+    Get a response from the AI chatbot about the PR code changes.
+    
+    Args:
+        ctx (ReviewContext): Review state of the PR being discussed
+        query (str): User's question about the code
+        conversation_history (list): Previous conversation history
+        
+    Returns:
+        str: AI response to the query
+    """
+    # Initialize conversation history if not provided
+    if conversation_history is None:
+        conversation_history = []
+    
+    # Create context about the PR for the AI
+    pr_context = load_pr_context(ctx)
+    
+    # Format context for the model
+    context = f"""
+    PR Title: {pr_context['title']}
+    PR Description: {pr_context['description']}
+    
+    Summary of Changes:
+    {ctx.summary}
+    
+    Files Modified:
+    {', '.join([file.filename for file in pr_context['changed_files']])}
+    """
+    
+    # Format conversation history
+    chat_history = ""
+    if conversation_history:
+        for entry in conversation_history:
+            chat_history += f"User: {entry['user']}\nAI: {entry['ai']}\n\n"
+    
+    # Create the prompt for the model
+    prompt = f"""You are CodeReviewChat, an AI assistant specialized in discussing code changes in pull requests.
+    You are currently reviewing a pull request with the following information:
+    
+    {context}
+    
+    Previous conversation:
+    {chat_history}
+    
+    The user is asking about this PR. Please answer their question:
+    User: {query}
+    
+    Guidelines:
+    1. Be concise and focused on code-related topics
+    2. If asked about specific files, check the available file contents and diffs
+    3. If you don't know something, admit it rather than making up information
+    4. Include code snippets when relevant
+    5. Explain technical concepts clearly
+    6. Format your response with markdown for readability
+    
+    Your response:
+    """
+    
+    # If the user asks about specific files, try to include their contents
+    for filename in ctx.files_content:
+        if filename.lower() in query.lower():
+            prompt += f"\n\nFile content for {filename}:\n```\n{file_snippet(ctx, filename)}\n...\n```\n"
+            
+            if filename in ctx.diff_files:
+                prompt += f"\n\nChanges in {filename}:\n```diff\n{ctx.diff_files[filename][:5000]}...\n```\n"
+            
+            break
+    
+    # Get response from the model
+    # keep_alive as in the other payloads, so a chat request keeps the worker's model resident
+    payload = {"model": config.MODEL_NAME, "prompt": prompt, "stream": False, "keep_alive": config.OLLAMA_KEEP_ALIVE}
+    response = ollama_generate(payload, "chat")
+    if response is None:
+        return "I'm sorry, I ran out of time to answer."
+    
+    if response.status_code == 200:
+        result = response.json()
+        return result.get("response", "I'm sorry, I couldn't generate a response.")
+    else:
+        return f"Error: {response.status_code} - {response.text}"
+
+def start_chatbot_session(ctx):
+    """
+    Start an interactive chatbot session in the terminal.
+    
+    Args:
+        ctx (ReviewContext): Review state of the PR to discuss
+    """
+    console.print("[bold green]Starting PR Code Review Chat[/bold green]")
+    console.print("[cyan]Ask questions about the code changes in this PR. Type 'exit' to quit.[/cyan]\n")
+    
+    # Ensure we have the PR data
+    get_pr_diff(ctx)
+    pr_context = load_pr_context(ctx)
+    files_content = get_file_contents(ctx, pr_context['changed_files'])
+    
+    if not ctx.summary:
+        # Generate a summary if not already available
+        generate_pr_summary(ctx, pr_context, files_content)
+    
+    # Store conversation history
+    conversation_history = []
+    
+    while True:
+        try:
+            query = input("\n[You]: ")
+            
+            if query.lower() in ['exit', 'quit', 'q', 'bye']:
+                console.print("[bold green]Ending chat session. Goodbye![/bold green]")
+                break
+            
+            # Show thinking indicator
+            console.print("[cyan]Thinking...[/cyan]")
+            
+            # Get response from AI
+            response = get_chatbot_response(ctx, query, conversation_history)
+            
+            # Print the response
+            console.print(f"\n[bold purple]AI:[/bold purple] {response}\n")
+            
+            # Update conversation history
+            conversation_history.append({"user": query, "ai": response})
+            
+        except KeyboardInterrupt:
+            console.print("[bold red]Chat session interrupted.[/bold red]")
+            break
+        except Exception as e:
+            console.print(f"[bold red]Error: {e}[/bold red]")
+
+def create_chatbot_command(ctx, command, comment_id=None):
+    """
+    Handle chatbot commands from PR comments.
+    
+    Args:
+        ctx (ReviewContext): Review state of the PR, reused across commands on the same PR
+        command (str): The command string from the comment
+        comment_id (int): ID of the comment containing the command
+    """
+    # Extract owner, repo, and PR number
+    owner, repo_name, pr_number = re.search(r"github\.com/([^/]+)/([^/]+)/pull/(\d+)", ctx.pr_url).groups()
+    
+    # Parse the command
+    # Format: /ai <query>
+    if command.startswith('/ai '):
+        query = command[4:].strip()
+        
+        # Ensure we have PR data
+        previous_diff = ctx.diff
+        get_pr_diff(ctx)
+        if previous_diff and ctx.diff != previous_diff:
+            # New commits since the last command on this context, so drop what was derived from the old head
+            ctx.summary = ""
+            ctx.pr_context = None
+            ctx.head_sha = ""
+        pr_context = load_pr_context(ctx)
+        files_content = get_file_contents(ctx, pr_context['changed_files'])
+        
+        if not ctx.summary:
+            generate_pr_summary(ctx, pr_context, files_content)
+        
+        # Get response from AI
+        response = get_chatbot_response(ctx, query)
+        
+        # Post the response as a comment on the PR, reusing the PR object loaded with the context
+        pr = pr_context['pull_request']
+        
+        # If the command was in a comment, reply to that comment
+        reply = f"### AI Response\n\n{response}"
+        if comment_id:
+            # Format as a reply to the original comment
+            reply = f"In response to [comment](https://github.com/{owner}/{repo_name}/pull/{pr_number}#issuecomment-{comment_id}):\n\n{reply}"
+        
+        github_call(pr.create_issue_comment, reply, write=True)
+        console.print(f"[green]Posted AI response to PR #{pr_number}[/green]")
+
+def monitor_pr_comments(pr_url, interval=60):
+    """
+    Monitor PR comments for chatbot commands.
+    
+    Args:
+        pr_url (str): URL of the PR to monitor
+        interval (int): How often to check for new comments (in seconds)
+    """
+    console.print(f"[cyan]Starting PR comment monitor for {pr_url}[/cyan]")
+    
+    # Extract owner, repo, and PR number
+    pattern = r"github\.com/([^/]+)/([^/]+)/pull/(\d+)"
+    match = re.match(pattern, pr_url)
+    
+    if not match:
+        console.print("[red]Invalid GitHub PR URL.[/red]")
+        return
+        
+    owner, repo_name, pr_number = match.groups()
+    
+    # Track processed comments
+    processed_comments = set()
+
+    # One review context for the whole session, so the summary is generated only once
+    ctx = ReviewContext.from_url(pr_url)
+    
+    while True:
+        try:
+            # Get all comments
+            pr = get_pull_request(f"{owner}/{repo_name}", pr_number)
+            
+            # Process new comments
+            for comment in github_call(lambda: list(pr.get_issue_comments())):
+                if comment.id in processed_comments:
+                    continue
+                
+                # Mark as processed
+                processed_comments.add(comment.id)
+                
+                # Check for chatbot command
+                if comment.body.startswith('/ai '):
+                    console.print(f"[green]Found chatbot command in comment #{comment.id}[/green]")
+                    create_chatbot_command(ctx, comment.body, comment.id)
+            
+            # Wait for next check
+            time.sleep(interval)
+            
+        except KeyboardInterrupt:
+            console.print("[bold red]Comment monitor stopped.[/bold red]")
+            break
+        except Exception as e:
+            console.print(f"[bold red]Error monitoring comments: {e}[/bold red]")
+            time.sleep(interval)  # Continue monitoring despite errors
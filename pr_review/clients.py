@@ -0,0 +1,39 @@
+import os
+from functools import lru_cache
+
+from pr_review import config
+from pr_review.rate_limit import github_call
+
+
+@lru_cache(maxsize=None)
+def http_session():
+    """
+    Return the process-wide HTTP session.
+
+    Reusing one session keeps TCP/TLS connections to GitHub and Ollama alive between
+    requests, and the pool is sized for the concurrent fetch workers.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=config.FETCH_WORKERS * 2)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+@lru_cache(maxsize=None)
+def github_client():
+    """
+    Return the process-wide PyGithub client, created on first use.
+
+    PyGithub's own pacing and rate-limit retries are turned off, since every call goes
+    through the governor in rate_limit; only connection errors are retried here.
+    """
+    from github import Github
+    return Github(os.getenv('GITHUB_TOKEN'), retry=3, timeout=config.STAGE_TIMEOUTS["github"],
+                  seconds_between_requests=None, seconds_between_writes=None)
+
+def get_pull_request(repo, pr_number):
+    """Fetch the PyGithub pull request object for an owner/name repo and PR number, in one request."""
+    return github_call(lambda: github_client().get_repo(repo, lazy=True).get_pull(int(pr_number)))
@@ -0,0 +1,130 @@
+import os
+
+OLLAMA_API_URL = "http://localhost:11434/api/generate"
+MODEL_NAME = os.getenv("AI_MODEL")
+# Two-tier review: when TRIAGE_MODEL is set, it screens every file's diff (up to
+# TRIAGE_MAX_DIFF_CHARS) and only flagged files, and files with Semgrep hits, get a
+# line review from DEEP_REVIEW_MODEL
+TRIAGE_MODEL = os.getenv("PR_REVIEW_TRIAGE_MODEL") or None
+DEEP_REVIEW_MODEL = os.getenv("PR_REVIEW_DEEP_MODEL") or MODEL_NAME
+TRIAGE_MAX_DIFF_CHARS = 6000
+# Keep the model and its prompt cache loaded between requests
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+GITHUB_API_URL = "https://api.github.com"
+
+# GitHub rate limits: writes (comments, edits) are paced by a token bucket of GITHUB_WRITE_BURST
+# calls refilled at GITHUB_WRITE_RATE per second, reads are spread out once less than
+# GITHUB_PACE_FRACTION of the budget is left, and GITHUB_RATE_RESERVE calls are kept back.
+# Rate-limited calls are retried up to GITHUB_MAX_RETRIES times with jittered exponential backoff
+GITHUB_WRITE_RATE = float(os.getenv("PR_REVIEW_GITHUB_WRITES_PER_SECOND", "1"))
+GITHUB_WRITE_BURST = 5
+GITHUB_PACE_FRACTION = 0.1
+GITHUB_RATE_RESERVE = 10
+GITHUB_MAX_RETRIES = 5
+GITHUB_BACKOFF_SECONDS = 2.0
+GITHUB_BACKOFF_MAX_SECONDS = 120.0
+
+# File contents come from a local blobless mirror per repository ("git") or from
+# one raw.githubusercontent.com request per file ("http")
+FETCH_BACKEND = os.getenv("PR_REVIEW_FETCH", "git")
+GIT_CACHE_DIR = os.getenv("PR_REVIEW_GIT_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "pr_review", "git"))
+GIT_REMOTE_URL = os.getenv("PR_REVIEW_GIT_REMOTE", "https://github.com/{repo}.git")
+
+# Batched review limits: files up to SMALL_FILE_MAX_CHARS are packed together into
+# prompts of at most BATCH_MAX_CHARS characters and BATCH_MAX_FILES files
+SMALL_FILE_MAX_CHARS = 3000
+BATCH_MAX_CHARS = 12000
+BATCH_MAX_FILES = 8
+
+# Pipeline concurrency: GitHub fetches are cheap and parallel, while review requests
+# are bounded by how many generations the Ollama server runs at once
+FETCH_WORKERS = 8
+REVIEW_WORKERS = int(os.getenv("REVIEW_WORKERS", "2"))
+
+# Batch mode: up to BATCH_PR_WORKERS PRs are reviewed at once in one process, and all of
+# them share OLLAMA_CONCURRENCY generations in flight
+BATCH_PR_WORKERS = int(os.getenv("PR_REVIEW_BATCH_PRS", "2"))
+OLLAMA_CONCURRENCY = int(os.getenv("PR_REVIEW_OLLAMA_SLOTS", str(REVIEW_WORKERS)))
+
+# Semgrep rules; point at a local rules file to skip downloading the registry rules on each run
+SEMGREP_CONFIG = os.getenv("PR_REVIEW_SEMGREP_CONFIG", "auto")
+# Before scheduling, the review pipeline scans up to SEMGREP_MAX_FILES changed files with
+# Semgrep (if installed) so findings raise a file's risk and exempt it from triage
+SEMGREP_SCAN = os.getenv("PR_REVIEW_SEMGREP", "1") != "0"
+SEMGREP_MAX_FILES = 50
+
+# Hunk dedup: files whose hunks all repeat hunks of a reviewed file (estimated shingle
+# similarity of at least HUNK_DEDUP_SIMILARITY) reuse its findings instead of a review
+HUNK_DEDUP = os.getenv("PR_REVIEW_HUNK_DEDUP", "1") != "0"
+HUNK_DEDUP_SIMILARITY = float(os.getenv("PR_REVIEW_HUNK_SIMILARITY", "0.8"))
+
+# Per-call timeouts in seconds for each backend, capped by the run's deadline. An Ollama
+# generation may take up to "ollama" in total and as long again between streamed chunks
+STAGE_TIMEOUTS = {
+    "ollama": float(os.getenv("PR_REVIEW_OLLAMA_TIMEOUT", "600")),
+    "github": 30.0,
+    "git": float(os.getenv("PR_REVIEW_GIT_TIMEOUT", "300")),
+    "semgrep": 600.0,
+    "lint": 120.0,
+}
+
+# Circuit breaking: after CIRCUIT_FAILURE_THRESHOLD consecutive failures a backend gets no
+# calls for CIRCUIT_COOLDOWN_SECONDS, then a single trial call decides whether it is back
+CIRCUIT_FAILURE_THRESHOLD = 3
+CIRCUIT_COOLDOWN_SECONDS = 60.0
+
+# Speculative summary: the summary is drafted from the title, description and diff while
+# file contents download, and generated again only if the contents grow its prompt by
+# at least SUMMARY_REFINE_FRACTION
+SUMMARY_REFINE_FRACTION = float(os.getenv("PR_REVIEW_SUMMARY_REFINE_FRACTION", "0.5"))
+
+# Run trace: one span per timed stage, written out by write_trace_report() when a command
+# ends; the chatbot worker writes each command's trace under its PR's download directory
+TRACE_FILE = os.getenv("PR_REVIEW_TRACE", "review_trace.json")
+
+# Review scheduling: up to REVIEW_MAX_FILES files are reviewed, highest risk first, and
+# the run stops after REVIEW_DEADLINE_SECONDS of wall-clock time (0 for no deadline)
+REVIEW_MAX_FILES = int(os.getenv("PR_REVIEW_MAX_FILES", "10"))
+REVIEW_DEADLINE_SECONDS = float(os.getenv("PR_REVIEW_DEADLINE_SECONDS", "0"))
+# Model generations stop DEADLINE_FLUSH_SECONDS (at most a tenth of the deadline) early,
+# leaving that time to collect the partial comments of reviews cut short and post them
+DEADLINE_FLUSH_SECONDS = float(os.getenv("PR_REVIEW_DEADLINE_FLUSH_SECONDS", "10"))
+
+# Progressive posting: the summary comment is posted as a placeholder when the review
+# starts and edited in place, at most every PROGRESS_EDIT_INTERVAL seconds, as results arrive
+PROGRESS_COMMENT = os.getenv("PR_REVIEW_PROGRESS_COMMENT", "1") != "0"
+PROGRESS_EDIT_INTERVAL = 2.0
+
+# Fetched file contents stay in memory up to this many bytes per run, the rest is
+# spilled to temporary files in CONTENT_SPILL_DIR (system default if unset) and memory-mapped
+CONTENT_MEMORY_CAP = int(os.getenv("PR_REVIEW_CONTENT_MEMORY_MB", "64")) * 1024 * 1024
+CONTENT_SPILL_DIR = os.getenv("PR_REVIEW_SPILL_DIR") or None
+
+# Chatbot file snippets: up to CHAT_SNIPPET_CHARS characters, taken from windows of
+# HUNK_CONTEXT_LINES lines around each changed line
+CHAT_SNIPPET_CHARS = 5000
+HUNK_CONTEXT_LINES = 20
+
+# Symbol context: review prompts for files over SYMBOL_CONTEXT_MIN_BYTES show only the
+# definitions (up to SYMBOL_MAX_LINES lines) enclosing the changed lines. Parsed symbol
+# indexes are cached for SYMBOL_CACHE_SIZE blobs
+SYMBOL_CONTEXT_MIN_BYTES = int(os.getenv("PR_REVIEW_SYMBOL_CONTEXT_MIN_BYTES", "8000"))
+SYMBOL_MAX_LINES = 200
+SYMBOL_CACHE_SIZE = 1024
+
+# Review results are reused across PRs for identical code and diff hunks: REVIEW_CACHE_SIZE
+# reviews are kept in memory and all of them under REVIEW_CACHE_DIR (empty to disable)
+REVIEW_CACHE_DIR = os.getenv("PR_REVIEW_REVIEW_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "pr_review", "reviews"))
+REVIEW_CACHE_SIZE = 4096
+
+# Resident chatbot worker: pr_chatbot.py --worker listens here, and --process-comment
+# hands commands to it when it is running instead of starting cold. Commands are pickled,
+# so the connection key must stay secret: PR_REVIEW_WORKER_KEY if set, otherwise a random
+# key the worker writes to WORKER_KEY_FILE, readable by its user only. Clients wait up to
+# WORKER_REPLY_TIMEOUT seconds for a reply, and the worker keeps the contexts of its
+# WORKER_MAX_PRS most recent PRs
+WORKER_ADDRESS = os.getenv("PR_REVIEW_WORKER", "localhost:6321")
+WORKER_AUTHKEY = os.getenv("PR_REVIEW_WORKER_KEY", "").encode() or None
+WORKER_KEY_FILE = os.getenv("PR_REVIEW_WORKER_KEY_FILE", os.path.join(os.path.expanduser("~"), ".cache", "pr_review", "worker.key"))
+WORKER_REPLY_TIMEOUT = float(os.getenv("PR_REVIEW_WORKER_TIMEOUT", "900"))
+WORKER_MAX_PRS = 32
@@ -0,0 +1,4 @@
+from rich.console import Console
+
+# Shared console so output from concurrent stages is not interleaved mid-line
+console = Console()
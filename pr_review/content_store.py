@@ -0,0 +1,189 @@
+"""
+Size-capped store for fetched file contents.
+
+Files are kept in memory as UTF-8 bytes until the run's memory cap is reached,
+after which new files are spilled to temporary files and served as read-only
+memory-mapped views. Decoded text and line-numbered copies are only produced on
+demand, for the prompt that needs them, and are not kept.
+
+Each file gets a line-offset index when it is stored, so any range of numbered
+lines is located in O(1) and only that range is decoded.
+"""
+import mmap
+import re
+import tempfile
+from array import array
+from bisect import bisect_right
+from collections.abc import MutableMapping
+from threading import Lock
+
+from pr_review import config
+
+# Bytes held in memory by all stores in this process, checked against CONTENT_MEMORY_CAP
+MEMORY_IN_USE = 0
+MEMORY_LOCK = Lock()
+
+def reserve_memory(size, memory_cap):
+    """Claim size bytes of the run's in-memory budget, or return False if they do not fit."""
+    global MEMORY_IN_USE
+    with MEMORY_LOCK:
+        if MEMORY_IN_USE + size > memory_cap:
+            return False
+        MEMORY_IN_USE += size
+        return True
+
+def release_memory(size):
+    """Return size bytes to the run's in-memory budget."""
+    global MEMORY_IN_USE
+    with MEMORY_LOCK:
+        MEMORY_IN_USE -= size
+
+class FileContentStore(MutableMapping):
+    """
+    Mapping of file name to content that spills to memory-mapped files past the memory cap.
+
+    Assigning and reading work with str like a dict, so existing callers are unchanged.
+    view, size and numbered_lines give access without keeping a decoded copy around.
+    """
+
+    def __init__(self, memory_cap=None, spill_dir=None):
+        self.memory_cap = config.CONTENT_MEMORY_CAP if memory_cap is None else memory_cap
+        self.spill_dir = spill_dir or config.CONTENT_SPILL_DIR
+        self._in_memory = {}
+        self._spilled = {}
+        self._line_offsets = {}
+        self._lock = Lock()
+
+    def __setitem__(self, file_name, content):
+        data = content.encode("utf-8")
+        with self._lock:
+            self._discard(file_name)
+            if not data or reserve_memory(len(data), self.memory_cap):
+                self._in_memory[file_name] = data
+            else:
+                self._spilled[file_name] = self._spill(data)
+            self._line_offsets[file_name] = self._index_lines(data)
+
+    def __getitem__(self, file_name):
+        with self.view(file_name) as view:
+            return str(view, "utf-8", errors="replace")
+
+    def __delitem__(self, file_name):
+        with self._lock:
+            if file_name not in self._in_memory and file_name not in self._spilled:
+                raise KeyError(file_name)
+            self._discard(file_name)
+
+    def __iter__(self):
+        return iter(list(self._in_memory) + list(self._spilled))
+
+    def __len__(self):
+        return len(self._in_memory) + len(self._spilled)
+
+    def __contains__(self, file_name):
+        return file_name in self._in_memory or file_name in self._spilled
+
+    def _spill(self, data):
+        """Write data to an anonymous temporary file and map it read-only."""
+        with tempfile.TemporaryFile(dir=self.spill_dir) as f:
+            f.write(data)
+            f.flush()
+            # The mapping stays valid after the file is closed and unlinked
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @staticmethod
+    def _index_lines(data):
+        """
+        Build the byte offset of the start of every line, plus the end of the content.
+
+        Lines are split on newlines only, matching the line numbers GitHub uses for diffs
+        and review comments.
+        """
+        offsets = array("Q", [0])
+        offsets.extend(match.end() for match in re.finditer(b"\n", data))
+        if offsets[-1] != len(data):
+            offsets.append(len(data))
+        return offsets
+
+    def _discard(self, file_name):
+        """Drop a file's content and give back its memory or mapping."""
+        self._line_offsets.pop(file_name, None)
+        if file_name in self._in_memory:
+            release_memory(len(self._in_memory.pop(file_name)))
+        elif file_name in self._spilled:
+            self._spilled.pop(file_name).close()
+
+    def view(self, file_name):
+        """Return a read-only bytes view of a file's UTF-8 content, without copying it."""
+        if file_name in self._in_memory:
+            return memoryview(self._in_memory[file_name])
+        if file_name in self._spilled:
+            return memoryview(self._spilled[file_name])
+        raise KeyError(file_name)
+
+    def size(self, file_name):
+        """Return the size of a file's content in bytes."""
+        with self.view(file_name) as view:
+            return len(view)
+
+    def line_count(self, file_name):
+        """Return the number of lines in a file."""
+        return len(self._line_offsets[file_name]) - 1
+
+    def lines_within(self, file_name, max_bytes, start=1):
+        """Return the last line number such that lines start..it fit in max_bytes of content."""
+        offsets = self._line_offsets[file_name]
+        start = max(start, 1)
+        if start > len(offsets) - 1:
+            return start - 1
+        return max(bisect_right(offsets, offsets[start - 1] + max_bytes) - 1, start - 1)
+
+    def numbered_lines(self, file_name, start=1, end=None):
+        """
+        Return lines start..end (1-based, inclusive) with "N: " line number prefixes.
+
+        The range is located through the line-offset index and only its bytes are
+        decoded, so cutting a window out of a large file costs the size of the window.
+
+        Args:
+            file_name (str): Name of a stored file
+            start (int): First line to include
+            end (int): Last line to include, defaults to the end of the file
+
+        Returns:
+            str: The numbered lines joined by newlines
+        """
+        offsets = self._line_offsets[file_name]
+        start = max(start, 1)
+        end = len(offsets) - 1 if end is None else min(end, len(offsets) - 1)
+        if start > end:
+            return ""
+
+        with self.view(file_name) as view:
+            text = str(view[offsets[start - 1]:offsets[end]], "utf-8", errors="replace")
+        if "\r" in text:
+            text = text.replace("\r\n", "\n")
+        lines = text.split("\n")
+        if text.endswith("\n"):
+            lines.pop()
+        return "\n".join([f"{number}: {line}" for number, line in enumerate(lines, start)])
+
+    @property
+    def memory_bytes(self):
+        """Bytes of content held in memory by this store."""
+        return sum(len(data) for data in self._in_memory.values())
+
+    @property
+    def spilled_bytes(self):
+        """Bytes of content spilled to disk by this store."""
+        return sum(len(mapping) for mapping in self._spilled.values())
+
+    def close(self):
+        """Release all contents, memory and mappings."""
+        with self._lock:
+            for file_name in list(self._in_memory) + list(self._spilled):
+                self._discard(file_name)
+
+    def __del__(self):
+        # A finished review gives its share of the memory cap back to the run
+        self.close()
@@ -0,0 +1,52 @@
+import os
+import re
+from dataclasses import dataclass, field
+
+from pr_review.content_store import FileContentStore
+
+
+@dataclass
+class ReviewContext:
+    """
+    All per-PR review state, passed through the pipeline instead of module globals.
+
+    Each PR review gets its own context, so one process can review several PRs at once
+    without their summaries, diffs, file contents or findings leaking into each other.
+    """
+    pr_url: str
+    repo: str = ""
+    pr_number: str = ""
+    head_sha: str = ""
+    summary: str = ""
+    diff: str = ""
+    diff_files: dict = field(default_factory=dict)
+    files_content: FileContentStore = field(default_factory=FileContentStore)
+    semgrep_findings: list = field(default_factory=list)
+    change_analysis: list = field(default_factory=list)
+    pr_context: dict = None
+
+    @classmethod
+    def from_url(cls, pr_url):
+        """
+        Create a context for a GitHub PR URL.
+
+        Falls back to the REPO_NAME and PR_NUMBER environment variables set by the
+        workflows when the URL cannot be parsed.
+        """
+        match = re.search(r"github\.com/([^/]+/[^/]+)/pull/(\d+)", pr_url or "")
+        if match:
+            return cls(pr_url=pr_url, repo=match.group(1), pr_number=match.group(2))
+        return cls(pr_url=pr_url, repo=os.getenv("REPO_NAME", ""), pr_number=os.getenv("PR_NUMBER", ""))
+
+    @property
+    def download_dir(self):
+        """Directory for this PR's downloaded files, kept apart from other PRs."""
+        return os.path.join("downloaded_code", f"{self.repo.replace('/', '_')}_{self.pr_number}")
+
+    def output_path(self, file_name):
+        """Path under download_dir for a file this PR's review writes, so concurrent reviews don't overwrite it."""
+        return os.path.join(self.download_dir, file_name)
+
+    def change_analysis_text(self):
+        """Return the impact analysis entries as the numbered markdown list posted on the PR."""
+        return "".join(self.change_analysis)
@@ -0,0 +1,114 @@
+import re
+
+# New-file start line and line count of a hunk header: @@ -old_start,old_count +new_start,new_count @@
+HUNK_HEADER_PATTERN = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@")
+
+def parse_git_diff(diff_text):
+    """
+    Parses a Git diff string and returns a dictionary mapping filenames to their respective diffs.
+    
+    Args:
+        diff_text (str): The raw Git diff string.
+    
+    Returns:
+        dict: A dictionary where keys are filenames and values are their respective diffs.
+    """
+    file_diffs = {}
+    current_file = None
+    diff_lines = []
+
+    # Regex to match file changes in the diff format
+    file_change_pattern = re.compile(r"^diff --git a\/(.+?) b\/(.+)$")
+
+    for line in diff_text.splitlines():
+        match = file_change_pattern.match(line)
+        if match:
+            # Store the previous file diff if one exists
+            if current_file and diff_lines:
+                file_diffs[current_file] = "\n".join(diff_lines)
+            
+            # Start tracking a new file
+            current_file = match.group(2)  # Capture the filename after 'b/'
+            diff_lines = [line]  # Start collecting lines for this file
+        elif current_file:
+            diff_lines.append(line)
+
+    # Store the last collected diff
+    if current_file and diff_lines:
+        file_diffs[current_file] = "\n".join(diff_lines)
+    return file_diffs
+
+def parse_changed_lines(diff_content):
+    """
+    Parse a Git diff to extract line numbers that were changed.
+    
+    Args:
+        diff_content (str): The Git diff content for a file
+    
+    Returns:
+        list: List of line numbers that were changed (added or modified)
+    """
+    changed_lines = []
+    current_line = 0
+    
+    for line in diff_content.splitlines():
+        if line.startswith("@@"):
+            # Parse the @@ line to get the starting line number in the new file
+            # Format is typically: @@ -old_start,old_count +new_start,new_count @@
+            match = re.search(r"\+(\d+)", line)
+            if match:
+                current_line = int(match.group(1)) - 1  # -1 because we increment before using
+        elif line.startswith("+") and not line.startswith("+++"):
+            # This is an added/modified line (not the +++ filename line)
+            current_line += 1
+            changed_lines.append(current_line)
+        elif not line.startswith("-"):
+            # This is a context line (not removed)
+            current_line += 1
+    
+    return changed_lines
+
+def parse_hunks(diff_content):
+    """
+    Split a file diff into its hunks.
+
+    Args:
+        diff_content (str): The Git diff content for a file, or just its hunks
+
+    Returns:
+        list: (new_start, new_count, lines) tuples, lines holding the hunk's body
+        with their " ", "+" and "-" prefixes
+    """
+    hunks = []
+    for line in diff_content.splitlines():
+        if line.startswith("@@"):
+            match = HUNK_HEADER_PATTERN.match(line)
+            if match:
+                new_count = int(match.group(2)) if match.group(2) is not None else 1
+                hunks.append((int(match.group(1)), new_count, []))
+        elif hunks and line[:1] in ("+", "-", " "):
+            hunks[-1][2].append(line)
+    return hunks
+
+def line_windows(changed_lines, context, line_count):
+    """
+    Merge changed line numbers into the windows of surrounding lines to show with them.
+
+    Args:
+        changed_lines (list): Changed line numbers, as returned by parse_changed_lines
+        context (int): Lines of context to include on each side of a change
+        line_count (int): Number of lines in the file
+
+    Returns:
+        list: Sorted, non-overlapping (start, end) line ranges, both inclusive
+    """
+    windows = []
+    for line in sorted(set(changed_lines)):
+        start, end = max(line - context, 1), min(line + context, line_count)
+        if start > end:
+            continue
+        if windows and start <= windows[-1][1] + 1:
+            windows[-1] = (windows[-1][0], max(windows[-1][1], end))
+        else:
+            windows.append((start, end))
+    return windows
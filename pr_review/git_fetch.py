@@ -0,0 +1,172 @@
+"""
+Git-native fetch backend.
+
+Keeps one bare, shallow, blobless mirror per repository under GIT_CACHE_DIR. A PR's
+head commit is fetched with its trees only, then every file the review needs is
+pulled in one batched blob fetch and read from the object store, pinned to the
+head SHA. Later runs on the same repository fetch incrementally.
+"""
+import base64
+import os
+import shutil
+import subprocess
+import tempfile
+from threading import Lock
+
+from pr_review import config
+from pr_review.resilience import run_command
+from pr_review.tracing import trace_stage
+
+# One lock per mirror, since concurrent fetches into one repository contend for its locks
+MIRROR_LOCKS = {}
+MIRROR_LOCKS_GUARD = Lock()
+
+def mirror_lock(repo):
+    """Return the lock that serializes git operations on one repository's mirror."""
+    with MIRROR_LOCKS_GUARD:
+        return MIRROR_LOCKS.setdefault(repo, Lock())
+
+def git_env():
+    """Environment for git commands, authenticating to GitHub without putting the token on the command line."""
+    env = dict(os.environ, GIT_TERMINAL_PROMPT="0")
+    token = os.getenv('GITHUB_TOKEN')
+    if token:
+        credentials = base64.b64encode(f"x-access-token:{token}".encode()).decode()
+        env.update({
+            "GIT_CONFIG_COUNT": "1",
+            "GIT_CONFIG_KEY_0": "http.extraHeader",
+            "GIT_CONFIG_VALUE_0": f"Authorization: Basic {credentials}"
+        })
+    return env
+
+def run_git(git_dir, *args, stdin=None):
+    """Run a git command against a bare repository, within the git stage timeout, and return its stdout as bytes."""
+    result = run_command(["git", f"--git-dir={git_dir}", *args], "git", check=True, input=stdin, env=git_env())
+    return result.stdout
+
+def mirror_is_valid(git_dir):
+    """Return True if a mirror directory holds an initialised repository with its remote configured."""
+    try:
+        return bool(run_git(git_dir, "config", "remote.origin.promisor").strip())
+    except (subprocess.CalledProcessError, OSError):
+        return False
+
+def ensure_mirror(repo):
+    """
+    Create the bare, blobless mirror of a repository if it does not exist yet.
+
+    The mirror is set up in a temporary directory and renamed into place, so a failed
+    setup never leaves a directory that later runs take for a mirror. One left broken
+    by an older version is replaced.
+    """
+    git_dir = os.path.join(config.GIT_CACHE_DIR, repo.replace("/", "_") + ".git")
+    if os.path.isdir(git_dir):
+        if mirror_is_valid(git_dir):
+            return git_dir
+        shutil.rmtree(git_dir, ignore_errors=True)
+
+    os.makedirs(config.GIT_CACHE_DIR, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=config.GIT_CACHE_DIR, suffix=".tmp")
+    try:
+        run_git(tmp_dir, "init", "--bare", "--quiet")
+        run_git(tmp_dir, "config", "remote.origin.url", config.GIT_REMOTE_URL.format(repo=repo))
+        # Mark the remote as a promisor so git accepts objects missing from the mirror
+        run_git(tmp_dir, "config", "remote.origin.partialclonefilter", "blob:none")
+        run_git(tmp_dir, "config", "remote.origin.promisor", "true")
+        try:
+            os.rename(tmp_dir, git_dir)
+        except OSError:
+            # Another run set the mirror up first
+            if not mirror_is_valid(git_dir):
+                raise
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return git_dir
+
+def missing_blobs(git_dir, head_sha, file_names):
+    """List the blobs of the given files at a commit that are not in the mirror yet, without lazily fetching them."""
+    output = run_git(git_dir, "--literal-pathspecs", "rev-list", "--objects", "--missing=print",
+                     head_sha, "--", *file_names)
+    return {line[1:] for line in output.decode().splitlines() if line.startswith("?")}
+
+def fetch_pr_head(git_dir, pr_number, head_sha=None):
+    """
+    Fetch a PR's head commit and trees into the mirror.
+
+    Args:
+        git_dir (str): Path of the bare mirror
+        pr_number (str): Number of the PR, used to fetch refs/pull/<n>/head
+        head_sha (str): Head commit to pin to; the current PR head is used if not given
+
+    Returns:
+        str: SHA of the fetched head commit
+    """
+    ref = f"refs/pr/{pr_number}"
+    if head_sha:
+        try:
+            if run_git(git_dir, "rev-parse", "--verify", "--quiet", ref).decode().strip() == head_sha:
+                return head_sha
+        except subprocess.CalledProcessError:
+            pass
+
+    source = head_sha or f"refs/pull/{pr_number}/head"
+    run_git(git_dir, "fetch", "--quiet", "--no-tags", "--depth=1", "--filter=blob:none",
+            "origin", f"+{source}:{ref}")
+    return run_git(git_dir, "rev-parse", ref).decode().strip()
+
+def read_files(git_dir, head_sha, file_names):
+    """
+    Read files at a commit, fetching all of their missing blobs in a single request.
+
+    Returns:
+        dict: File name to content, for the files that exist at the commit
+    """
+    listing = run_git(git_dir, "ls-tree", "-z", head_sha, "--", *file_names)
+    blobs = {}
+    for entry in listing.split(b"\0"):
+        if not entry:
+            continue
+        meta, path = entry.split(b"\t", 1)
+        _, object_type, oid = meta.split()
+        if object_type == b"blob":
+            blobs[path.decode()] = oid.decode()
+
+    if not blobs:
+        return {}
+    missing = set(blobs.values()) & missing_blobs(git_dir, head_sha, list(blobs))
+    if missing:
+        # Same request git makes for lazy fetches, but for every blob at once
+        run_git(git_dir, "-c", "fetch.negotiationAlgorithm=noop", "fetch", "--quiet", "--no-tags",
+                "--no-write-fetch-head", "--recurse-submodules=no", "--filter=blob:none",
+                "--stdin", "origin", stdin="\n".join(missing).encode() + b"\n")
+
+    output = run_git(git_dir, "cat-file", "--batch", stdin="\n".join(blobs.values()).encode() + b"\n")
+    contents = {}
+    pos = 0
+    for path, oid in blobs.items():
+        header_end = output.index(b"\n", pos)
+        size = int(output[pos:header_end].split()[2])
+        data = output[header_end + 1:header_end + 1 + size]
+        contents[path] = data.decode("utf-8", errors="replace")
+        pos = header_end + 1 + size + 1
+    return contents
+
+def read_pr_files(repo, pr_number, file_names, head_sha=None):
+    """
+    Fetch the contents of files at a PR's head through the repository mirror.
+
+    Args:
+        repo (str): Base repository as owner/name; PR heads from forks are fetched from it too
+        pr_number (str): Number of the PR
+        file_names (list): Paths of the files to read
+        head_sha (str): Head commit to pin to; the current PR head is used if not given
+
+    Returns:
+        tuple: (head SHA, dict of file name to content)
+    """
+    with mirror_lock(repo), trace_stage("git_fetch", files=len(file_names)) as span:
+        git_dir = ensure_mirror(repo)
+        head_sha = fetch_pr_head(git_dir, pr_number, head_sha)
+        contents = read_files(git_dir, head_sha, file_names) if file_names else {}
+        span["bytes"] = sum(len(content) for content in contents.values())
+    return head_sha, contents
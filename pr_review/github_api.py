@@ -0,0 +1,269 @@
+import os
+import re
+import subprocess
+
+from pr_review import config
+from pr_review.clients import get_pull_request, http_session
+from pr_review.console import console
+from pr_review.diff import parse_git_diff
+from pr_review.rate_limit import github_call
+from pr_review.resilience import BackendUnavailable, circuit_breaker
+from pr_review.scheduling import rank_files, stage_timeout
+from pr_review.tracing import trace_stage
+
+
+def extract_repo_and_pr(url):
+    """Extracts the repo owner/name and PR number from a GitHub PR URL."""
+    match = re.search(r"github\.com/([^/]+/[^/]+)/pull/(\d+)", url)
+    if match:
+        return match.group(1), match.group(2)
+    else:
+        console.print("[red]Invalid PR URL. Please provide a valid GitHub PR URL.")
+        return None, None
+
+def get_pr_context(url: str) -> dict:
+    """
+    Get PR details from GitHub.
+
+    The head repository and branch come from the same PR object. For a PR from a fork
+    that has since been deleted, the base repository is used, since it still has the
+    head commit under refs/pull/<n>/head.
+    """
+    pattern = r"https://github\.com/([^/]+)/([^/]+)/pull/(\d+)"
+    match = re.match(pattern, url)
+    
+    if not match:
+        raise ValueError("Invalid GitHub PR URL")
+        
+    owner, repo, pr_number = match.groups()
+    pr = get_pull_request(f"{owner}/{repo}", pr_number)
+    head_repo = pr.head.repo.full_name if pr.head.repo else pr.base.repo.full_name
+    
+    return {
+        'pull_request': pr,
+        'title': pr.title,
+        'description': pr.body,
+        'changed_files': github_call(lambda: list(pr.get_files())),
+        'commits': github_call(lambda: list(pr.get_commits())),
+        'status': pr.state,
+        'head_sha': pr.head.sha,
+        'head_repo': head_repo,
+        'head_branch': pr.head.ref,
+        'is_fork': head_repo != pr.base.repo.full_name
+    }
+
+def load_pr_context(ctx):
+    """
+    Return the PR details for a review context, fetching them from GitHub only once.
+
+    The head commit seen here is pinned on the context, so every file read during the
+    review comes from the same commit even if the branch moves.
+    """
+    if ctx.pr_context is None:
+        ctx.pr_context = get_pr_context(ctx.pr_url)
+        ctx.head_sha = ctx.head_sha or ctx.pr_context['head_sha']
+    return ctx.pr_context
+
+def pinned_head_commit(ctx):
+    """
+    Return the commit object of the pinned head commit (ctx.head_sha), which comments go on.
+
+    Taken from the commits loaded with the PR details, so posting lists no commits. If the
+    branch moved between loading them and pinning, it is looked up in the base repository,
+    which has every PR commit under refs/pull/<n>/head.
+    """
+    pr_context = load_pr_context(ctx)
+    for commit in reversed(pr_context['commits']):
+        if commit.sha == ctx.head_sha:
+            return commit
+    return github_call(pr_context['pull_request'].base.repo.get_commit, ctx.head_sha)
+
+def get_pr_details(ctx):
+    """
+    Return the changed files, head repository and head branch of a PR.
+
+    Read from the PR details loaded once per review context, so repeated calls make
+    no further GitHub requests. For PRs from forks the head repository is the fork.
+
+    Returns:
+        tuple: (list of changed file paths, head repo as owner/name, head branch)
+    """
+    pr_context = load_pr_context(ctx)
+    files = [file.filename for file in pr_context['changed_files']]
+    return files, pr_context['head_repo'], pr_context['head_branch']
+
+def get_pr_diff(ctx):
+    """Fetch the full PR diff using the GitHub API and store it on the review context."""
+    github_token = os.getenv('GITHUB_TOKEN')
+    diff_url = f"{config.GITHUB_API_URL}/repos/{ctx.repo}/pulls/{ctx.pr_number}"
+    headers = {
+        "Authorization": f"Bearer {github_token}",
+        "Accept": "application/vnd.github.diff"  # Request raw diff format
+    }
+
+    with trace_stage("get_pr_diff") as span:
+        response = github_call(http_session().get, diff_url, headers=headers, timeout=stage_timeout("github"))
+        span["bytes"] = len(response.content)
+
+    if response.status_code != 200:
+        print(f"Failed to fetch PR diff: {response.text}")
+        return None
+
+    ctx.diff = response.text
+    ctx.diff_files = parse_git_diff(response.text)
+    return response.text 
+
+def select_important_files(changed_files, max_files=5, semgrep_findings=()):
+    """Select the most important files for analysis, highest review risk first"""
+    return rank_files(changed_files, semgrep_findings)[:max_files]
+
+def get_file_contents(ctx, changed_files):
+    """Fetch content of changed files to provide more context to the LLM"""
+    if not ctx.repo or not ctx.pr_number:
+        return ""
+    
+    # Select important files (limit to avoid overwhelming context)
+    important_files = select_important_files(changed_files, config.REVIEW_MAX_FILES, ctx.semgrep_findings)
+    
+    ctx.files_content.update(fetch_pr_files(ctx, [file.filename for file in important_files]))
+    return format_files_content(ctx, important_files)
+
+def fetch_pr_files(ctx, file_names):
+    """
+    Fetch the contents of files at the PR head.
+
+    Uses the local git mirror when FETCH_BACKEND is "git" and falls back to one HTTP
+    request per file if git is unavailable, the fetch fails or times out, or git's
+    circuit is open after repeated failures. Reads are pinned to ctx.head_sha once it
+    is known.
+
+    Args:
+        ctx (ReviewContext): Review state of the PR
+        file_names (list): Paths of the files to fetch
+
+    Returns:
+        dict: File name to content, for the files that could be fetched
+    """
+    if config.FETCH_BACKEND == "git":
+        from pr_review.git_fetch import read_pr_files
+        breaker = circuit_breaker("git")
+        try:
+            breaker.check()
+            ctx.head_sha, contents = read_pr_files(ctx.repo, ctx.pr_number, file_names, ctx.head_sha or None)
+            breaker.record_success()
+            return contents
+        except BackendUnavailable as e:
+            console.print(f"[yellow]{e}, fetching over HTTP")
+        except subprocess.CalledProcessError as e:
+            breaker.record_failure()
+            console.print(f"[yellow]Git fetch failed, falling back to HTTP: {e.stderr.decode(errors='replace').strip()}")
+        except subprocess.TimeoutExpired:
+            breaker.record_failure()
+            console.print("[yellow]Git fetch timed out, falling back to HTTP")
+        except OSError as e:
+            breaker.record_failure()
+            console.print(f"[yellow]Git fetch unavailable, falling back to HTTP: {e}")
+
+    _, head_repo, _ = get_pr_details(ctx)
+    return fetch_file_contents(head_repo, ctx.head_sha, file_names)
+
+def fetch_file_contents(head_repo, head_ref, file_names):
+    """Fetch several files over HTTP, returning the contents of those that exist."""
+    contents = {}
+    for file_name in file_names:
+        content = fetch_file_content(head_repo, head_ref, file_name)
+        if content is not None:
+            contents[file_name] = content
+    return contents
+
+def fetch_file_content(head_repo, head_ref, file_name):
+    """Fetch the content of a single file at a commit SHA or refs/heads/<branch>, or None if unavailable."""
+    url = f"https://raw.githubusercontent.com/{head_repo}/{head_ref}/{file_name}"
+    with trace_stage("get_file_contents", file=file_name) as span:
+        response = github_call(http_session().get, url, timeout=stage_timeout("github"))
+        span["bytes"] = len(response.content)
+
+    if response.status_code == 200:
+        return response.text
+    return None
+
+def format_files_content(ctx, files):
+    """Join the fetched contents of the given files into the prompt block used for summaries."""
+    file_contents = []
+    for file in files:
+        if file.filename in ctx.files_content:
+            file_contents.append(f"File: {file.filename}\n```\n{ctx.files_content[file.filename]}\n```\n")
+    return "\n".join(file_contents)
+
+def download_files(ctx, temp_dir, files):
+    """Writes the PR head versions of files to a temporary directory for analysis."""
+    contents = fetch_pr_files(ctx, files)
+    downloaded_files = []
+
+    for file_path in files:
+        if file_path not in contents:
+            console.print(f"[red]Failed to download {file_path} (Repo: {ctx.repo}, Commit: {ctx.head_sha or 'head'})")
+            continue
+
+        local_path = os.path.join(temp_dir, os.path.basename(file_path))
+        with open(local_path, "w", encoding="utf-8") as f:
+            f.write(contents[file_path])
+        downloaded_files.append(local_path)
+        console.print(f"[green]Downloaded: {file_path}")
+
+    return downloaded_files
+
+def post_comment_on_pr(pr_url, comment, file_name):
+    """Posts a comment on the PR with analysis results and returns the posted comment, for later edits."""
+    owner, repo, pr_number = re.search(r"github\.com/([^/]+)/([^/]+)/pull/(\d+)", pr_url).groups()
+
+    pr = get_pull_request(f"{owner}/{repo}", pr_number)
+    with trace_stage("post_comment", bytes=len(comment)):
+        posted = github_call(pr.create_issue_comment, comment, write=True)
+    os.makedirs(os.path.dirname(file_name) or ".", exist_ok=True)
+    with open(file_name, "w") as f:
+        f.write(comment)
+    console.print(f"[green]Posted analysis comment on PR #{pr_number}")
+    return posted
+
+def post_line_comments(pr_url, file_reviews, pr=None, commit=None):
+    """
+    Post review comments on specific lines of files in the PR.
+    
+    Args:
+        pr_url (str): URL of the PR
+        file_reviews (dict): Dictionary mapping filenames to lists of review comments
+        pr: The pull request object, looked up from pr_url if not given
+        commit: The commit to comment on, defaults to the latest commit of the PR; reviews
+            pass the pinned commit they read (see pinned_head_commit)
+    """
+    if pr is None:
+        owner, repo, pr_number = re.search(r"github\.com/([^/]+)/([^/]+)/pull/(\d+)", pr_url).groups()
+        pr = get_pull_request(f"{owner}/{repo}", pr_number)
+    
+    # Get the latest commit in the PR
+    latest_commit = commit or github_call(lambda: list(pr.get_commits()))[-1]
+    comment_count = 0
+
+    with trace_stage("post_line_comments") as span:
+        for file_name, comments in file_reviews.items():
+            for comment in comments:
+                try:
+                    # Bursts of comments are paced by the governor to stay under secondary rate limits
+                    cm = github_call(
+                        pr.create_review_comment,
+                        body=comment["comment"],
+                        commit=latest_commit,
+                        path=file_name,
+                        line=int(comment["line"]),
+                        as_suggestion=False,
+                        write=True
+                    )
+                    comment_count += 1
+                    console.print(f"[green]Posted comment on {file_name}: {cm}")
+                except Exception as e:
+                    console.print(f"[red]Error posting comment to {file_name}:: {e}")
+        span["comments"] = comment_count
+
+    
+    console.print(f"[green]Posted {comment_count} line-specific comments on the PR")
@@ -0,0 +1,200 @@
+"""
+Near-duplicate hunk detection for codemod, rename and formatting PRs.
+
+Such PRs repeat the same edit in hundreds of places. Each hunk is fingerprinted by
+the shingles of its normalized changed-line tokens and a MinHash signature, and
+similar hunks are clustered through locality-sensitive hashing of the signatures.
+Files are then planned in risk order: a file all of whose hunks repeat hunks of an
+already planned file becomes a follower and is not sent to the model; the findings of
+the representative hunks are fanned out to it instead.
+
+Normalization keeps what the edit changes and abstracts what it keeps: identifiers
+found on both the removed and the added lines of a hunk (the variables around a
+renamed call) become a placeholder, as do string and number literals, while the
+identifiers being removed or introduced stay as they are.
+"""
+import hashlib
+import random
+import re
+from collections import defaultdict, namedtuple
+
+from pr_review import config
+from pr_review.diff import parse_hunks
+
+Hunk = namedtuple("Hunk", "file_name start end added removed signature")
+
+TOKEN_PATTERN = re.compile(r"""
+    (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+    | (?P<number>\b\d[\w.]*)
+    | (?P<name>[A-Za-z_$][\w$]*)
+    | (?P<punct>[^\w\s])
+""", re.VERBOSE)
+
+SHINGLE_SIZE = 3
+MINHASH_PERMUTATIONS = 64
+# Signatures are split into bands of this many rows; hunks sharing a band are compared
+MINHASH_BAND_ROWS = 4
+MINHASH_PRIME = (1 << 61) - 1
+# Fixed seed so signatures, and therefore clusters, are the same on every run
+MINHASH_RNG = random.Random(1729)
+MINHASH_PARAMS = [
+    (MINHASH_RNG.randrange(1, MINHASH_PRIME), MINHASH_RNG.randrange(MINHASH_PRIME))
+    for _ in range(MINHASH_PERMUTATIONS)
+]
+
+def hunk_tokens(lines):
+    """
+    Return the normalized tokens of a hunk's added and removed lines.
+
+    Args:
+        lines (list): Hunk body lines with their " ", "+" and "-" prefixes
+
+    Returns:
+        list: Tokens, each line starting with its "+" or "-" marker
+    """
+    changed = [(line[0], TOKEN_PATTERN.finditer(line[1:])) for line in lines if line[:1] in ("+", "-")]
+    changed = [(marker, [(match.lastgroup, match.group()) for match in matches]) for marker, matches in changed]
+
+    sides = {"+": set(), "-": set()}
+    for marker, tokens in changed:
+        sides[marker].update(value for kind, value in tokens if kind == "name")
+    kept = sides["+"] & sides["-"]
+
+    normalized = []
+    for marker, tokens in changed:
+        normalized.append(marker)
+        for kind, value in tokens:
+            if kind in ("string", "number"):
+                normalized.append(kind)
+            elif kind == "name" and value in kept:
+                normalized.append("name")
+            else:
+                normalized.append(value)
+    return normalized
+
+def minhash_signature(tokens):
+    """Return the MinHash signature of the token shingles of a hunk."""
+    shingles = {
+        " ".join(tokens[i:i + SHINGLE_SIZE])
+        for i in range(max(len(tokens) - SHINGLE_SIZE + 1, 1))
+    }
+    hashes = [int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "big") for shingle in shingles]
+    return tuple(min((a * h + b) % MINHASH_PRIME for h in hashes) for a, b in MINHASH_PARAMS)
+
+def similarity(first, second):
+    """Estimate the Jaccard similarity of two hunks' shingles from their signatures."""
+    return sum(x == y for x, y in zip(first, second)) / MINHASH_PERMUTATIONS
+
+def file_hunks(file_name, patch):
+    """
+    Fingerprint the hunks of a file's patch.
+
+    Returns:
+        list: Hunk(file_name, start, end, added, removed, signature) tuples, start and
+        end being the hunk's lines in the new file
+    """
+    hunks = []
+    for start, count, lines in parse_hunks(patch):
+        added = sum(line.startswith("+") for line in lines)
+        removed = sum(line.startswith("-") for line in lines)
+        hunks.append(Hunk(file_name, start, start + max(count, 1) - 1, added, removed,
+                          minhash_signature(hunk_tokens(lines))))
+    return hunks
+
+class HunkClusters:
+    """Representative hunks, indexed by the bands of their signatures."""
+
+    def __init__(self, min_similarity=None):
+        self.min_similarity = config.HUNK_DEDUP_SIMILARITY if min_similarity is None else min_similarity
+        self.representatives = []
+        self.buckets = defaultdict(list)
+
+    def bands(self, signature):
+        """Yield the (offset, rows) bands of a signature, the keys of its buckets."""
+        for start in range(0, MINHASH_PERMUTATIONS, MINHASH_BAND_ROWS):
+            yield start, signature[start:start + MINHASH_BAND_ROWS]
+
+    def match(self, hunk):
+        """Return the representative a hunk repeats, or None if it is new."""
+        candidates = {index for band in self.bands(hunk.signature) for index in self.buckets.get(band, ())}
+        best, best_similarity = None, self.min_similarity
+        for index in sorted(candidates):
+            representative = self.representatives[index]
+            # The edit must have the same shape, not just similar tokens
+            if (representative.added, representative.removed) != (hunk.added, hunk.removed):
+                continue
+            score = similarity(representative.signature, hunk.signature)
+            if score >= best_similarity:
+                best, best_similarity = representative, score
+        return best
+
+    def add(self, hunk):
+        """Make a hunk the representative of a new cluster."""
+        self.representatives.append(hunk)
+        for band in self.bands(hunk.signature):
+            self.buckets[band].append(len(self.representatives) - 1)
+
+def plan_file_reviews(ranked_files, max_files):
+    """
+    Choose which files to send to the model and which can reuse another file's review.
+
+    Files are taken in risk order. A file whose hunks all repeat hunks of files already
+    chosen for review becomes a follower, even past max_files; otherwise it is reviewed
+    if there is room and its hunks represent their clusters.
+
+    Args:
+        ranked_files (list): Changed files, highest risk first, as returned by rank_files
+        max_files (int): Maximum number of files to review
+
+    Returns:
+        tuple: (files to review, followers) where followers maps a file name to its
+        (hunk, representative hunk) pairs
+    """
+    if not config.HUNK_DEDUP:
+        return ranked_files[:max_files], {}
+
+    clusters = HunkClusters()
+    review, followers = [], {}
+    for file in ranked_files:
+        hunks = file_hunks(file.filename, getattr(file, "patch", None) or "")
+        matches = [clusters.match(hunk) for hunk in hunks]
+        if hunks and all(matches):
+            followers[file.filename] = list(zip(hunks, matches))
+        elif len(review) < max_files:
+            review.append(file)
+            for hunk, representative in zip(hunks, matches):
+                if representative is None:
+                    clusters.add(hunk)
+    return review, followers
+
+def fan_out_reviews(file_reviews, followers, reviewed_files):
+    """
+    Copy the comments on representative hunks to the matching hunks of follower files.
+
+    Args:
+        file_reviews (dict): File name to review comments of the reviewed files
+        followers (dict): Follower file name to (hunk, representative hunk) pairs
+        reviewed_files (set): Files whose review completed
+
+    Returns:
+        dict: Follower file name to its comments, possibly none, for followers whose
+        representatives were all reviewed
+    """
+    follower_reviews = {}
+    for file_name, pairs in followers.items():
+        if any(representative.file_name not in reviewed_files for _, representative in pairs):
+            continue
+        comments = []
+        for hunk, representative in pairs:
+            for comment in file_reviews.get(representative.file_name, []):
+                try:
+                    line = int(comment["line"])
+                except (TypeError, ValueError):
+                    continue
+                if representative.start <= line <= representative.end:
+                    comments.append({
+                        "line": min(hunk.start + line - representative.start, hunk.end),
+                        "comment": f"{comment['comment']} (Same change as in `{representative.file_name}`.)"
+                    })
+        follower_reviews[file_name] = comments
+    return follower_reviews
@@ -0,0 +1,77 @@
+import re
+import json
+
+class JSONObjectExtractor:
+    """
+    Incrementally pulls complete JSON objects out of streamed or noisy model output.
+
+    Text is fed in chunks as it arrives. Every object whose closing brace has been
+    seen is decoded on the spot, at any nesting depth, so a response that is cut
+    off or wrapped in prose still yields all of the objects that were completed.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.objects = []
+        # Set by the producer once the output ended normally rather than being cut off
+        self.finished = False
+        self._pos = 0
+        self._open_braces = []
+        self._in_string = False
+        self._escaped = False
+        self._decoded_end = 0
+
+    def feed(self, chunk):
+        """Add a chunk of output and return the objects it completed."""
+        self.buffer += chunk
+        completed = []
+
+        while self._pos < len(self.buffer):
+            char = self.buffer[self._pos]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                # Quotes in prose outside of any object are not JSON strings
+                self._in_string = bool(self._open_braces)
+            elif char == "{":
+                self._open_braces.append(self._pos)
+            elif char == "}" and self._open_braces:
+                start = self._open_braces.pop()
+                obj = self._decode(self.buffer[start:self._pos + 1])
+                if obj is not None:
+                    completed.append(obj)
+                    self._decoded_end = self._pos + 1
+            self._pos += 1
+
+        self.objects.extend(completed)
+        return completed
+
+    def unparsed_remainder(self):
+        """Return the output after the last object that could be decoded."""
+        return self.buffer[self._decoded_end:]
+
+    def parsed_cleanly(self):
+        """Return True if the output ended normally and every object in it was decoded."""
+        return self.finished and bool(self.objects) and "{" not in self.unparsed_remainder()
+
+    @staticmethod
+    def _decode(text):
+        """Decode one JSON object, tolerating stray escapes and raw control characters."""
+        for candidate in (text, re.sub(r'\\([^"\\/bfnrtu])', r'\1', text)):
+            try:
+                return json.loads(candidate, strict=False)
+            except json.JSONDecodeError:
+                continue
+        return None
+
+def extract_review_comments(extractor):
+    """Return the review comment objects ({"line", "comment"}) found by an extractor."""
+    return [
+        obj for obj in extractor.objects
+        if isinstance(obj, dict) and "line" in obj and "comment" in obj
+    ]
@@ -0,0 +1,172 @@
+import json
+import time
+from contextlib import contextmanager
+from threading import BoundedSemaphore
+
+from pr_review import config
+from pr_review.clients import http_session
+from pr_review.console import console
+from pr_review.json_extract import JSONObjectExtractor
+from pr_review.resilience import BackendUnavailable, circuit_breaker
+from pr_review.scheduling import generation_cutoff_passed, generation_time_left, stage_timeout
+from pr_review.tracing import trace_stage, record_ollama_metrics
+
+# Generations in flight across every review in the process, including batches of PRs
+OLLAMA_SLOTS = BoundedSemaphore(config.OLLAMA_CONCURRENCY)
+
+def build_generate_payload(system_prompt, prompt, stream=False, model=None):
+    """Build an Ollama generate request with the fixed instructions in the system field."""
+    return {
+        "model": model or config.MODEL_NAME,
+        "system": system_prompt,
+        "prompt": prompt,
+        "stream": stream,
+        "keep_alive": config.OLLAMA_KEEP_ALIVE
+    }
+
+@contextmanager
+def ollama_slot(purpose):
+    """Hold one of the process's Ollama slots, yielding False if the generation cutoff passes first."""
+    timeout = generation_time_left()
+    acquired = timeout != 0.0 and OLLAMA_SLOTS.acquire(timeout=timeout)
+    if acquired and generation_cutoff_passed():
+        # The slot freed up just as generations had to stop
+        OLLAMA_SLOTS.release()
+        acquired = False
+    if not acquired:
+        console.print(f"[yellow]Deadline reached, skipping {purpose} request")
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            OLLAMA_SLOTS.release()
+
+def post_generate(payload, purpose, span, stream=False):
+    """
+    Post a generate request within the Ollama stage timeout, through Ollama's circuit breaker.
+
+    Returns:
+        The response, or None if Ollama is unavailable, did not answer in time or could
+        not be reached; the reason is recorded on the span
+    """
+    import requests
+
+    breaker = circuit_breaker("ollama")
+    try:
+        breaker.check()
+        response = http_session().post(config.OLLAMA_API_URL, json=payload, stream=stream,
+                                       timeout=stage_timeout("ollama"))
+    except BackendUnavailable as e:
+        span["error"] = "unavailable"
+        console.print(f"[yellow]{e}, skipping the {purpose} request")
+        return None
+    except requests.exceptions.RequestException as e:
+        if generation_cutoff_passed():
+            span["error"] = "deadline"
+            console.print(f"[yellow]Deadline reached before Ollama answered the {purpose} request")
+        else:
+            breaker.record_failure()
+            span["error"] = repr(e)
+            console.print(f"[red]Ollama {purpose} request failed: {e}")
+        return None
+
+    if response.status_code >= 500:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+    return response
+
+def ollama_generate(payload, purpose, **attributes):
+    """
+    Send a non-streaming generate request, recording its timing and token counts in the trace.
+
+    Returns None instead of a response if Ollama is unavailable, or does not answer within
+    its stage timeout or before the generation cutoff (see scheduling.generation_time_left).
+    """
+    with ollama_slot(purpose) as acquired:
+        if not acquired:
+            return None
+        with trace_stage("ollama", purpose=purpose, **attributes) as span:
+            span["prompt_bytes"] = len(payload.get("system", "")) + len(payload["prompt"])
+            response = post_generate(payload, purpose, span)
+            if response is None:
+                return None
+            span["bytes"] = len(response.content)
+            if response.status_code == 200:
+                record_ollama_metrics(span, response.json())
+        return response
+
+def stream_json_generation(system_prompt, prompt, response_format="json", purpose="review", model=None):
+    """
+    Stream a generation from Ollama into a JSONObjectExtractor.
+
+    Args:
+        system_prompt (str): The fixed instruction prefix
+        prompt (str): The per-call data
+        response_format: A JSON schema for structured output, or "json"
+        purpose (str): Label for this call in the run trace
+        model (str): Ollama model to generate with, defaults to config.MODEL_NAME
+
+    Returns:
+        JSONObjectExtractor: The extractor holding everything received, or None if the request
+        failed, Ollama is unavailable or the generation cutoff has passed. A stream still running
+        at the cutoff or past its stage timeout is cut off, keeping the objects completed
+        before it; only a stream that reached Ollama's final chunk is marked finished.
+    """
+    import requests
+
+    payload = build_generate_payload(system_prompt, prompt, stream=True, model=model)
+    payload["format"] = response_format
+
+    with ollama_slot(purpose) as acquired:
+        if not acquired:
+            return None
+        # The whole generation, not just each read, is bounded by the stage timeout
+        stop_at = time.monotonic() + stage_timeout("ollama")
+        with trace_stage("ollama", purpose=purpose, model=payload["model"]) as span:
+            span["prompt_bytes"] = len(system_prompt) + len(prompt)
+            response = post_generate(payload, purpose, span, stream=True)
+            if response is not None and response.status_code == 400 and response_format != "json":
+                # Older Ollama servers only understand plain JSON mode, not schemas
+                payload["format"] = "json"
+                response = post_generate(payload, purpose, span, stream=True)
+            if response is None:
+                return None
+
+            if response.status_code != 200:
+                span["error"] = f"HTTP {response.status_code}"
+                console.print(f"[red]Error from Ollama: {response.status_code} - {response.text}")
+                return None
+
+            extractor = JSONObjectExtractor()
+            try:
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    extractor.feed(chunk.get("response", ""))
+                    if chunk.get("done"):
+                        # The final chunk carries the token counts and timings
+                        record_ollama_metrics(span, chunk)
+                        extractor.finished = True
+                        break
+                    if generation_cutoff_passed():
+                        span["error"] = "deadline"
+                        console.print(f"[yellow]Deadline reached, keeping the partial {purpose} output")
+                        response.close()
+                        break
+                    if time.monotonic() > stop_at:
+                        span["error"] = "timeout"
+                        console.print(f"[yellow]The {purpose} generation ran past its timeout, keeping the partial output")
+                        circuit_breaker("ollama").record_failure()
+                        response.close()
+                        break
+            except (requests.exceptions.RequestException, json.JSONDecodeError) as e:
+                # Keep whatever was completed before the stream broke
+                span["error"] = repr(e)
+                console.print(f"[red]Ollama stream interrupted: {e}")
+                if not generation_cutoff_passed():
+                    circuit_breaker("ollama").record_failure()
+            span["bytes"] = len(extractor.buffer)
+
+        return extractor
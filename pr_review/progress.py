@@ -0,0 +1,103 @@
+"""
+Progressive review comment.
+
+A placeholder comment is posted on the PR as soon as a review starts and edited in
+place as the summary and each file's results arrive. When the run ends, or its
+deadline passes, the comment is flushed with whatever is done, so a long PR gets
+partial feedback quickly and a job that times out still leaves its findings behind.
+"""
+import os
+import time
+from threading import Lock
+
+from pr_review import config
+from pr_review.console import console
+from pr_review.rate_limit import github_call
+from pr_review.tracing import trace_stage
+
+FILE_STATUS_TEXT = {
+    "queued": "queued",
+    "reviewing": "in review",
+    "skipped": "not reviewed"
+}
+
+class ReviewProgress:
+    """The summary comment of one review, kept up to date while the review runs."""
+
+    def __init__(self, pr, file_names, min_interval=config.PROGRESS_EDIT_INTERVAL):
+        self.pr = pr
+        self.min_interval = min_interval
+        self.summary = None
+        self.note = "Review in progress, this comment is updated as files are reviewed."
+        self.comment = None
+        self._status = {file_name: "queued" for file_name in file_names}
+        self._comment_counts = {}
+        self._last_edit = 0.0
+        self._lock = Lock()
+
+    def render(self):
+        """Return the comment body for the current state of the review."""
+        done = sum(1 for status in self._status.values() if status == "done")
+        lines = [
+            "## AI PR Review Summary\n",
+            f"**Summary:**\n{self.summary or '_Being generated..._'}\n",
+            f"**Files reviewed:** {done}/{len(self._status)}\n"
+        ]
+        for file_name, status in self._status.items():
+            if status == "done":
+                count = self._comment_counts.get(file_name, 0)
+                text = f"{count} comment{'' if count == 1 else 's'}" if count else "no issues found"
+            else:
+                text = FILE_STATUS_TEXT[status]
+            lines.append(f"- `{file_name}`: {text}")
+        lines.append(f"\n_{self.note}_")
+        return "\n".join(lines)
+
+    def start(self):
+        """Post the placeholder comment."""
+        with self._lock, trace_stage("post_comment", purpose="progress"):
+            self.comment = github_call(self.pr.create_issue_comment, self.render(), write=True)
+            self._last_edit = time.monotonic()
+
+    def update(self, force=False):
+        """Edit the comment to the current state, at most once per min_interval unless forced."""
+        with self._lock:
+            if self.comment is None or (not force and time.monotonic() - self._last_edit < self.min_interval):
+                return
+            try:
+                with trace_stage("edit_comment", purpose="progress"):
+                    github_call(self.comment.edit, self.render(), write=True)
+                self._last_edit = time.monotonic()
+            except Exception as e:
+                console.print(f"[yellow]Could not update the review comment: {e}")
+
+    def set_status(self, file_names, status):
+        """Mark files as "queued", "reviewing" or "skipped"."""
+        with self._lock:
+            for file_name in file_names:
+                self._status[file_name] = status
+
+    def file_done(self, file_name, comment_count):
+        """Record a finished file review and show it."""
+        with self._lock:
+            self._status[file_name] = "done"
+            self._comment_counts[file_name] = comment_count
+        self.update()
+
+    def set_summary(self, summary):
+        """Show the PR summary once it has been generated."""
+        self.summary = summary
+        self.update(force=True)
+
+    def finish(self, note, file_name="pr_summary.txt"):
+        """Flush the final state of the review to the comment and save it to file_name."""
+        with self._lock:
+            self.note = note
+            self.summary = self.summary or "_Not generated._"
+            for name, status in self._status.items():
+                if status != "done":
+                    self._status[name] = "skipped"
+        self.update(force=True)
+        os.makedirs(os.path.dirname(file_name) or ".", exist_ok=True)
+        with open(file_name, "w") as f:
+            f.write(self.render())
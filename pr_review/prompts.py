@@ -0,0 +1,325 @@
+import re
+from string import Template
+
+# Structured output schema for line review responses (Ollama `format` field)
+REVIEW_COMMENTS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "comments": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "line": {"type": "integer"},
+                    "comment": {"type": "string"}
+                },
+                "required": ["line", "comment"]
+            }
+        }
+    },
+    "required": ["comments"]
+}
+
+# Structured output schema for triage answers
+TRIAGE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "deep_review": {"type": "boolean"},
+        "reason": {"type": "string"}
+    },
+    "required": ["deep_review", "reason"]
+}
+
+# Prompt templates. Every prompt is split into a fixed system prefix, sent through
+# Ollama's `system` field, and a per-call suffix holding the PR or file data. Keeping
+# the prefix byte-identical across calls lets the server reuse its prompt KV cache.
+# Templates are compiled once here and only substituted per call.
+SUMMARY_SYSTEM_PROMPT = """You are PR-Reviewer, a language model designed to review a Git Pull Request (PR).
+Summarize the PR changes given by the user concisely. The user provides the PR title, description, changed file contents and file diffs.
+If any of these are breaking only Then, your summary should include a note about alterations to the signatures of exported functions, global data structures and variables, and any changes that might affect the external interface or behavior of the code.
+Important:
+- In your summary do not mention that the file needs a through review or caution about potential issues.
+"""
+
+SUMMARY_TYPE_INSTRUCTIONS = {
+    "bug": "Explain the root cause of this bug and assess the effectiveness of the fix.",
+    "feature": "Evaluate the impact of this feature on existing functionality and suggest improvements.",
+    "refactor": "Analyze whether this refactoring improves maintainability and performance.",
+    "security": "Assess whether this patch effectively mitigates the security issue.",
+    "docs": "This PR only changes documentation. Summarize what the documentation now says differently.",
+    "dependencies": "This PR only updates dependencies. List the packages whose versions change and flag major version bumps that may bring breaking changes.",
+    "general": ""
+}
+
+SUMMARY_ENDING = """
+Respond in the following way:
+Include the summary of the overall changes in three to four sentences.
+eg:  This PR addresses a bug where the user login was failing due to an incorrect API endpoint. The fix updates the endpoint URL in the authentication service. Additionally, a new feature was added to display user profile pictures. The feature introduces a new image processing library and updates the user profile component to fetch and display the image.
+"""
+
+# One fixed system prompt per PR type, built once
+SUMMARY_SYSTEM_PROMPTS = {
+    pr_type: f"{SUMMARY_SYSTEM_PROMPT}\n{instruction}\n{SUMMARY_ENDING}"
+    for pr_type, instruction in SUMMARY_TYPE_INSTRUCTIONS.items()
+}
+
+SUMMARY_PROMPT_TEMPLATE = Template("""Title: $title
+Description: $description
+Changed File Contents:
+$files_content
+File Diffs:
+$diffs
+""")
+
+IMPACT_SYSTEM_PROMPT = """You are PR-Reviewer, a language model designed to review a Git Pull Request (PR).
+Analyze the impact of changes in the PR file given by the user:
+Each change starts with diff --git a/<file> b/<file> indicating the file being modified.
+The index line shows file version hashes before and after the change.
+Lines beginning with --- and +++ indicate the file's previous and new versions.
+Added lines are prefixed with + (new content).
+Removed lines are prefixed with - (deleted content).
+Contextual lines (unchanged) have no prefix and help provide surrounding context.
+If a file is new, it starts with new file mode, and if deleted, it starts with deleted file mode.
+
+How do these changes affect the overall project and code quality? Explain in 2-3 sentences atmost.
+Analysis Guidelines:
+
+For Configuration & Workflow Changes (.yml, .json, etc.):
+    1. Identify what settings or dependencies have changed.
+    2. Assess if the change introduces compatibility issues or risks.
+For Code Changes (.py, .js, .html, etc.):
+    1. Analyze function modifications, new feature additions, or deletions without displaying the changes verbatim.
+    2. Determine if the change affects existing logic or what is the intended effect of the new code or introduces new dependencies.
+For New Files:
+    1. Describe the purpose of the new file.
+    2. Consider how it integrates with the existing codebase.
+
+Important:
+Do NOT mention that the file needs a through review or that it is dfficult to without further context.
+Mention any other important information that might help the reviewer (eg: catching bugs or improve test coverage)
+The factors for good code are:
+Clarity, Correctness, Modular, Failure Handling, Security and analyzing blast radius.
+Identify any inconsistencies and highlight the lines numbers where this happens.
+
+Sample output format:
+Changes in this file modify the authentication service configuration, updating API endpoint URLs. This ensures the service connects to the correct resources. 
+The update could affect existing login functionality if not deployed correctly, but appears to correct a previous bug.
+Ensure proper testing is in place.
+"""
+
+IMPACT_PROMPT_TEMPLATE = Template("""File: $file_name
+Changed File $changes
+Changes between original and new content: $diff
+
+Semgrep Findings: $findings
+""")
+
+REVIEW_GUIDELINES = """Analyze ONLY the changed lines and provide specific feedback on:
+1. Code correctness and suggestions for optimal code (eg: space and time complexity) and logic issues
+2. Security vulnerabilities
+3. Performance concerns
+4. Style and readability issues
+5. Potential bugs or edge cases
+
+For each issue, provide:
+1. The exact line number
+2. A concise description of the issue
+3. A specific suggestion for improvement
+"""
+
+REVIEW_SYSTEM_PROMPT = f"""You are PR-Reviewer, a language model skilled at detailed code review.
+
+Review the file given by the user and provide specific line-by-line comments **ONLY WHERE ISSUES EXIST**.
+
+{REVIEW_GUIDELINES}
+Format your response as a JSON object like:
+{{"comments": [
+    {{"line": 42, "comment": "This variable is never used. Consider removing it or documenting why it's needed."}},
+    {{"line": 87, "comment": "This loop could be optimized by using a set instead of a list for lookups."}}
+]}}
+
+Only include comments for lines with actual issues - don't comment on every line.
+If no issues are found, return {{"comments": []}}.
+RESPOND ONLY WITH THE JSON OBJECT.
+"""
+
+# Part of the review cache key; bump it when the review prompt or schema changes so
+# reviews made with the old prompt are not reused
+REVIEW_PROMPT_VERSION = "1"
+
+REVIEW_PROMPT_TEMPLATE = Template("""File: $file_name
+
+```
+$file_with_lines
+```
+
+Changed lines (line numbers): $changed_lines
+""")
+
+TRIAGE_SYSTEM_PROMPT = """You are PR-Triage, screening the changes of a Git Pull Request before code review.
+
+The user gives the diff of one file. Decide whether it needs a detailed line-by-line review by a stronger model.
+Answer true for changes to logic, control flow, error handling, concurrency, security-sensitive code (authentication, cryptography, input handling, SQL, shell commands, file paths), public APIs or data formats, and for anything you are unsure about.
+Answer false only for changes that cannot introduce bugs: formatting, comments, documentation, pure renames, version bumps and trivial test data.
+
+Format your response as a JSON object like:
+{"deep_review": true, "reason": "Changes how the session token is validated."}
+RESPOND ONLY WITH THE JSON OBJECT.
+"""
+
+TRIAGE_PROMPT_TEMPLATE = Template("""File: $file_name
+
+```diff
+$diff
+```
+""")
+
+BATCH_REVIEW_SYSTEM_PROMPT = f"""You are PR-Reviewer, a language model skilled at detailed code review.
+
+Review each of the files given by the user and provide specific line-by-line comments **ONLY WHERE ISSUES EXIST**.
+
+For every file, {REVIEW_GUIDELINES[0].lower()}{REVIEW_GUIDELINES[1:]}
+Line numbers are relative to the file they belong to.
+
+Format your response as a single JSON object keyed by file name, with one entry for EVERY file given:
+{{
+    "src/app.py": [
+        {{"line": 42, "comment": "This variable is never used. Consider removing it or documenting why it's needed."}}
+    ],
+    "src/util.py": []
+}}
+
+Only include comments for lines with actual issues - don't comment on every line.
+If no issues are found in a file, map it to an empty list.
+RESPOND ONLY WITH THE JSON OBJECT.
+"""
+
+BATCH_FILE_TEMPLATE = Template("""File: $file_name
+Changed lines (line numbers): $changed_lines
+```
+$file_with_lines
+```
+""")
+
+REPAIR_SYSTEM_PROMPT = """The user gives the unfinished or malformed end of a code review response that could not be parsed as JSON.
+Rewrite it as valid JSON of the form {"comments": [{"line": <line number>, "comment": "<review comment>"}]}.
+Keep only entries where both the line number and the comment are present. If nothing can be recovered, return {"comments": []}.
+RESPOND ONLY WITH THE JSON OBJECT.
+"""
+
+# Title and description keywords per PR type, highest priority first, compiled into one
+# alternation of named groups so classifying a PR is a single regex pass
+PR_TYPE_KEYWORDS = {
+    "security": r"security|vulnerabilit(?:y|ies)|cve(?:-[\d-]+)?|exploits?|xss|csrf|injection",
+    "bug": r"fix(?:es|ed|ing)?|bugs?|errors?|issues?|patch(?:es|ed)?|crash(?:es|ed)?|regressions?",
+    "refactor": r"refactor(?:s|ed|ing)?|clean-?up|restructur(?:e|es|ed|ing)",
+    "feature": r"add(?:s|ed|ing)?|features?|implement(?:s|ed|ing)?|new|support(?:s|ed|ing)?",
+}
+PR_TYPE_PATTERN = re.compile(
+    "|".join(fr"(?P<{pr_type}>\b(?:{words})\b)" for pr_type, words in PR_TYPE_KEYWORDS.items()),
+    re.IGNORECASE
+)
+
+# Documentation: markup files, the usual top-level notices, and plain text only inside docs directories
+DOC_PATH_PATTERN = re.compile(
+    r"\.(md|mdx|rst|adoc)$|(^|/)(docs?|documentation)/([^/]+/)*[^/]+\.txt$"
+    r"|(^|/)(LICENSE|NOTICE|AUTHORS|CHANGELOG|CONTRIBUTING|README)(\.[a-z]+)?$",
+    re.IGNORECASE
+)
+DEPENDENCY_PATH_PATTERN = re.compile(
+    r"(^|/)(requirements[^/]*\.(txt|in)|constraints\.txt|Pipfile(\.lock)?|poetry\.lock|uv\.lock"
+    r"|package(-lock)?\.json|npm-shrinkwrap\.json|yarn\.lock|pnpm-lock\.yaml|go\.(mod|sum)"
+    r"|Cargo\.(toml|lock)|Gemfile(\.lock)?|composer\.(json|lock))$"
+)
+LOCKFILE_PATH_PATTERN = re.compile(
+    r"(^|/)(Pipfile\.lock|poetry\.lock|uv\.lock|package-lock\.json|npm-shrinkwrap\.json|yarn\.lock"
+    r"|pnpm-lock\.yaml|go\.sum|Cargo\.lock|Gemfile\.lock|composer\.lock)$"
+)
+# A changed manifest line that only pins a version: a requirements specifier, a JSON or
+# TOML "name": "version" entry, a go.mod requirement or a Gemfile gem. Anything else, such
+# as an npm script, means the manifest changed more than its versions.
+VERSION_SPEC = r"[~^<>=!v]*\s*\d[\w.+*-]*(\s*(\|\||,)?\s*[~^<>=!v]*\s*\d[\w.+*-]*)*"
+VERSION_LINE_PATTERN = re.compile(
+    r"\s*(#.*|//.*)?"
+    rf"|\s*[\w.\-]+(\[[\w,\-]+\])?\s*(==|>=|<=|~=|!=|===|>|<)\s*{VERSION_SPEC}\s*(;.*)?"
+    rf"|\s*\"[\w@/.\-]+\"\s*:\s*\"{VERSION_SPEC}\"\s*,?"
+    rf"|\s*[\w\-]+\s*=\s*\"{VERSION_SPEC}\"\s*"
+    r"|\s*(require\s+)?[\w.\-/]+\s+v\d[\w.+\-]*(\s*//\s*indirect)?\s*"
+    rf"|\s*gem\s+['\"][\w\-]+['\"]\s*,\s*['\"]\s*{VERSION_SPEC}['\"]\s*"
+)
+
+# Per-type plan: the summary prompt's token limit, whether changed files get a line
+# review, and whether their contents are fetched at all. Docs-only PRs skip the line
+# review, and dependency bumps are summarized from their diff alone.
+PR_TYPE_PLANS = {
+    "security": {"max_tokens": 400000, "line_review": True, "fetch_contents": True},
+    "bug": {"max_tokens": 400000, "line_review": True, "fetch_contents": True},
+    "refactor": {"max_tokens": 400000, "line_review": True, "fetch_contents": True},
+    "feature": {"max_tokens": 400000, "line_review": True, "fetch_contents": True},
+    "general": {"max_tokens": 400000, "line_review": True, "fetch_contents": True},
+    "docs": {"max_tokens": 100000, "line_review": False, "fetch_contents": True},
+    "dependencies": {"max_tokens": 30000, "line_review": False, "fetch_contents": False},
+}
+
+def handle_token_limit(text, max_tokens=400000):
+    """Trim the text to fit within the token limit."""
+    return text[:max_tokens]
+
+def only_versions_changed(patch):
+    """Return True if every added or removed line of a file patch only pins a version (VERSION_LINE_PATTERN)."""
+    if patch is None:
+        # GitHub leaves out the patch of very large diffs, which cannot be checked
+        return False
+    return all(
+        VERSION_LINE_PATTERN.fullmatch(line[1:])
+        for line in patch.splitlines()
+        if line[:1] in ("+", "-")
+    )
+
+def determine_pr_type(title, description, changed_files=None):
+    """
+    Classify a PR, which picks its summary prompt and its plan in PR_TYPE_PLANS.
+
+    Changed paths decide first: a PR touching only dependency manifests and lockfiles,
+    changing nothing but version fields in the manifests, is "dependencies", and one
+    touching only documentation is "docs". Otherwise a single pass of the precompiled keyword pattern over the title
+    and description picks the highest-priority type mentioned.
+
+    Args:
+        title (str): PR title
+        description (str): PR description, may be None
+        changed_files (list): Changed files with filename and patch (PyGithub Files), if known
+
+    Returns:
+        str: A key of PR_TYPE_PLANS
+    """
+    if changed_files:
+        paths = [file.filename for file in changed_files]
+        if all(DEPENDENCY_PATH_PATTERN.search(path) for path in paths):
+            # Lockfiles are generated; manifests must only change versions to skip the review
+            if all(
+                LOCKFILE_PATH_PATTERN.search(file.filename) or only_versions_changed(file.patch)
+                for file in changed_files
+            ):
+                return "dependencies"
+        elif all(DOC_PATH_PATTERN.search(path) and not DEPENDENCY_PATH_PATTERN.search(path) for path in paths):
+            return "docs"
+
+    found = {match.lastgroup for match in PR_TYPE_PATTERN.finditer(f"{title}\n{description or ''}")}
+    return next((pr_type for pr_type in PR_TYPE_KEYWORDS if pr_type in found), "general")
+
+def generate_custom_prompt(ctx, pr_type, pr_context, files_content):
+    """
+    Generate a prompt tailored to the PR type.
+
+    Returns:
+        tuple: (system prompt, prompt). The system prompt depends only on the PR type.
+    """
+    system_prompt = SUMMARY_SYSTEM_PROMPTS.get(pr_type, SUMMARY_SYSTEM_PROMPTS["general"])
+    prompt = SUMMARY_PROMPT_TEMPLATE.substitute(
+        title=pr_context['title'],
+        description=pr_context['description'],
+        files_content=files_content,
+        diffs=ctx.diff
+    )
+    return system_prompt, prompt
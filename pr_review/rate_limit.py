@@ -0,0 +1,200 @@
+"""
+Rate-limit-aware governor for GitHub API calls.
+
+Every GitHub call in the process goes through one governor. It tracks the primary
+rate-limit budget from the X-RateLimit-* response headers and paces write calls
+(comments and edits) with a token bucket, below GitHub's secondary limits. Reads run
+at full speed until the budget runs low, then the rest is spread evenly up to the
+reset time. A call that is rate limited anyway waits for Retry-After or the reset
+time, or backs off exponentially with jitter, and is retried. Counters of calls,
+waits and retries are kept for the run trace.
+"""
+import random
+import time
+from functools import lru_cache
+from threading import Lock
+
+from pr_review import config
+from pr_review.console import console
+from pr_review.resilience import circuit_breaker
+from pr_review.scheduling import deadline_passed, time_left
+from pr_review.tracing import trace_stage
+
+class GitHubGovernor:
+    """Paces GitHub calls against the process's rate-limit budget."""
+
+    def __init__(self, write_rate=None, write_burst=None, reserve=None, max_retries=None):
+        self.write_rate = write_rate or config.GITHUB_WRITE_RATE
+        self.write_burst = write_burst or config.GITHUB_WRITE_BURST
+        self.reserve = config.GITHUB_RATE_RESERVE if reserve is None else reserve
+        self.max_retries = config.GITHUB_MAX_RETRIES if max_retries is None else max_retries
+        # Primary budget as last reported by GitHub; reset_at is a Unix timestamp
+        self.remaining = None
+        self.limit = None
+        self.reset_at = None
+        self.counters = {"calls": 0, "writes": 0, "retries": 0, "rate_limited": 0, "waits": 0, "wait_seconds": 0.0}
+        self._tokens = float(self.write_burst)
+        self._refilled_at = time.monotonic()
+        self._lock = Lock()
+
+    def acquire(self, write=False):
+        """Wait until a call may be made: a write token is free and the budget allows it."""
+        with self._lock:
+            self.counters["calls"] += 1
+            delay, reason = 0.0, None
+            if write:
+                self.counters["writes"] += 1
+                # Each writer takes a token, going negative to queue behind earlier writers
+                now = time.monotonic()
+                self._tokens = min(self.write_burst, self._tokens + (now - self._refilled_at) * self.write_rate)
+                self._refilled_at = now
+                self._tokens -= 1
+                if self._tokens < 0:
+                    delay, reason = -self._tokens / self.write_rate, "write_pacing"
+
+            if self.remaining is not None and self.reset_at:
+                until_reset = self.reset_at - time.time()
+                if until_reset > 0 and self.remaining <= self.reserve:
+                    delay, reason = max(delay, until_reset), "budget"
+                elif until_reset > 0 and self.limit and self.remaining < self.limit * config.GITHUB_PACE_FRACTION:
+                    delay, reason = max(delay, until_reset / (self.remaining - self.reserve)), "budget"
+                # Count the call now so concurrent callers see the budget shrink
+                self.remaining -= 1
+
+        if delay > 0:
+            self.wait(delay, reason)
+
+    def wait(self, seconds, reason):
+        """Sleep for a throttle or backoff delay, never past the run's deadline, recording it in the trace."""
+        left = time_left()
+        if left is not None:
+            seconds = min(seconds, left)
+        with self._lock:
+            self.counters["waits"] += 1
+            self.counters["wait_seconds"] += seconds
+        with trace_stage("github_wait", purpose=reason):
+            time.sleep(seconds)
+
+    def observe(self, status, headers, message="", attempt=0):
+        """
+        Update the budget from a response and decide whether to retry it.
+
+        Args:
+            status (int): HTTP status of the response
+            headers (dict): Response headers, in any letter case
+            message (str): Error message of the response, used to spot secondary rate limits
+            attempt (int): Number of retries already made for this call
+
+        Returns:
+            float: Seconds to wait before retrying, or None if the response is final
+        """
+        headers = {key.lower(): value for key, value in (headers or {}).items()}
+        with self._lock:
+            if "x-ratelimit-remaining" in headers:
+                self.remaining = int(headers["x-ratelimit-remaining"])
+                self.limit = int(headers.get("x-ratelimit-limit", self.limit or 0)) or None
+                self.reset_at = float(headers.get("x-ratelimit-reset", 0)) or None
+
+        if status not in (403, 429):
+            return None
+
+        message = str(message).lower()
+        if "retry-after" in headers:
+            delay = float(headers["retry-after"])
+        elif headers.get("x-ratelimit-remaining") == "0" and self.reset_at:
+            delay = max(self.reset_at - time.time(), 0.0)
+        elif status == 429 or "rate limit" in message:
+            delay = min(config.GITHUB_BACKOFF_SECONDS * 2 ** attempt, config.GITHUB_BACKOFF_MAX_SECONDS)
+        else:
+            # A plain 403 is a permission error, retrying will not help
+            return None
+
+        with self._lock:
+            self.counters["rate_limited"] += 1
+        # Jitter keeps concurrent callers from retrying in lockstep
+        return delay * random.uniform(1, 1.5)
+
+    def observe_client(self):
+        """Update the budget from the headers PyGithub recorded for its last response."""
+        from pr_review.clients import github_client
+
+        if not github_client.cache_info().currsize:
+            # No PyGithub client yet, so the call did not go through one
+            return
+        requester = github_client().requester
+        remaining, limit = requester.rate_limiting
+        if limit >= 0:
+            with self._lock:
+                self.remaining, self.limit = remaining, limit
+                self.reset_at = requester.rate_limiting_resettime or None
+
+    def call(self, request, *args, write=False, **kwargs):
+        """
+        Make a GitHub call through the governor, retrying it if it is rate limited.
+
+        Args:
+            request (callable): A PyGithub call, or an http_session() method for REST calls
+            write (bool): Whether the call creates or edits content on GitHub
+
+        Returns:
+            The result of the call; a requests response is returned even if it failed
+        """
+        breaker = circuit_breaker("github")
+        attempt = 0
+        while True:
+            # Fails fast with BackendUnavailable while GitHub keeps failing
+            breaker.check()
+            self.acquire(write)
+            try:
+                result = request(*args, **kwargs)
+            except Exception as e:
+                # PyGithub errors carry the response status and headers
+                if not hasattr(e, "status") or not hasattr(e, "headers"):
+                    # Connection errors and timeouts (requests exceptions are OSErrors) count against
+                    # GitHub, unless they only happened because the run's deadline cut the call short
+                    if not isinstance(e, OSError):
+                        breaker.record_success()
+                    elif not deadline_passed():
+                        breaker.record_failure()
+                    raise
+                record_status(breaker, e.status)
+                delay = self.observe(e.status, e.headers, getattr(e, "data", ""), attempt)
+                if delay is None or attempt >= self.max_retries:
+                    raise
+            else:
+                if not hasattr(result, "status_code"):
+                    breaker.record_success()
+                    self.observe_client()
+                    return result
+                record_status(breaker, result.status_code)
+                message = result.text if result.status_code in (403, 429) else ""
+                delay = self.observe(result.status_code, result.headers, message, attempt)
+                if delay is None or attempt >= self.max_retries:
+                    return result
+
+            console.print(f"[yellow]GitHub rate limit hit, retrying in {delay:.1f}s")
+            with self._lock:
+                self.counters["retries"] += 1
+            self.wait(delay, "backoff")
+            attempt += 1
+
+    def metrics(self):
+        """Return the call counters and the last known budget."""
+        with self._lock:
+            return dict(self.counters, remaining=self.remaining, limit=self.limit, reset_at=self.reset_at)
+
+def record_status(breaker, status):
+    """Count a server error against GitHub's circuit; any other answer shows it is up."""
+    if status >= 500:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+
+@lru_cache(maxsize=None)
+def github_governor():
+    """Return the process-wide governor shared by all GitHub calls."""
+    return GitHubGovernor()
+
+def github_call(request, *args, write=False, **kwargs):
+    """Make a GitHub call through the process-wide governor, see GitHubGovernor.call."""
+    return github_governor().call(request, *args, write=write, **kwargs)
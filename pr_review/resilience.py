@@ -0,0 +1,135 @@
+"""
+Timeouts and circuit breaking for the external backends.
+
+Every call to Ollama, GitHub, git, Semgrep and the linters has a per-stage timeout
+(config.STAGE_TIMEOUTS, see scheduling.stage_timeout), always cut down to the time
+left before the run's deadline. Each backend also has a circuit breaker: after
+config.CIRCUIT_FAILURE_THRESHOLD consecutive failures it opens and calls fail fast
+with BackendUnavailable instead of waiting out another timeout. After
+config.CIRCUIT_COOLDOWN_SECONDS one trial call is let through, and the circuit
+closes again if it succeeds. Callers degrade rather than stop: skipped reviews,
+the HTTP fetch fallback, no lint output, and whatever results are done are posted.
+"""
+import os
+import signal
+import subprocess
+import time
+from threading import Lock
+
+from pr_review import config
+from pr_review.console import console
+from pr_review.scheduling import stage_timeout
+
+# One breaker per backend, shared by every PR reviewed in the process
+BREAKERS = {}
+BREAKERS_LOCK = Lock()
+
+class BackendUnavailable(Exception):
+    """Raised instead of calling a backend whose circuit is open."""
+
+class CircuitBreaker:
+    """Stops calls to a backend that keeps failing, letting one trial through after a cooldown."""
+
+    def __init__(self, name, failure_threshold=None, cooldown=None):
+        self.name = name
+        self.failure_threshold = failure_threshold or config.CIRCUIT_FAILURE_THRESHOLD
+        self.cooldown = config.CIRCUIT_COOLDOWN_SECONDS if cooldown is None else cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.counters = {"failures": 0, "rejected": 0, "opened": 0}
+        self._lock = Lock()
+
+    def available(self):
+        """Return whether a call would be let through right now, without taking the trial."""
+        with self._lock:
+            return self.opened_at is None or (
+                not self.trial_running and time.monotonic() - self.opened_at >= self.cooldown
+            )
+
+    def check(self):
+        """Raise BackendUnavailable unless a call may go to the backend."""
+        with self._lock:
+            if self.opened_at is None:
+                return
+            if not self.trial_running and time.monotonic() - self.opened_at >= self.cooldown:
+                # Half open: this call decides whether the backend is back
+                self.trial_running = True
+                return
+            self.counters["rejected"] += 1
+        raise BackendUnavailable(f"{self.name} is unavailable after {self.failures} consecutive failures")
+
+    def record_success(self):
+        """Close the circuit after a successful call."""
+        with self._lock:
+            if self.opened_at is not None:
+                console.print(f"[green]{self.name} is responding again")
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def record_failure(self):
+        """Count a failed call, opening the circuit once failures reach the threshold."""
+        with self._lock:
+            self.failures += 1
+            self.counters["failures"] += 1
+            if self.failures >= self.failure_threshold and (self.opened_at is None or self.trial_running):
+                self.counters["opened"] += 1
+                console.print(f"[red]{self.name} failed {self.failures} times in a row, "
+                              f"pausing calls to it for {self.cooldown:.0f}s")
+                self.opened_at = time.monotonic()
+            self.trial_running = False
+
+    def metrics(self):
+        """Return the failure counters and whether the circuit is open."""
+        with self._lock:
+            return dict(self.counters, open=self.opened_at is not None)
+
+def circuit_breaker(backend):
+    """Return the process-wide circuit breaker of a backend ("ollama", "github", "git", ...)."""
+    with BREAKERS_LOCK:
+        if backend not in BREAKERS:
+            BREAKERS[backend] = CircuitBreaker(backend)
+        return BREAKERS[backend]
+
+def circuit_metrics():
+    """Return the metrics of every breaker used in this run, by backend."""
+    with BREAKERS_LOCK:
+        breakers = dict(BREAKERS)
+    return {backend: breaker.metrics() for backend, breaker in breakers.items()}
+
+def run_command(args, stage, check=False, input=None, **kwargs):
+    """
+    Run a command within its stage's timeout, killing it and its children if it overruns.
+
+    The command runs in its own process group, so tools that spawn helpers (npx,
+    git remote helpers) are stopped as a whole instead of holding the pipes open.
+
+    Args:
+        args (list | str): Command to run, a string with shell=True
+        stage (str): Key of config.STAGE_TIMEOUTS to take the timeout from
+        check (bool): Raise CalledProcessError if the command exits non-zero
+        input (bytes | str): Data sent to the command's stdin
+
+    Returns:
+        subprocess.CompletedProcess: The exit status and captured output
+
+    Raises:
+        subprocess.TimeoutExpired: The command ran past its timeout and was killed
+    """
+    timeout = stage_timeout(stage)
+    stdin = subprocess.PIPE if input is not None else None
+    with subprocess.Popen(args, stdin=stdin, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                          start_new_session=True, **kwargs) as process:
+        try:
+            stdout, stderr = process.communicate(input, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            process.communicate()
+            raise
+    if check and process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, args, stdout, stderr)
+    return subprocess.CompletedProcess(args, process.returncode, stdout, stderr)
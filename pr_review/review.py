@@ -0,0 +1,497 @@
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, as_completed
+from queue import PriorityQueue
+
+from pr_review import config
+from pr_review.analysis import scan_changed_files
+from pr_review.console import console
+from pr_review.diff import parse_changed_lines
+from pr_review.github_api import (
+    fetch_file_contents, fetch_pr_files, format_files_content, get_pr_diff,
+    load_pr_context, pinned_head_commit, post_comment_on_pr, post_line_comments
+)
+from pr_review.hunk_dedup import fan_out_reviews, plan_file_reviews
+from pr_review.json_extract import extract_review_comments
+from pr_review.llm import stream_json_generation
+from pr_review.progress import ReviewProgress
+from pr_review.prompts import (
+    BATCH_FILE_TEMPLATE, BATCH_REVIEW_SYSTEM_PROMPT, REPAIR_SYSTEM_PROMPT,
+    PR_TYPE_PLANS, REVIEW_COMMENTS_SCHEMA, REVIEW_PROMPT_TEMPLATE, REVIEW_SYSTEM_PROMPT,
+    determine_pr_type
+)
+from pr_review.rate_limit import github_call
+from pr_review.resilience import circuit_breaker
+from pr_review.review_cache import cached_review, review_cache_key, store_review
+from pr_review.scheduling import generation_cutoff_passed, rank_files, time_left
+from pr_review.summary import generate_pr_summary, summary_needs_refinement
+from pr_review.symbols import changed_code_excerpt
+from pr_review.triage import triage_files
+
+def review_file_content(pr, file_name, file_with_lines, diff_content):
+    """
+    Review a specific file's content and provide line-by-line comments.
+    
+    Args:
+        file_name (str): Name of the file being reviewed
+        file_with_lines (str): Content of the file with "N: " line number prefixes
+        diff_content (str): Git diff content for this file
+    
+    Returns:
+        list: A list of dictionaries containing line numbers and review comments
+    """
+    console.print(f"\n[cyan]Reviewing file content for {file_name}...\n")
+    
+    # Parse diff to understand which lines were changed
+    changed_lines = parse_changed_lines(diff_content)
+    
+    # Only the file data varies, the review instructions go in the shared system prompt
+    prompt = REVIEW_PROMPT_TEMPLATE.substitute(
+        file_name=file_name,
+        file_with_lines=file_with_lines,
+        changed_lines=', '.join(map(str, changed_lines))
+    )
+    
+    extractor = stream_json_generation(REVIEW_SYSTEM_PROMPT, prompt, REVIEW_COMMENTS_SCHEMA,
+                                       model=config.DEEP_REVIEW_MODEL)
+    if extractor is None:
+        console.print(f"[red]Error reviewing {file_name}")
+        return []
+
+    review_comments = extract_review_comments(extractor)
+
+    # Only the unparsed remainder is sent back to the model, never the whole file
+    fragment = extractor.unparsed_remainder()
+    if "{" in fragment:
+        console.print(f"[yellow]Review output for {file_name} was incomplete, repairing the unparsed part...")
+        repair_extractor = stream_json_generation(REPAIR_SYSTEM_PROMPT, fragment, REVIEW_COMMENTS_SCHEMA,
+                                                  purpose="repair", model=config.DEEP_REVIEW_MODEL)
+        if repair_extractor is not None:
+            review_comments.extend(extract_review_comments(repair_extractor))
+
+    # Only reviews that finished and parsed cleanly are reused; a cut off, failed or
+    # garbled answer would hide findings from every later PR with the same changes
+    if extractor.parsed_cleanly() and not generation_cutoff_passed():
+        store_review(review_cache_key(file_with_lines, diff_content), diff_content, review_comments)
+
+    console.print(review_comments)
+    console.print(f"[green]Found {len(review_comments)} issues in {file_name}")
+    return review_comments
+
+def group_files_for_batching(file_sizes, max_chars=config.BATCH_MAX_CHARS, max_files=config.BATCH_MAX_FILES):
+    """
+    Pack files into review batches so each batch fills the prompt budget.
+
+    Uses first-fit decreasing: the largest files are placed first, and each file goes
+    into the first batch that still has room for it.
+
+    Args:
+        file_sizes (list): List of (file_name, size) tuples
+        max_chars (int): Maximum combined size of the files in one batch
+        max_files (int): Maximum number of files in one batch
+
+    Returns:
+        list: A list of batches, each a list of file names
+    """
+    batches = []
+    for file_name, size in sorted(file_sizes, key=lambda f: f[1], reverse=True):
+        for batch in batches:
+            if batch["size"] + size <= max_chars and len(batch["files"]) < max_files:
+                batch["files"].append(file_name)
+                batch["size"] += size
+                break
+        else:
+            batches.append({"files": [file_name], "size": size})
+
+    return [batch["files"] for batch in batches]
+
+def review_file_batch(files, file_batch):
+    """
+    Review several small files with a single prompt and split the results per file.
+
+    Args:
+        files (FileContentStore): Fetched contents of the files
+        file_batch (list): List of (file_name, diff_content) tuples
+
+    Returns:
+        dict: Mapping of file name to its list of review comments. Files the model
+        did not answer for are left out so the caller can review them individually.
+    """
+    file_names = [file_name for file_name, _ in file_batch]
+    console.print(f"\n[cyan]Reviewing {len(file_batch)} small files in one batch: {', '.join(file_names)}\n")
+
+    file_sections = []
+    for file_name, diff_content in file_batch:
+        changed_lines = parse_changed_lines(diff_content)
+        file_sections.append(BATCH_FILE_TEMPLATE.substitute(
+            file_name=file_name,
+            changed_lines=', '.join(map(str, changed_lines)),
+            file_with_lines=files.numbered_lines(file_name)
+        ))
+
+    prompt = "\n".join(file_sections)
+
+    batch_reviews = {}
+    extractor = stream_json_generation(BATCH_REVIEW_SYSTEM_PROMPT, prompt, "json", purpose="batch_review",
+                                       model=config.DEEP_REVIEW_MODEL)
+    if extractor is None:
+        console.print("[red]Error reviewing batch")
+        return batch_reviews
+
+    # The answer is the object keyed by file names; anything partial falls back per file
+    for parsed in extractor.objects:
+        if isinstance(parsed, dict) and any(file_name in parsed for file_name in file_names):
+            for file_name in file_names:
+                if isinstance(parsed.get(file_name), list):
+                    batch_reviews[file_name] = parsed[file_name]
+    console.print(f"[green]Batch review answered for {len(batch_reviews)}/{len(file_names)} files")
+
+    return batch_reviews
+
+def review_lines(files, file_name, diff_content):
+    """
+    Return the numbered lines of a file to put in its review prompt.
+
+    Large files are cut down to the functions and classes enclosing their changed
+    lines; small files, and files the symbol index cannot narrow, are sent whole.
+    """
+    if files.size(file_name) > config.SYMBOL_CONTEXT_MIN_BYTES:
+        excerpt = changed_code_excerpt(files, file_name, parse_changed_lines(diff_content))
+        if excerpt:
+            return excerpt
+    return files.numbered_lines(file_name)
+
+def review_files(pr, files, pending_files, batch_small_files=False, semgrep_findings=()):
+    """
+    Review a list of files, optionally batching the small ones.
+
+    Contents are read from the store as each prompt is built, so pending files
+    only hold names and diffs while they wait. Files with a cached review (see
+    review_cache) reuse it instead, and with a triage model set only the files it
+    flags are reviewed (see triage).
+
+    Args:
+        pr: The GitHub pull request object
+        files (FileContentStore): Fetched contents of the files
+        pending_files (list): List of (file_name, diff_content) tuples
+        batch_small_files (bool): Pack small files into shared multi-file prompts
+        semgrep_findings (list): Semgrep findings of the PR; files with any always get a line review
+
+    Returns:
+        dict: Mapping of file name to its list of review comments
+    """
+    file_reviews = {}
+
+    # Files whose code and changes were reviewed before, in this PR or another, are not reviewed again
+    uncached_files = []
+    for file_name, diff_content in pending_files:
+        review_comments = cached_review(review_cache_key(review_lines(files, file_name, diff_content), diff_content),
+                                        diff_content)
+        if review_comments is None:
+            uncached_files.append((file_name, diff_content))
+            continue
+        console.print(f"[green]Reusing the earlier review of {file_name}: {len(review_comments)} issues")
+        if review_comments:
+            file_reviews[file_name] = review_comments
+    pending_files, _ = triage_files(uncached_files, semgrep_findings)
+
+    if batch_small_files:
+        small_files = {f[0]: f for f in pending_files if files.size(f[0]) <= config.SMALL_FILE_MAX_CHARS}
+        pending_files = [f for f in pending_files if f[0] not in small_files]
+
+        batches = group_files_for_batching([(name, files.size(name)) for name in small_files])
+        for batch in batches:
+            file_batch = [small_files[file_name] for file_name in batch]
+            batch_reviews = review_file_batch(files, file_batch) if len(file_batch) > 1 else {}
+
+            for small_file in file_batch:
+                if small_file[0] in batch_reviews:
+                    if batch_reviews[small_file[0]]:
+                        file_reviews[small_file[0]] = batch_reviews[small_file[0]]
+                else:
+                    # Missing from the batch answer, fall back to a dedicated review
+                    pending_files.append(small_file)
+
+    # Review each remaining file on its own
+    for file_name, diff_content in pending_files:
+        if generation_cutoff_passed():
+            console.print(f"[yellow]Deadline reached, not reviewing {file_name}")
+            continue
+        review_comments = review_file_content(pr, file_name, review_lines(files, file_name, diff_content), diff_content)
+
+        if review_comments:
+            file_reviews[file_name] = review_comments
+
+    return file_reviews
+
+def review_all_files(ctx, batch_small_files=False):
+    """
+    Review all changed files in the PR and post line-specific comments.
+
+    Args:
+        ctx (ReviewContext): Review state holding the fetched contents and diffs
+        batch_small_files (bool): Pack small files into shared multi-file prompts
+            instead of sending one prompt per file
+    """
+    console.print("\n[cyan]Starting detailed file review...\n")
+
+    pr = load_pr_context(ctx)['pull_request']
+
+    # Only files that have both content and a diff can be reviewed
+    pending_files = [
+        (file_name, ctx.diff_files[file_name])
+        for file_name in ctx.files_content
+        if file_name in ctx.diff_files
+    ]
+    file_reviews = review_files(pr, ctx.files_content, pending_files, batch_small_files, ctx.semgrep_findings)
+    
+    # Post comments on the PR
+    if file_reviews:
+        post_line_comments(ctx.pr_url, file_reviews, pr, pinned_head_commit(ctx))
+        
+        # Also save the reviews to a file
+        # with open("line_reviews.json", "w") as f:
+        #     json.dump(file_reviews, f, indent=2)
+        
+        # # Generate a summary comment for the PR
+        # total_comments = sum(len(comments) for comments in file_reviews.values())
+        # summary = f"## AI PR Line-by-Line Review\n\n"
+        # summary += f"Found {total_comments} issues across {len(file_reviews)} files.\n\n"
+        
+        # for file_name, comments in file_reviews.items():
+        #     summary += f"### {file_name}\n"
+        #     for comment in comments:
+        #         summary += f"- Line {comment['line']}: {comment['comment']}\n"
+        #     summary += "\n"
+        
+        # pr.create_issue_comment(summary)
+    else:
+        console.print("[yellow]No issues found in the detailed file review.")
+
+def run_review_pipeline(ctx, batch_small_files=False):
+    """
+    Run the full PR review as an overlapping producer/consumer pipeline.
+
+    The diff is fetched while the PR details load, each file's review starts as soon
+    as its content has been downloaded, and the summary is drafted from the title,
+    description and diff while the contents download. Once they are in it is only
+    generated again if they grow its prompt materially (see summary_needs_refinement).
+
+    Files are reviewed highest risk first, and files whose hunks all repeat those of a
+    reviewed file get its findings instead (see hunk_dedup). The changed files are scanned
+    with Semgrep before they are ranked (see analysis.scan_changed_files), and the files
+    read for the scan are not fetched again. With config.PROGRESS_COMMENT,
+    the summary comment is posted as a placeholder right away and edited in place as the
+    summary and each file's results arrive; each review's line comments are posted as
+    soon as it finishes. Shortly before the run's deadline (see scheduling.generation_time_left)
+    no new reviews start and reviews in flight are cut short, keeping the comments they
+    completed; whatever is done is then flushed to the PR without waiting further. A review or comment that fails is reported and the
+    others carry on, and while Ollama's circuit is open (see resilience) queued files
+    are skipped.
+
+    The PR's type (see prompts.determine_pr_type) can cut the run short: docs-only PRs
+    get no line review, and dependency bumps are summarized from the diff without
+    fetching any file contents.
+
+    Args:
+        ctx (ReviewContext): Review state of the PR
+        batch_small_files (bool): Pack small files into shared multi-file prompts
+    """
+    pr_url, repo, pr_number = ctx.pr_url, ctx.repo, ctx.pr_number
+    if not repo or not pr_number:
+        return
+
+    console.print("\n[cyan]Starting pipelined PR review...\n")
+    progress = None
+    summary_comment = None
+
+    def summarize_and_post(pr_context, files_content):
+        nonlocal summary_comment
+        previous = ctx.summary
+        generate_pr_summary(ctx, pr_context, files_content)
+        if ctx.summary == previous:
+            return
+        if progress:
+            progress.set_summary(ctx.summary)
+            return
+        pr_comment = f"## AI PR Review Summary\n\n**Summary:**\n{ctx.summary}\n"
+        if summary_comment is None:
+            summary_comment = post_comment_on_pr(pr_url, pr_comment, ctx.output_path("pr_summary.txt"))
+        else:
+            # A refined summary replaces the draft in the same comment
+            github_call(summary_comment.edit, pr_comment, write=True)
+
+    def refine_summary(pr_context, files_content):
+        try:
+            draft_future.result()
+        except Exception as e:
+            console.print(f"[red]Draft PR summary failed: {e}")
+        if not ctx.summary or summary_needs_refinement(ctx, pr_context, files_content):
+            console.print("[cyan]File contents add substantial context, refining the PR summary...")
+            summarize_and_post(pr_context, files_content)
+
+    with ThreadPoolExecutor(max_workers=config.FETCH_WORKERS) as fetch_pool, \
+            ThreadPoolExecutor(max_workers=config.REVIEW_WORKERS) as review_pool:
+        diff_future = fetch_pool.submit(get_pr_diff, ctx)
+        pr_context = load_pr_context(ctx)
+        pr_type = determine_pr_type(pr_context['title'], pr_context['description'], pr_context['changed_files'])
+        plan = PR_TYPE_PLANS[pr_type]
+        if plan["line_review"]:
+            # Semgrep findings raise a file's risk and exempt it from triage, so the scan comes first
+            prefetched = scan_changed_files(ctx, pr_context['changed_files'])
+            # Files repeating the hunks of a higher-risk file reuse its findings instead of a review
+            important_files, followers = plan_file_reviews(
+                rank_files(pr_context['changed_files'], ctx.semgrep_findings), config.REVIEW_MAX_FILES
+            )
+            summary_files = important_files
+        else:
+            console.print(f"[cyan]This is a {pr_type} PR, skipping the line review")
+            important_files, followers, prefetched = [], {}, {}
+            # Dependency bumps are summarized from their diff alone
+            summary_files = pr_context['changed_files'][:config.REVIEW_MAX_FILES] if plan["fetch_contents"] else []
+        if followers:
+            console.print(f"[cyan]{len(followers)} files repeat the changes of reviewed files and reuse their findings")
+        file_names = [file.filename for file in summary_files]
+        reviewed_names = [file.filename for file in important_files]
+        risk_ranks = {file_name: rank for rank, file_name in enumerate(reviewed_names)}
+        # Files the Semgrep scan already read are not fetched again
+        fetch_names = [file_name for file_name in file_names if file_name not in prefetched]
+        if not fetch_names:
+            fetch_futures = []
+        elif config.FETCH_BACKEND == "git":
+            # One incremental fetch into the local mirror covers every file
+            fetch_futures = [fetch_pool.submit(fetch_pr_files, ctx, fetch_names)]
+        else:
+            # Forks are read from the head repository, pinned to the head commit
+            fetch_futures = [
+                fetch_pool.submit(fetch_file_contents, pr_context['head_repo'], ctx.head_sha, [file_name])
+                for file_name in fetch_names
+            ]
+
+        pr = pr_context['pull_request']
+        if config.PROGRESS_COMMENT:
+            # The placeholder goes up while the contents are still downloading
+            progress = ReviewProgress(pr, reviewed_names + list(followers))
+            progress.start()
+
+        # Reviews need the per-file diffs, which arrive with the first fetches
+        diff_future.result()
+        # The summary is drafted from the title, description and diff while file contents download
+        draft_future = fetch_pool.submit(summarize_and_post, pr_context, "")
+
+        # Fetched files wait here and each review task takes the highest-risk one, so a
+        # file fetched late still goes ahead of lower-risk files queued before it
+        ready_files = PriorityQueue()
+        skipped_files = []
+
+        def review_next():
+            _, pending_files, batched = ready_files.get_nowait()
+            names = [file_name for file_name, _ in pending_files]
+            # Past the generation cutoff, or while Ollama keeps failing, queued files are skipped rather than waited on
+            if generation_cutoff_passed() or not circuit_breaker("ollama").available():
+                skipped_files.extend(names)
+                return names, None
+            if progress:
+                progress.set_status(names, "reviewing")
+            return names, review_files(pr, ctx.files_content, pending_files, batched, ctx.semgrep_findings)
+
+        def fetched_contents():
+            yield {file_name: prefetched[file_name] for file_name in file_names if file_name in prefetched}
+            for future in as_completed(fetch_futures):
+                yield future.result()
+
+        review_futures = []
+        small_files = []
+        for contents in fetched_contents():
+            for file_name, content in contents.items():
+                ctx.files_content[file_name] = content
+                if not plan["line_review"] or file_name not in ctx.diff_files:
+                    continue
+
+                pending_file = (file_name, ctx.diff_files[file_name])
+                if batch_small_files and ctx.files_content.size(file_name) <= config.SMALL_FILE_MAX_CHARS:
+                    # Small files wait for each other so they can share a prompt
+                    small_files.append(pending_file)
+                else:
+                    ready_files.put((risk_ranks.get(file_name, len(risk_ranks)), [pending_file], False))
+                    review_futures.append(review_pool.submit(review_next))
+
+        if small_files:
+            rank = min(risk_ranks.get(file_name, len(risk_ranks)) for file_name, _ in small_files)
+            ready_files.put((rank, small_files, True))
+            review_futures.append(review_pool.submit(review_next))
+
+        # All contents are in; the summary is refined only if they change its context materially
+        summary_future = fetch_pool.submit(refine_summary, pr_context, format_files_content(ctx, summary_files))
+
+        # Post each file's comments as its review finishes, all on the pinned commit that was reviewed
+        file_reviews = {}
+        completed_files = set()
+        head_commit = None
+        def post_reviews(reviews):
+            nonlocal head_commit
+            try:
+                head_commit = head_commit or pinned_head_commit(ctx)
+                post_line_comments(pr_url, reviews, pr, head_commit)
+            except Exception as e:
+                # The other files' results still get posted
+                console.print(f"[red]Could not post comments on {', '.join(reviews)}: {e}")
+            file_reviews.update(reviews)
+
+        collected = set()
+        def collect(future):
+            collected.add(future)
+            try:
+                reviewed_files, reviews = future.result()
+            except Exception as e:
+                console.print(f"[red]A file review failed, continuing with the others: {e}")
+                return
+            if reviews is None:
+                return
+            completed_files.update(reviewed_files)
+            if reviews:
+                post_reviews(reviews)
+            if progress:
+                for file_name in reviewed_files:
+                    progress.file_done(file_name, len(reviews.get(file_name, [])))
+
+        try:
+            # Generations stop before the deadline, so reviews cut short normally return by then
+            for future in as_completed(review_futures, timeout=time_left()):
+                collect(future)
+        except TimeoutError:
+            console.print("[yellow]Deadline reached while files were still in review")
+            # Reviews that have not started are dropped, ones that finished meanwhile still count
+            for future in review_futures:
+                future.cancel()
+            for future in review_futures:
+                if future.done() and not future.cancelled() and future not in collected:
+                    collect(future)
+
+        follower_reviews = fan_out_reviews(file_reviews, followers, completed_files)
+        found = {file_name: comments for file_name, comments in follower_reviews.items() if comments}
+        if found:
+            post_reviews(found)
+        if progress:
+            for file_name, comments in follower_reviews.items():
+                progress.file_done(file_name, len(comments))
+
+        if skipped_files:
+            console.print(f"[yellow]{len(skipped_files)} files were not reviewed: {', '.join(skipped_files)}")
+        if plan["line_review"] and not file_reviews:
+            console.print("[yellow]No issues found in the detailed file review.")
+
+        try:
+            summary_future.result(timeout=time_left())
+        except TimeoutError:
+            console.print("[yellow]Deadline reached before the summary was ready")
+        except Exception as e:
+            console.print(f"[red]PR summary failed: {e}")
+
+        # Flush whatever is done; work still running finishes without holding up the results
+        if progress:
+            summary_file = ctx.output_path("pr_summary.txt")
+            if generation_cutoff_passed():
+                progress.finish("Deadline reached, this review is partial.", summary_file)
+            elif skipped_files:
+                progress.finish("The model was unavailable, this review is partial.", summary_file)
+            else:
+                progress.finish("Review complete.", summary_file)
@@ -0,0 +1,157 @@
+"""
+Cross-PR cache of file review results.
+
+Stacked PRs, rebases and backports often ask for the same review twice: the same
+code with the same changes. Review comments are stored by the blob SHA of the
+reviewed code, a hash of the diff hunks, the model and the review prompt version, so
+an identical file/diff pair reuses the earlier findings instead of a new generation.
+
+Neither key part depends on line numbers: the reviewed code is hashed without its
+line number prefixes or the line ranges in its excerpt headers (see
+symbols.changed_code_excerpt), and the hunks without their @@ headers. When the same hunks sit
+at a different offset (a large file whose excerpt moved), the stored comment lines
+are shifted by how far the changed lines they follow have moved.
+
+Results are kept in memory for the process (all PRs of a batch) and, unless
+REVIEW_CACHE_DIR is empty, as one JSON file per key so later runs can reuse them.
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+from bisect import bisect_right
+from collections import OrderedDict
+from threading import Lock
+
+from pr_review import config
+from pr_review.console import console
+from pr_review.diff import parse_changed_lines
+from pr_review.prompts import REVIEW_PROMPT_VERSION
+from pr_review.symbols import blob_sha
+
+LINE_NUMBER_PREFIX = re.compile(r"^\d+: ", re.MULTILINE)
+# The "(lines N-M)" at the end of an excerpt's "... def name" section headers
+EXCERPT_LINE_RANGE = re.compile(r"^(\.\.\. .*)\(lines \d+-\d+\)$", re.MULTILINE)
+
+# Reviews by key, least recently used first
+REVIEW_CACHE = OrderedDict()
+REVIEW_CACHE_LOCK = Lock()
+
+def hunk_hash(diff_content):
+    """
+    Hash the hunks of a file diff, leaving out their @@ headers and the file header.
+
+    Returns:
+        str: SHA-1 of the added, removed and context lines of every hunk
+    """
+    digest = hashlib.sha1()
+    in_hunk = False
+    for line in diff_content.splitlines():
+        if line.startswith("@@"):
+            in_hunk = True
+            digest.update(b"@@\n")
+        elif in_hunk and line[:1] in ("+", "-", " ", ""):
+            digest.update(line.encode("utf-8", "surrogateescape") + b"\n")
+    return digest.hexdigest()
+
+def review_cache_key(file_with_lines, diff_content):
+    """
+    Return the cache key of a file review.
+
+    Args:
+        file_with_lines (str): The numbered lines put in the review prompt, a whole file or an excerpt
+        diff_content (str): Git diff content for the file
+
+    Returns:
+        tuple: (code blob SHA, hunk hash, model, prompt version)
+    """
+    code = EXCERPT_LINE_RANGE.sub(r"\1(lines)", LINE_NUMBER_PREFIX.sub("", file_with_lines))
+    code = code.encode("utf-8", "surrogateescape")
+    return (blob_sha(code), hunk_hash(diff_content), config.DEEP_REVIEW_MODEL, REVIEW_PROMPT_VERSION)
+
+def cache_path(key):
+    """Return the file a review is persisted in, or None if the disk cache is disabled."""
+    if not config.REVIEW_CACHE_DIR:
+        return None
+    name = hashlib.sha1(json.dumps(key).encode()).hexdigest()
+    return os.path.join(config.REVIEW_CACHE_DIR, name[:2], name + ".json")
+
+def remap_lines(comments, stored_lines, changed_lines):
+    """
+    Move comment lines by the offset of the changed lines they follow.
+
+    Args:
+        comments (list): Stored {"line", "comment"} objects
+        stored_lines (list): Changed line numbers when the comments were made
+        changed_lines (list): The same changed lines in the current diff
+
+    Returns:
+        list: Copies of the comments with remapped lines
+    """
+    if not stored_lines or len(stored_lines) != len(changed_lines) or stored_lines == changed_lines:
+        return [dict(comment) for comment in comments]
+
+    remapped = []
+    for comment in comments:
+        try:
+            line = int(comment["line"])
+        except (TypeError, ValueError):
+            remapped.append(dict(comment))
+            continue
+        # Each hunk may have moved by a different amount; follow the nearest changed line above
+        index = max(bisect_right(stored_lines, line) - 1, 0)
+        remapped.append(dict(comment, line=line + changed_lines[index] - stored_lines[index]))
+    return remapped
+
+def cached_review(key, diff_content):
+    """
+    Look up an earlier review of the same code and changes.
+
+    Returns:
+        list: Its comments with lines remapped to the current diff, or None if the
+        pair has not been reviewed
+    """
+    with REVIEW_CACHE_LOCK:
+        entry = REVIEW_CACHE.get(key)
+        if entry is not None:
+            REVIEW_CACHE.move_to_end(key)
+
+    path = cache_path(key)
+    if entry is None and path:
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        with REVIEW_CACHE_LOCK:
+            REVIEW_CACHE[key] = entry
+    if entry is None:
+        return None
+    return remap_lines(entry["comments"], entry["changed_lines"], parse_changed_lines(diff_content))
+
+def store_review(key, diff_content, comments):
+    """
+    Remember the comments of a completed review, empty if it found no issues.
+
+    Only complete reviews should be stored; ones cut short by an error or the
+    deadline would hide findings from later runs.
+    """
+    entry = {"changed_lines": parse_changed_lines(diff_content), "comments": comments}
+    with REVIEW_CACHE_LOCK:
+        REVIEW_CACHE[key] = entry
+        while len(REVIEW_CACHE) > config.REVIEW_CACHE_SIZE:
+            REVIEW_CACHE.popitem(last=False)
+
+    path = cache_path(key)
+    if not path:
+        return
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written to a temporary file and renamed, so concurrent runs never read half an entry
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        console.print(f"[yellow]Could not save review to cache: {e}")
@@ -0,0 +1,135 @@
+"""
+Risk-based review scheduling.
+
+Changed files are scored by how likely their review is to matter: Semgrep findings,
+security-sensitive paths, language, churn, and whether the file is a test. The
+pipeline reviews and posts the highest-risk files first and stops at the run's
+wall-clock deadline, so a run cut short by CI time limits has already delivered
+its most important feedback.
+"""
+import math
+import os
+import re
+import time
+from threading import Lock
+
+from pr_review import config
+
+SECURITY_PATH_PATTERN = re.compile(
+    r"auth|login|passw|secret|token|credential|crypt|cert|session|cookie|permission|acl|oauth|jwt"
+    r"|sql|sanitiz|upload|payment|\.github/workflows/|dockerfile|\.env\b",
+    re.IGNORECASE
+)
+TEST_PATH_PATTERN = re.compile(
+    r"(^|/)(tests?|__tests__|spec)/|(^|/)test_[^/]*$|_test\.\w+$|\.(test|spec)\.\w+$",
+    re.IGNORECASE
+)
+
+# How much of a file's churn counts towards its risk, by language; unlisted extensions get 0.5
+LANGUAGE_WEIGHTS = {
+    ".py": 1.0, ".js": 1.0, ".jsx": 1.0, ".ts": 1.0, ".tsx": 1.0, ".java": 1.0, ".go": 1.0, ".rb": 1.0,
+    ".c": 1.0, ".cpp": 1.0, ".cs": 1.0, ".php": 1.0, ".rs": 1.0, ".sh": 0.8, ".sql": 0.8,
+    ".yml": 0.5, ".yaml": 0.5, ".json": 0.3, ".toml": 0.3,
+    ".md": 0.1, ".rst": 0.1, ".txt": 0.1, ".lock": 0.0, ".svg": 0.0, ".png": 0.0
+}
+DEFAULT_LANGUAGE_WEIGHT = 0.5
+SEMGREP_HIT_WEIGHT = 5
+SEMGREP_MAX_HITS = 4
+SECURITY_PATH_WEIGHT = 8
+TEST_FILE_FACTOR = 0.5
+
+# Monotonic time at which the current run must stop, None if it has no deadline
+RUN_DEADLINE = None
+# Seconds before the deadline at which model generations stop
+FLUSH_RESERVE = 0.0
+DEADLINE_LOCK = Lock()
+# Shortest timeout handed to a call, used once the deadline has passed
+MIN_TIMEOUT = 0.01
+
+def semgrep_hits(findings, file_name):
+    """Count the Semgrep findings for a file; findings carry repository paths (see analysis.scan_changed_files)."""
+    path = os.path.normpath(file_name)
+    return sum(1 for finding in findings if os.path.normpath(finding["file"]) == path)
+
+def risk_score(file, semgrep_findings=()):
+    """
+    Score how important it is to review a changed file early.
+
+    Args:
+        file: A changed file with filename, additions and deletions (a PyGithub File)
+        semgrep_findings (list): Semgrep findings of the run, as returned by run_semgrep
+
+    Returns:
+        float: The risk score, higher is reviewed first
+    """
+    extension = os.path.splitext(file.filename)[1].lower()
+    score = LANGUAGE_WEIGHTS.get(extension, DEFAULT_LANGUAGE_WEIGHT) * math.log2(1 + file.additions + file.deletions)
+    score += SEMGREP_HIT_WEIGHT * min(semgrep_hits(semgrep_findings, file.filename), SEMGREP_MAX_HITS)
+    if SECURITY_PATH_PATTERN.search(file.filename):
+        score += SECURITY_PATH_WEIGHT
+    if TEST_PATH_PATTERN.search(file.filename):
+        score *= TEST_FILE_FACTOR
+    return score
+
+def rank_files(changed_files, semgrep_findings=()):
+    """Order changed files from highest to lowest risk, larger changes first on ties."""
+    return sorted(
+        changed_files,
+        key=lambda f: (risk_score(f, semgrep_findings), f.additions + f.deletions),
+        reverse=True
+    )
+
+def start_deadline(seconds=None):
+    """
+    Start the run's wall-clock deadline.
+
+    Args:
+        seconds (float): Time the run may take, defaults to config.REVIEW_DEADLINE_SECONDS;
+            0 or None means no deadline
+    """
+    global RUN_DEADLINE, FLUSH_RESERVE
+    seconds = config.REVIEW_DEADLINE_SECONDS if seconds is None else seconds
+    with DEADLINE_LOCK:
+        RUN_DEADLINE = time.monotonic() + seconds if seconds else None
+        FLUSH_RESERVE = min(config.DEADLINE_FLUSH_SECONDS, seconds / 10) if seconds else 0.0
+
+def time_left():
+    """Return the seconds left before the run's deadline, or None if it has no deadline."""
+    with DEADLINE_LOCK:
+        deadline = RUN_DEADLINE
+    if deadline is None:
+        return None
+    return max(deadline - time.monotonic(), 0.0)
+
+def generation_time_left():
+    """
+    Return the seconds model generations may still run, or None if the run has no deadline.
+
+    Generations stop FLUSH_RESERVE seconds before the deadline, so the partial output of
+    the ones cut short is collected and posted before the run has to end.
+    """
+    left = time_left()
+    if left is None:
+        return None
+    with DEADLINE_LOCK:
+        reserve = FLUSH_RESERVE
+    return max(left - reserve, 0.0)
+
+def generation_cutoff_passed():
+    """Return True once model generations must stop."""
+    return generation_time_left() == 0.0
+
+def stage_timeout(stage):
+    """
+    Return the timeout of one call in a stage: its config.STAGE_TIMEOUTS budget, capped by the time left.
+
+    Ollama calls are capped by generation_time_left instead. Never zero, which requests
+    rejects; a call made past the deadline times out at once.
+    """
+    timeout = config.STAGE_TIMEOUTS[stage]
+    left = generation_time_left() if stage == "ollama" else time_left()
+    return timeout if left is None else max(min(timeout, left), MIN_TIMEOUT)
+
+def deadline_passed():
+    """Return True once the run's deadline has been reached."""
+    return time_left() == 0.0
@@ -0,0 +1,100 @@
+from pr_review import config
+from pr_review.console import console
+from pr_review.github_api import load_pr_context, get_file_contents
+from pr_review.llm import build_generate_payload, ollama_generate
+from pr_review.prompts import (
+    IMPACT_PROMPT_TEMPLATE, IMPACT_SYSTEM_PROMPT, PR_TYPE_PLANS,
+    determine_pr_type, generate_custom_prompt, handle_token_limit
+)
+
+
+def summary_prompt(ctx, pr_context, files_content):
+    """Build the (system prompt, prompt) pair of a PR summary, trimmed to its PR type's token limit."""
+    pr_type = determine_pr_type(pr_context["title"], pr_context["description"], pr_context.get("changed_files"))
+    system_prompt, prompt = generate_custom_prompt(ctx, pr_type, pr_context, files_content)
+    return system_prompt, handle_token_limit(prompt, PR_TYPE_PLANS[pr_type]["max_tokens"])
+
+def summary_needs_refinement(ctx, pr_context, files_content):
+    """
+    Decide whether fetched file contents change the summary's context enough to summarize again.
+
+    A summary drafted from the title, description and diff is kept unless the contents
+    grow its prompt, within the token limit, by at least config.SUMMARY_REFINE_FRACTION.
+    """
+    _, draft_prompt = summary_prompt(ctx, pr_context, "")
+    _, full_prompt = summary_prompt(ctx, pr_context, files_content)
+    return len(full_prompt) >= len(draft_prompt) * (1 + config.SUMMARY_REFINE_FRACTION)
+
+def generate_pr_summary(ctx, pr_context=None, files_content=None):
+    """
+    Generates a PR summary using Ollama's CodeLlama model.
+
+    Args:
+        ctx (ReviewContext): Review state of the PR, receives the summary
+        pr_context (dict): PR details from get_pr_context, loaded if not given
+        files_content (str): Formatted file contents, fetched if not given; "" drafts
+            the summary from the title, description and diff alone
+    """
+    console.print("\n[cyan]Generating PR summary using AI...\n")
+    if pr_context is None:
+        pr_context = load_pr_context(ctx)
+    
+    if files_content is None:
+        files_content = get_file_contents(ctx, pr_context['changed_files'])
+    
+    # prompt = f"""You are PR-Reviewer, a language model designed to review a Git Pull Request (PR).
+    # Summarize the following PR changes concisely:
+    # Title: {pr_context['title']}
+    # Description: {pr_context['description']}
+    # Changed Files and Contents:
+    # {files_content}
+    # Provide a clear and concise summary of the content changes.
+    # If applicable, your summary should include a note about alterations to the signatures of exported functions, global data structures and variables, and any changes that might affect the external interface or behavior of the code.
+    # """
+    # prompt = handle_token_limit(prompt)
+
+    system_prompt, prompt = summary_prompt(ctx, pr_context, files_content)
+    payload = build_generate_payload(system_prompt, prompt)
+    response = ollama_generate(payload, "summary")
+    if response is None:
+        return
+    
+    if response.status_code == 200:
+        result = response.json()
+        ctx.summary = result.get("response", "[Error generating summary]")
+        console.print(f"\n[green]PR Summary:\n{ctx.summary}\n")
+    else:
+        console.print(f"[red]Error: {response.status_code} - {response.text}")
+
+def analyze_change_impact(ctx):
+    """Analyzes the impact of PR changes in depth."""
+    console.print("\n[cyan]Analyzing PR Change Impact...\n")
+    pr_context = load_pr_context(ctx)
+    idx = 0
+    for file in pr_context['changed_files']:
+        idx += 1
+        findings = [f for f in ctx.semgrep_findings if f['file'] == file.filename]
+        #file_analysis = f"""File: {file.filename}\nChanges: +{file.additions}/-{file.deletions}\nFindings: {findings}\n"""
+        changes = f"+{file.additions}/-{file.deletions}"
+        if file.filename in ctx.files_content:
+            changes = ctx.files_content[file.filename]
+        curr_change = ctx.diff_files[file.filename]
+        prompt = IMPACT_PROMPT_TEMPLATE.substitute(
+            file_name=file.filename,
+            changes=changes,
+            diff=curr_change,
+            findings=findings
+        )
+        prompt = handle_token_limit(prompt)
+        
+        payload = build_generate_payload(IMPACT_SYSTEM_PROMPT, prompt)
+        response = ollama_generate(payload, "impact", file=file.filename)
+        if response is None:
+            break
+        
+        if response.status_code == 200:
+            result = response.json()
+            ctx.change_analysis.append(f"\n{idx}. **Impact Analysis for `{file.filename}`**:\n\t{result.get('response', '[Error]')}\n")
+            console.print(f"\n[green]Impact Analysis for {file.filename}:\n{result.get('response', '[Error]')}\n")
+        else:
+            console.print(f"[red]Error analyzing {file.filename}: {response.status_code} - {response.text}")
@@ -0,0 +1,265 @@
+"""
+Symbol index for fetched files.
+
+Maps line ranges to the functions, methods and classes that enclose them: Python
+files are parsed with ast, JavaScript and TypeScript with a small brace-tracking
+tokenizer. Indexes are cached by git blob SHA, so a file seen again in another
+run or PR is not parsed twice. Prompts use it to show the enclosing definitions
+of changed lines instead of whole files.
+"""
+import ast
+import hashlib
+import re
+from collections import OrderedDict, namedtuple
+from threading import Lock
+
+from pr_review import config
+from pr_review.diff import line_windows
+
+Symbol = namedtuple("Symbol", "kind name start end")
+
+PYTHON_EXTENSIONS = (".py", ".pyi")
+JS_EXTENSIONS = (".js", ".jsx", ".mjs", ".cjs", ".ts", ".tsx")
+
+# Parsed indexes by blob SHA, least recently used first
+SYMBOL_CACHE = OrderedDict()
+SYMBOL_CACHE_LOCK = Lock()
+
+JS_TOKEN_PATTERN = re.compile(r"""
+    (?P<newline>\n)
+    | (?P<space>[ \t\r\f\v]+)
+    | (?P<comment>//[^\n]*|/\*.*?(?:\*/|\Z))
+    | (?P<string>"(?:[^"\\\n]|\\.)*"?|'(?:[^'\\\n]|\\.)*'?|`(?:[^`\\]|\\.)*`?)
+    | (?P<name>[A-Za-z_$][\w$]*)
+    | (?P<arrow>=>)
+    | (?P<punct>[{}()\[\];,=:*])
+    | (?P<other>.)
+""", re.VERBOSE | re.DOTALL)
+
+# Keywords whose blocks are not definitions even though they look like `name(...) {`
+JS_BLOCK_KEYWORDS = {"if", "for", "while", "switch", "catch", "with", "function", "return", "do", "else", "try", "finally"}
+JS_MODIFIERS = {"async", "static", "get", "set", "public", "private", "protected", "readonly", "override", "abstract", "export", "default"}
+
+def blob_sha(data):
+    """Return the git blob SHA of some content, the same id the repository uses for it."""
+    digest = hashlib.sha1(b"blob %d\0" % len(data))
+    digest.update(data)
+    return digest.hexdigest()
+
+def python_symbols(text):
+    """Index the classes and functions of Python source with ast."""
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return []
+
+    symbols = []
+    # Definitions are statements, so only statement lists are walked, not expressions
+    pending = list(tree.body)
+    while pending:
+        node = pending.pop()
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            # Decorators belong to the definition they decorate
+            start = min([node.lineno] + [decorator.lineno for decorator in node.decorator_list])
+            kind = "class" if isinstance(node, ast.ClassDef) else "function"
+            symbols.append(Symbol(kind, node.name, start, node.end_lineno))
+        for field in ("body", "orelse", "finalbody", "handlers", "cases"):
+            pending.extend(getattr(node, field, ()))
+    return sorted(symbols, key=lambda symbol: (symbol.start, -symbol.end))
+
+def js_definition(statement):
+    """
+    Name the definition a block-opening `{` belongs to, from the tokens of its statement.
+
+    Args:
+        statement (list): (kind, value, line) tokens since the previous statement boundary
+
+    Returns:
+        tuple: (kind, name), or None if the brace opens a plain block or object
+    """
+    values = [value for _, value, _ in statement]
+    if not values:
+        return None
+
+    if "class" in values:
+        after = values[values.index("class") + 1:]
+        return ("class", after[0] if after and after[0] not in ("extends", "implements") else "<anonymous>")
+
+    # Leading assignment target: `const name = ...`, `name: ...` or `this.name = ...`
+    target = None
+    for index, (kind, value, _) in enumerate(statement[:-1]):
+        if kind == "name" and values[index + 1] in ("=", ":"):
+            target = value
+            break
+
+    if "function" in values:
+        after = [value for value in values[values.index("function") + 1:] if value != "*"]
+        if after and after[0] != "(":
+            return ("function", after[0])
+        return ("function", target) if target else None
+
+    if values[-1] == "=>":
+        return ("function", target) if target else None
+
+    # Method shorthand `name(args) {`, possibly after modifiers and with a return type
+    if ")" not in values:
+        return None
+    close = len(values) - 1 - values[::-1].index(")")
+    depth = 0
+    for open_index in range(close, -1, -1):
+        depth += {")": 1, "(": -1}.get(values[open_index], 0)
+        if depth == 0:
+            break
+    if open_index < 1 or statement[open_index - 1][0] != "name":
+        return None
+    _, name, line = statement[open_index - 1]
+    if name in JS_BLOCK_KEYWORDS:
+        return None
+    if open_index >= 2:
+        _, previous, previous_line = statement[open_index - 2]
+        # Calls like `obj.run(x)` or `run(x)` inside expressions are not definitions
+        if previous not in JS_MODIFIERS and previous != "*" and previous_line == line:
+            return None
+    return ("function", name)
+
+def js_symbols(text):
+    """Index the classes, functions and methods of JavaScript or TypeScript source."""
+    symbols = []
+    # Open braces: None for braces inside an expression or type, else (definition, line, outer statement, outer parens)
+    stack = []
+    statement = []
+    parens = 0
+    line = 1
+
+    for match in JS_TOKEN_PATTERN.finditer(text):
+        kind = match.lastgroup
+        value = match.group()
+        if kind == "newline":
+            line += 1
+            continue
+        token_line = line
+        line += value.count("\n")
+        if kind in ("space", "comment"):
+            continue
+
+        previous = statement[-1][1] if statement else None
+        if value == "{":
+            if previous in (":", "<", "|", "&", "?") or (parens > 0 and previous not in (")", "=>")):
+                # Type literal, destructuring pattern or object argument
+                stack.append(None)
+                statement.append((kind, value, token_line))
+            else:
+                stack.append((js_definition(statement), token_line, statement, parens))
+                statement = []
+                parens = 0
+        elif value == "}":
+            block = stack.pop() if stack else None
+            if block is None:
+                statement.append((kind, value, token_line))
+                continue
+            definition, start, outer_statement, outer_parens = block
+            if definition:
+                symbols.append(Symbol(definition[0], definition[1], start, token_line))
+            if outer_parens > 0:
+                # A callback body inside a call: the call expression continues
+                statement = outer_statement + [(kind, value, token_line)]
+                parens = outer_parens
+            else:
+                statement = []
+                parens = 0
+        elif value == ";" and parens <= 0:
+            statement = []
+        else:
+            if value == "(":
+                parens += 1
+            elif value == ")":
+                parens -= 1
+            statement.append((kind, value, token_line))
+
+    return symbols
+
+def symbol_index(files, file_name):
+    """
+    Return the symbols of a stored file, parsing it only if its blob has not been seen.
+
+    Args:
+        files (FileContentStore): Fetched file contents
+        file_name (str): Name of the file to index
+
+    Returns:
+        list: Symbol(kind, name, start, end) tuples with 1-based inclusive line ranges
+    """
+    if file_name.endswith(PYTHON_EXTENSIONS):
+        parse = python_symbols
+    elif file_name.endswith(JS_EXTENSIONS):
+        parse = js_symbols
+    else:
+        return []
+
+    with files.view(file_name) as view:
+        key = (blob_sha(view), parse.__name__)
+    with SYMBOL_CACHE_LOCK:
+        if key in SYMBOL_CACHE:
+            SYMBOL_CACHE.move_to_end(key)
+            return SYMBOL_CACHE[key]
+
+    symbols = parse(files[file_name])
+    with SYMBOL_CACHE_LOCK:
+        SYMBOL_CACHE[key] = symbols
+        while len(SYMBOL_CACHE) > config.SYMBOL_CACHE_SIZE:
+            SYMBOL_CACHE.popitem(last=False)
+    return symbols
+
+def enclosing_symbol(symbols, line, max_lines=None):
+    """Return the innermost symbol containing a line, ignoring symbols longer than max_lines."""
+    best = None
+    for symbol in symbols:
+        if symbol.start <= line <= symbol.end and (max_lines is None or symbol.end - symbol.start < max_lines):
+            if best is None or symbol.end - symbol.start < best.end - best.start:
+                best = symbol
+    return best
+
+def context_ranges(files, file_name, changed_lines, context=config.HUNK_CONTEXT_LINES):
+    """
+    Choose the line ranges to show the model for a file's changed lines.
+
+    A changed line inside a function, method or class of at most SYMBOL_MAX_LINES lines
+    brings in that whole definition; other changed lines bring in a window of context.
+
+    Returns:
+        list: Sorted, non-overlapping (start, end, label) tuples, label naming the
+        definition or None for plain windows
+    """
+    symbols = symbol_index(files, file_name)
+    line_count = files.line_count(file_name)
+    ranges = []
+    loose_lines = []
+    for line in sorted(set(changed_lines)):
+        symbol = enclosing_symbol(symbols, line, config.SYMBOL_MAX_LINES)
+        if symbol:
+            ranges.append((symbol.start, min(symbol.end, line_count), f"{symbol.kind} {symbol.name}"))
+        else:
+            loose_lines.append(line)
+    ranges.extend((start, end, None) for start, end in line_windows(loose_lines, context, line_count))
+
+    merged = []
+    for start, end, label in sorted(set(ranges)):
+        if merged and start <= merged[-1][1] + 1:
+            previous = merged[-1]
+            merged[-1] = (previous[0], max(previous[1], end), previous[2] or label)
+        else:
+            merged.append((start, end, label))
+    return merged
+
+def changed_code_excerpt(files, file_name, changed_lines):
+    """
+    Return the numbered lines of the definitions enclosing the changed lines of a file.
+
+    Sections are separated by a `...` line naming the definition that follows, so the
+    model can tell that code between them was left out.
+    """
+    sections = []
+    for start, end, label in context_ranges(files, file_name, changed_lines):
+        header = f"... {label} (lines {start}-{end})" if label else f"... (lines {start}-{end})"
+        sections.append(header + "\n" + files.numbered_lines(file_name, start, end))
+    return "\n".join(sections)
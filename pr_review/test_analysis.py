@@ -0,0 +1,37 @@
+import os
+from types import SimpleNamespace
+
+from pr_review import analysis, config
+from pr_review.analysis import scan_changed_files
+from pr_review.context import ReviewContext
+
+def test_semgrep_scan_reports_findings_by_repository_path(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(config, "SEMGREP_SCAN", True)
+    monkeypatch.setattr(analysis.shutil, "which", lambda name: "/usr/bin/semgrep")
+    monkeypatch.setattr(analysis, "fetch_pr_files",
+                        lambda ctx, names: {name: f"# {name}\n" for name in names})
+    scanned = []
+
+    def fake_semgrep(paths):
+        scanned.extend(paths)
+        return [{"file": path, "rule": "sqli", "message": "Raw SQL"} for path in paths if "db" in path]
+
+    monkeypatch.setattr(analysis, "run_semgrep", fake_semgrep)
+    ctx = ReviewContext.from_url("https://github.com/octo/app/pull/7")
+    changed = [
+        SimpleNamespace(filename="app/db.py", additions=5, deletions=0, status="modified"),
+        SimpleNamespace(filename="lib/db.py", additions=1, deletions=0, status="added"),
+        SimpleNamespace(filename="old.py", additions=0, deletions=9, status="removed"),
+    ]
+
+    contents = scan_changed_files(ctx, changed)
+    assert sorted(contents) == ["app/db.py", "lib/db.py"] and ctx.files_content["lib/db.py"] == "# lib/db.py\n"
+    assert all(os.path.exists(path) for path in scanned)
+    assert sorted(finding["file"] for finding in ctx.semgrep_findings) == ["app/db.py", "lib/db.py"]
+
+def test_semgrep_scan_is_skipped_without_semgrep(monkeypatch):
+    monkeypatch.setattr(analysis.shutil, "which", lambda name: None)
+    ctx = ReviewContext.from_url("https://github.com/octo/app/pull/7")
+    assert scan_changed_files(ctx, [SimpleNamespace(filename="app.py", additions=1, deletions=0)]) == {}
+    assert ctx.semgrep_findings == []
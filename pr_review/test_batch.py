@@ -0,0 +1,18 @@
+from pr_review import batch, scheduling
+
+def test_batch_continues_past_failing_pr(monkeypatch):
+    reviewed = []
+
+    def fake_pipeline(ctx, batch_small_files=False):
+        if ctx.pr_number == "2":
+            raise RuntimeError("boom")
+        reviewed.append(ctx.pr_number)
+
+    monkeypatch.setattr(batch, "run_review_pipeline", fake_pipeline)
+    monkeypatch.setattr("pr_review.worker.warm_up_model", lambda: None)
+    scheduling.start_deadline(0)
+    urls = [f"https://github.com/octo/app/pull/{number}" for number in (1, 2, 3, 1)]
+
+    results = batch.review_batch(urls, max_concurrent=2)
+    assert list(results.values()) == ["reviewed", "failed", "reviewed"]
+    assert sorted(reviewed) == ["1", "3"]
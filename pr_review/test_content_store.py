@@ -0,0 +1,47 @@
+from pr_review import content_store
+from pr_review.content_store import FileContentStore
+
+def test_store_spills_past_memory_cap():
+    files = FileContentStore(memory_cap=content_store.MEMORY_IN_USE + 10)
+    files["small.py"] = "x = 1\n"
+    files["large.py"] = "y = 2\n" * 100
+
+    assert files.memory_bytes == 6
+    assert files.spilled_bytes == 600
+    assert files["large.py"] == "y = 2\n" * 100
+    assert bytes(files.view("large.py")[:6]) == b"y = 2\n"
+    assert sorted(files) == ["large.py", "small.py"]
+    files.close()
+
+def test_store_releases_memory_budget():
+    in_use = content_store.MEMORY_IN_USE
+    files = FileContentStore()
+    files["a.py"] = "print('a')\n"
+    files["a.py"] = "print('ab')\n"
+    assert content_store.MEMORY_IN_USE == in_use + 12
+
+    del files["a.py"]
+    assert "a.py" not in files
+    assert content_store.MEMORY_IN_USE == in_use
+
+def test_numbered_lines():
+    files = FileContentStore()
+    files["app.py"] = "import os\n\nprint(os.name)\n"
+    assert files.numbered_lines("app.py") == "1: import os\n2: \n3: print(os.name)"
+    assert files.size("app.py") == 26
+
+def test_numbered_line_ranges():
+    files = FileContentStore()
+    files["app.py"] = "".join(f"line {i}\r\n" for i in range(1, 101))
+    assert files.line_count("app.py") == 100
+    assert files.numbered_lines("app.py", 41, 43) == "41: line 41\n42: line 42\n43: line 43"
+    assert files.numbered_lines("app.py", 99, 500) == "99: line 99\n100: line 100"
+    assert files.numbered_lines("app.py", 101) == ""
+
+def test_lines_within():
+    files = FileContentStore()
+    files["app.py"] = "a\nbb\nccc\n"
+    assert files.lines_within("app.py", 5) == 2
+    assert files.lines_within("app.py", 7, start=2) == 3
+    assert files.lines_within("app.py", 1, start=2) == 1
+    assert files.lines_within("app.py", 100) == 3
@@ -0,0 +1,42 @@
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from pr_review import summary
+from pr_review.context import ReviewContext
+
+def test_context_from_url_and_workflow_environment(monkeypatch):
+    ctx = ReviewContext.from_url("https://github.com/octo/app/pull/42")
+    assert (ctx.repo, ctx.pr_number) == ("octo/app", "42")
+    assert ctx.output_path("pr_summary.txt") == "downloaded_code/octo_app_42/pr_summary.txt"
+
+    monkeypatch.setenv("REPO_NAME", "octo/tools")
+    monkeypatch.setenv("PR_NUMBER", "7")
+    assert (ReviewContext.from_url(None).repo, ReviewContext.from_url(None).pr_number) == ("octo/tools", "7")
+
+def test_contexts_do_not_share_state():
+    first = ReviewContext.from_url("https://github.com/octo/app/pull/1")
+    second = ReviewContext.from_url("https://github.com/octo/app/pull/2")
+    first.files_content["app.py"] = "x = 1\n"
+    first.semgrep_findings.append({"file": "app.py", "rule": "eval", "message": "..."})
+    first.change_analysis.append("1. app.py")
+    first.diff_files["app.py"] = "+x = 1"
+
+    assert "app.py" not in second.files_content
+    assert second.semgrep_findings == second.change_analysis == [] and second.diff_files == {}
+    assert first.download_dir != second.download_dir
+
+def test_concurrent_summaries_stay_with_their_pr(monkeypatch):
+    def fake_generate(payload, purpose, **attributes):
+        title = payload["prompt"].split("\n", 1)[0]
+        return SimpleNamespace(status_code=200, json=lambda: {"response": f"Summary of {title}"})
+
+    monkeypatch.setattr(summary, "ollama_generate", fake_generate)
+    contexts = [ReviewContext.from_url(f"https://github.com/octo/app/pull/{number}") for number in range(8)]
+
+    def summarize(ctx):
+        pr_context = {"title": f"PR {ctx.pr_number}", "description": "", "changed_files": []}
+        summary.generate_pr_summary(ctx, pr_context, "")
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(summarize, contexts))
+    assert [ctx.summary for ctx in contexts] == [f"Summary of Title: PR {number}" for number in range(8)]
@@ -0,0 +1,34 @@
+from pr_review.diff import line_windows, parse_git_diff, parse_changed_lines
+
+DIFF = """diff --git a/app.py b/app.py
+--- a/app.py
++++ b/app.py
+@@ -1,3 +1,4 @@
+ import os
+-import sys
++import json
++import re
+ print(os.name)
+diff --git a/README.md b/README.md
+--- a/README.md
++++ b/README.md
+@@ -10,2 +10,2 @@
+-Old line
++New line
+ Context"""
+
+def test_parse_git_diff_splits_files():
+    file_diffs = parse_git_diff(DIFF)
+    assert list(file_diffs) == ["app.py", "README.md"]
+    assert file_diffs["app.py"].startswith("diff --git a/app.py b/app.py")
+    assert "+New line" in file_diffs["README.md"]
+    assert "README" not in file_diffs["app.py"]
+
+def test_parse_changed_lines():
+    file_diffs = parse_git_diff(DIFF)
+    assert parse_changed_lines(file_diffs["app.py"]) == [2, 3]
+    assert parse_changed_lines(file_diffs["README.md"]) == [10]
+
+def test_line_windows_merge_and_clamp():
+    assert line_windows([2, 5, 30], context=3, line_count=32) == [(1, 8), (27, 32)]
+    assert line_windows([], context=3, line_count=10) == []
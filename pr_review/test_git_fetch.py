@@ -0,0 +1,71 @@
+import subprocess
+
+from pr_review import config
+from pr_review.git_fetch import read_pr_files
+
+def git(cwd, *args):
+    return subprocess.run(["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+                          cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+def make_remote(path):
+    """A repository with a PR head ref, serving filtered fetches like GitHub does."""
+    path.mkdir()
+    git(path, "init", "-q")
+    (path / "app.py").write_text("print('base')\n")
+    (path / "docs").mkdir()
+    (path / "docs" / "guide.md").write_text("# Guide\n")
+    git(path, "add", ".")
+    git(path, "commit", "-qm", "base")
+    (path / "app.py").write_text("print('head')\n")
+    git(path, "commit", "-qam", "head")
+    git(path, "update-ref", "refs/pull/7/head", "HEAD")
+    git(path, "config", "uploadpack.allowFilter", "true")
+    git(path, "config", "uploadpack.allowAnySHA1InWant", "true")
+    return git(path, "rev-parse", "HEAD")
+
+def test_read_pr_files_from_mirror(tmp_path, monkeypatch):
+    head_sha = make_remote(tmp_path / "remote")
+    monkeypatch.setattr(config, "GIT_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(config, "GIT_REMOTE_URL", f"file://{tmp_path}/remote")
+
+    sha, contents = read_pr_files("owner/repo", "7", ["app.py", "docs/guide.md", "missing.py"])
+    assert sha == head_sha
+    assert contents == {"app.py": "print('head')\n", "docs/guide.md": "# Guide\n"}
+
+def test_read_pr_files_stays_pinned(tmp_path, monkeypatch):
+    head_sha = make_remote(tmp_path / "remote")
+    monkeypatch.setattr(config, "GIT_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(config, "GIT_REMOTE_URL", f"file://{tmp_path}/remote")
+    read_pr_files("owner/repo", "7", ["app.py"])
+
+    # The branch moves after the review started
+    (tmp_path / "remote" / "app.py").write_text("print('moved')\n")
+    git(tmp_path / "remote", "commit", "-qam", "moved")
+    git(tmp_path / "remote", "update-ref", "refs/pull/7/head", "HEAD")
+
+    sha, contents = read_pr_files("owner/repo", "7", ["app.py"], head_sha)
+    assert sha == head_sha
+    assert contents["app.py"] == "print('head')\n"
+
+def test_broken_mirror_is_repaired(tmp_path, monkeypatch):
+    make_remote(tmp_path / "remote")
+    monkeypatch.setattr(config, "GIT_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(config, "GIT_REMOTE_URL", f"file://{tmp_path}/remote")
+    # An earlier run created the directory but failed before configuring it
+    (tmp_path / "cache" / "owner_repo.git").mkdir(parents=True)
+
+    _, contents = read_pr_files("owner/repo", "7", ["app.py"])
+    assert contents == {"app.py": "print('head')\n"}
+    assert [path.name for path in (tmp_path / "cache").iterdir()] == ["owner_repo.git"]
+
+def test_only_requested_blobs_are_fetched(tmp_path, monkeypatch):
+    make_remote(tmp_path / "remote")
+    monkeypatch.setattr(config, "GIT_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(config, "GIT_REMOTE_URL", f"file://{tmp_path}/remote")
+    sha, _ = read_pr_files("owner/repo", "7", ["app.py"])
+
+    git_dir = str(tmp_path / "cache" / "owner_repo.git")
+    missing = git(tmp_path, f"--git-dir={git_dir}", "rev-list", "--objects", "--missing=print", sha)
+    assert [line for line in missing.splitlines() if line.startswith("?")] == [
+        "?" + git(tmp_path / "remote", "rev-parse", "HEAD:docs/guide.md")
+    ]
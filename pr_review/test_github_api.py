@@ -0,0 +1,43 @@
+from types import SimpleNamespace
+
+from pr_review import github_api
+from pr_review.context import ReviewContext
+from pr_review.github_api import get_pr_details, pinned_head_commit
+
+def fake_pull_request(head_repo):
+    base = SimpleNamespace(repo=SimpleNamespace(full_name="octo/app", get_commit=lambda sha: SimpleNamespace(sha=sha)))
+    head = SimpleNamespace(repo=head_repo and SimpleNamespace(full_name=head_repo), ref="feature", sha="abc123")
+    changed = [SimpleNamespace(filename="app.py", additions=3, deletions=1)]
+    return SimpleNamespace(
+        title="Add cache", body="", state="open", head=head, base=base,
+        get_files=lambda: iter(changed), get_commits=lambda: iter([SimpleNamespace(sha="0ld5ha"), SimpleNamespace(sha="abc123")])
+    )
+
+def test_pr_details_come_from_the_cached_pr(monkeypatch):
+    requests = []
+    monkeypatch.setattr(github_api, "get_pull_request",
+                        lambda repo, number: requests.append((repo, number)) or fake_pull_request("fork/app"))
+    ctx = ReviewContext.from_url("https://github.com/octo/app/pull/7")
+
+    assert get_pr_details(ctx) == (["app.py"], "fork/app", "feature")
+    assert get_pr_details(ctx) == (["app.py"], "fork/app", "feature")
+    assert requests == [("octo/app", "7")]
+    assert ctx.head_sha == "abc123" and ctx.pr_context["is_fork"]
+
+def test_deleted_fork_falls_back_to_base_repo(monkeypatch):
+    monkeypatch.setattr(github_api, "get_pull_request", lambda repo, number: fake_pull_request(None))
+    ctx = ReviewContext.from_url("https://github.com/octo/app/pull/7")
+    assert get_pr_details(ctx)[1] == "octo/app"
+    assert not ctx.pr_context["is_fork"]
+
+def test_comments_go_on_the_pinned_head_commit(monkeypatch):
+    pr = fake_pull_request("fork/app")
+    monkeypatch.setattr(github_api, "get_pull_request", lambda repo, number: pr)
+    ctx = ReviewContext.from_url("https://github.com/octo/app/pull/7")
+    ctx.head_sha = "0ld5ha"
+    # New pushes after the review started do not move the comments
+    pr.get_commits = lambda: iter([SimpleNamespace(sha="0ld5ha"), SimpleNamespace(sha="abc123"), SimpleNamespace(sha="new")])
+    assert pinned_head_commit(ctx).sha == "0ld5ha"
+
+    ctx.head_sha = "f0rced"
+    assert pinned_head_commit(ctx).sha == "f0rced"
@@ -0,0 +1,31 @@
+from types import SimpleNamespace
+
+from pr_review.hunk_dedup import fan_out_reviews, plan_file_reviews
+
+def rename_patch(start, variable):
+    return (f"@@ -{start},3 +{start},3 @@ def handler(request):\n"
+            f"     {variable} = request.args\n"
+            f"-    result = fetch_user({variable}, timeout=30)\n"
+            f"+    result = load_user({variable}, timeout=30)\n"
+            f"     return result")
+
+def changed_file(name, patch, additions=1):
+    return SimpleNamespace(filename=name, patch=patch, additions=additions, deletions=1)
+
+def test_repeated_hunks_follow_a_representative():
+    files = [
+        changed_file("api/users.py", rename_patch(10, "user_id")),
+        changed_file("api/orders.py", rename_patch(42, "order_id")),
+        changed_file("api/cache.py", "@@ -1,1 +1,1 @@\n-TTL = 60\n+TTL = compute_ttl(config)"),
+        changed_file("api/admin.py", rename_patch(7, "admin_id")),
+    ]
+    review, followers = plan_file_reviews(files, max_files=2)
+    assert [file.filename for file in review] == ["api/users.py", "api/cache.py"]
+    # Followers are planned even past the review limit
+    assert set(followers) == {"api/orders.py", "api/admin.py"}
+
+    file_reviews = {"api/users.py": [{"line": 12, "comment": "load_user may return None."}]}
+    reviews = fan_out_reviews(file_reviews, followers, {"api/users.py", "api/cache.py"})
+    assert reviews["api/orders.py"][0]["line"] == 44
+    assert reviews["api/admin.py"][0]["comment"].startswith("load_user may return None.")
+    assert fan_out_reviews(file_reviews, followers, set()) == {}
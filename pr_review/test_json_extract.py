@@ -0,0 +1,18 @@
+from pr_review.json_extract import JSONObjectExtractor, extract_review_comments
+
+def test_extractor_handles_chunked_output():
+    extractor = JSONObjectExtractor()
+    assert extractor.feed('Here you go: [{"line": 3, "comm') == []
+    completed = extractor.feed('ent": "Use a context manager"}]')
+    assert completed == [{"line": 3, "comment": "Use a context manager"}]
+
+def test_extractor_salvages_truncated_output():
+    extractor = JSONObjectExtractor()
+    extractor.feed('[{"line": 1, "comment": "ok"}, {"line": 2, "comment": "cut of')
+    assert extract_review_comments(extractor) == [{"line": 1, "comment": "ok"}]
+    assert extractor.unparsed_remainder().startswith(', {"line": 2')
+
+def test_extract_review_comments_ignores_other_objects():
+    extractor = JSONObjectExtractor()
+    extractor.feed('{"summary": "fine", "comments": [{"line": 5, "comment": "typo"}]}')
+    assert extract_review_comments(extractor) == [{"line": 5, "comment": "typo"}]
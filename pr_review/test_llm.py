@@ -0,0 +1,98 @@
+import json
+import time
+
+import requests
+
+from pr_review import config, llm, resilience, review
+from pr_review.llm import stream_json_generation
+from pr_review.json_extract import JSONObjectExtractor
+
+class FakeResponse:
+    def __init__(self, chunks, status_code=200, error=None, delay=0):
+        self.chunks, self.status_code, self.error, self.delay = chunks, status_code, error, delay
+        self.text = ""
+
+    def iter_lines(self):
+        for chunk in self.chunks:
+            time.sleep(self.delay)
+            yield json.dumps(chunk).encode()
+        if self.error:
+            raise self.error
+
+    def close(self):
+        pass
+
+class FakeSession:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.formats = []
+
+    def post(self, url, json=None, stream=False, timeout=None):
+        self.formats.append(json["format"])
+        return self.responses.pop(0)
+
+def streamed(text, done=True):
+    """Ollama stream chunks carrying text, split in the middle of JSON tokens."""
+    chunks = [{"response": text[i:i + 7], "done": False} for i in range(0, len(text), 7)]
+    return chunks + ([{"response": "", "done": True, "eval_count": 9}] if done else [])
+
+COMMENTS = '{"comments": [{"line": 3, "comment": "Close the file"}, {"line": 8, "comment": "Off by one"}]}'
+
+def use_session(monkeypatch, *responses):
+    monkeypatch.setattr(resilience, "BREAKERS", {})
+    session = FakeSession(*responses)
+    monkeypatch.setattr(llm, "http_session", lambda: session)
+    return session
+
+def test_complete_stream_is_finished(monkeypatch):
+    use_session(monkeypatch, FakeResponse(streamed(COMMENTS)))
+    extractor = stream_json_generation("system", "prompt", {"type": "object"})
+    assert extractor.finished and extractor.parsed_cleanly()
+    assert len(extractor.objects) == 3
+
+def test_truncated_stream_keeps_completed_comments(monkeypatch):
+    use_session(monkeypatch, FakeResponse(streamed(COMMENTS[:70], done=False)))
+    extractor = stream_json_generation("system", "prompt", {"type": "object"})
+    assert extractor.objects == [{"line": 3, "comment": "Close the file"}]
+    assert not extractor.finished
+
+def test_stream_broken_by_a_timeout_keeps_completed_comments(monkeypatch):
+    use_session(monkeypatch, FakeResponse(streamed(COMMENTS[:70], done=False),
+                                          error=requests.exceptions.ReadTimeout("read timed out")))
+    extractor = stream_json_generation("system", "prompt", {"type": "object"})
+    assert extractor.objects == [{"line": 3, "comment": "Close the file"}]
+    assert not extractor.finished
+    assert resilience.circuit_breaker("ollama").metrics()["failures"] == 1
+
+def test_generation_is_cut_at_its_stage_timeout(monkeypatch):
+    monkeypatch.setitem(config.STAGE_TIMEOUTS, "ollama", 0.05)
+    use_session(monkeypatch, FakeResponse(streamed(COMMENTS), delay=0.01))
+    extractor = stream_json_generation("system", "prompt", {"type": "object"})
+    assert not extractor.finished
+    assert len(extractor.buffer) < len(COMMENTS)
+
+def test_schema_falls_back_to_plain_json_mode(monkeypatch):
+    session = use_session(monkeypatch, FakeResponse([], status_code=400), FakeResponse(streamed(COMMENTS)))
+    extractor = stream_json_generation("system", "prompt", {"type": "object"})
+    assert session.formats == [{"type": "object"}, "json"]
+    assert extractor.parsed_cleanly()
+
+def test_malformed_output_is_repaired_from_its_unparsed_part(monkeypatch):
+    monkeypatch.setattr(config, "REVIEW_CACHE_DIR", "")
+    prompts = []
+
+    def fake_generation(system_prompt, prompt, response_format, purpose="review", model=None):
+        prompts.append((purpose, prompt))
+        extractor = JSONObjectExtractor()
+        if purpose == "review":
+            extractor.feed('{"line": 3, "comment": "Close the file"}, {"line": 8, comment: Off by one}')
+        else:
+            extractor.feed('{"comments": [{"line": 8, "comment": "Off by one"}]}')
+        extractor.finished = True
+        return extractor
+
+    monkeypatch.setattr(review, "stream_json_generation", fake_generation)
+    comments = review.review_file_content(None, "app.py", "3: open(path)\n8: range(n + 1)", "@@ -3 +3 @@\n+open(path)")
+    assert comments == [{"line": 3, "comment": "Close the file"}, {"line": 8, "comment": "Off by one"}]
+    # Only the part that failed to parse goes back to the model
+    assert prompts[1] == ("repair", ', {"line": 8, comment: Off by one}')
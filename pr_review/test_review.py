@@ -0,0 +1,188 @@
+import json
+import time
+from collections import OrderedDict
+from types import SimpleNamespace
+
+from pr_review import config, review, review_cache, summary
+from pr_review.content_store import FileContentStore
+from pr_review.context import ReviewContext
+from pr_review.diff import parse_git_diff
+from pr_review.json_extract import JSONObjectExtractor
+from pr_review.review import group_files_for_batching, review_file_batch, review_files, run_review_pipeline
+from pr_review.scheduling import generation_cutoff_passed, start_deadline
+
+def answer(text, finished=True):
+    extractor = JSONObjectExtractor()
+    extractor.feed(text)
+    extractor.finished = finished
+    return extractor
+
+def no_cache(monkeypatch):
+    monkeypatch.setattr(config, "REVIEW_CACHE_DIR", "")
+    monkeypatch.setattr(config, "TRIAGE_MODEL", None)
+    monkeypatch.setattr(review_cache, "REVIEW_CACHE", OrderedDict())
+
+def test_grouping_respects_size_and_file_limits():
+    sizes = [("a", 700), ("b", 600), ("c", 400), ("d", 300), ("e", 100), ("big", 5000)]
+    batches = group_files_for_batching(sizes, max_chars=1000, max_files=2)
+    # Largest first, each file in the first batch with room
+    assert batches == [["big"], ["a", "d"], ["b", "c"], ["e"]]
+    assert group_files_for_batching(sizes[:5], max_chars=10000, max_files=3) == [["a", "b", "c"], ["d", "e"]]
+
+def test_batch_answer_is_split_per_file(monkeypatch):
+    files = FileContentStore()
+    files.update({"a.py": "x = 1\n", "b.py": "y = 2\n", "c.py": "z = 3\n"})
+    prompts = []
+
+    def fake_generation(system_prompt, prompt, response_format, purpose="review", model=None):
+        prompts.append(prompt)
+        return answer('Here: {"a.py": [{"line": 1, "comment": "Name x"}], "b.py": [], "c.py": "n/a"}')
+
+    monkeypatch.setattr(review, "stream_json_generation", fake_generation)
+    batch = [(name, f"@@ -0,0 +1 @@\n+{name}") for name in ("a.py", "b.py", "c.py")]
+
+    assert review_file_batch(files, batch) == {"a.py": [{"line": 1, "comment": "Name x"}], "b.py": []}
+    assert all(f"File: {name}" in prompts[0] for name in ("a.py", "b.py", "c.py"))
+
+def test_files_missing_from_the_batch_answer_are_reviewed_alone(monkeypatch):
+    no_cache(monkeypatch)
+    files = FileContentStore()
+    files.update({"a.py": "x = 1\n", "b.py": "y = 2\n"})
+    calls = []
+
+    def fake_generation(system_prompt, prompt, response_format, purpose="review", model=None):
+        calls.append(purpose)
+        if purpose == "batch_review":
+            return answer('{"a.py": [{"line": 1, "comment": "Name x"}]}')
+        return answer('{"comments": [{"line": 1, "comment": "Name y"}]}')
+
+    monkeypatch.setattr(review, "stream_json_generation", fake_generation)
+    pending = [("a.py", "@@ -0,0 +1 @@\n+x = 1"), ("b.py", "@@ -0,0 +1 @@\n+y = 2")]
+
+    reviews = review_files(None, files, pending, batch_small_files=True)
+    assert reviews == {"a.py": [{"line": 1, "comment": "Name x"}], "b.py": [{"line": 1, "comment": "Name y"}]}
+    assert calls == ["batch_review", "review"]
+
+CONTENT = "value = compute()\n" * 10
+
+def changed(filename, patch, additions=1, deletions=1):
+    return SimpleNamespace(filename=filename, patch=patch, additions=additions, deletions=deletions, status="modified")
+
+def fake_pipeline(monkeypatch, changed_files, title="Fix the parser", comments=None, generation=None):
+    """Run the review pipeline against fake GitHub and Ollama calls, returning what happened in order."""
+    no_cache(monkeypatch)
+    monkeypatch.setattr(config, "SEMGREP_SCAN", False)
+    monkeypatch.setattr(config, "PROGRESS_COMMENT", False)
+    monkeypatch.setattr(config, "FETCH_BACKEND", "git")
+    monkeypatch.setattr(config, "REVIEW_WORKERS", 1)
+    events = []
+    pr_context = {"pull_request": None, "title": title, "description": "", "changed_files": changed_files,
+                  "head_repo": "owner/repo"}
+
+    def get_pr_diff(ctx):
+        ctx.diff = "".join(f"diff --git a/{f.filename} b/{f.filename}\n{f.patch}\n" for f in changed_files)
+        ctx.diff_files = parse_git_diff(ctx.diff)
+
+    def fetch_pr_files(ctx, file_names):
+        events.append(("fetch", file_names))
+        return {file_name: CONTENT for file_name in file_names}
+
+    def summary_generation(payload, purpose, **attributes):
+        # Whether the summary saw the file contents or only the diff
+        events.append(("summary", CONTENT in payload["prompt"]))
+        return SimpleNamespace(status_code=200, json=lambda: {"response": "A summary"})
+
+    def review_generation(system_prompt, prompt, response_format, purpose="review", model=None):
+        if generation_cutoff_passed():
+            # Like Ollama slots, no generation starts past the cutoff
+            return None
+        file_name = prompt.split("\n", 1)[0][len("File: "):]
+        events.append(("review", file_name))
+        if generation:
+            return generation(file_name)
+        return answer(json.dumps({"comments": (comments or {}).get(file_name, [])}))
+
+    monkeypatch.setattr(review, "load_pr_context", lambda ctx: pr_context)
+    monkeypatch.setattr(review, "get_pr_diff", get_pr_diff)
+    monkeypatch.setattr(review, "fetch_pr_files", fetch_pr_files)
+    monkeypatch.setattr(summary, "ollama_generate", summary_generation)
+    monkeypatch.setattr(review, "stream_json_generation", review_generation)
+    monkeypatch.setattr(review, "pinned_head_commit", lambda ctx: "head")
+    monkeypatch.setattr(review, "post_comment_on_pr", lambda url, comment, path: events.append(("comment", comment)))
+    monkeypatch.setattr(review, "post_line_comments", lambda url, reviews, pr=None, commit=None: events.append(
+        ("post", {name: [c["line"] for c in reviews[name]] for name in reviews}, commit)
+    ))
+
+    run_review_pipeline(ReviewContext.from_url("https://github.com/owner/repo/pull/7"))
+    return events
+
+def test_pipeline_reviews_and_posts_highest_risk_first(monkeypatch):
+    files = [
+        changed("README.md", "@@ -1 +1 @@\n-Old\n+New", 30, 30),
+        changed("app/views.py", "@@ -1 +1 @@\n-a = 1\n+a = 2", 10, 5),
+        changed("app/auth/login.py", "@@ -3 +3 @@\n-check(user)\n+check(user, token)"),
+    ]
+    comments = {name: [{"line": 1, "comment": "Check this"}] for name in ("README.md", "app/views.py", "app/auth/login.py")}
+    events = fake_pipeline(monkeypatch, files, comments=comments)
+
+    order = ["app/auth/login.py", "app/views.py", "README.md"]
+    assert [event[1] for event in events if event[0] == "review"] == order
+    # Each file's comments go up as its review finishes, on the pinned commit
+    assert [event for event in events if event[0] == "post"] == [("post", {name: [1]}, "head") for name in order]
+    assert [event for event in events if event[0] == "fetch"] == [("fetch", order)]
+
+def test_pipeline_fans_repeated_hunks_out_to_followers(monkeypatch):
+    files = [
+        changed("src/a.py", "@@ -1,2 +1,2 @@\n-result = compute(items)\n+result = compute(items, strict=True)\n context()"),
+        changed("src/b.py", "@@ -5,2 +5,2 @@\n-result = compute(items)\n+result = compute(items, strict=True)\n context()"),
+        changed("src/c.py", "@@ -1 +1 @@\n-limit = 10\n+limit = 20"),
+    ]
+    events = fake_pipeline(monkeypatch, files, comments={"src/a.py": [{"line": 1, "comment": "Strict mode raises"}]})
+
+    # b.py repeats a.py's change and reuses its review
+    assert sorted(event[1] for event in events if event[0] == "review") == ["src/a.py", "src/c.py"]
+    assert ("post", {"src/a.py": [1]}, "head") in events
+    assert ("post", {"src/b.py": [5]}, "head") in events
+
+def test_pipeline_flushes_partial_reviews_at_the_deadline(monkeypatch):
+    files = [
+        changed("app/auth/login.py", "@@ -3 +3 @@\n-check(user)\n+check(user, token)"),
+        changed("app/views.py", "@@ -1 +1 @@\n-a = 1\n+a = 2"),
+    ]
+
+    def generation(file_name):
+        # The generation runs until the cutoff, having completed one comment
+        while not generation_cutoff_passed():
+            time.sleep(0.01)
+        return answer('{"comments": [{"line": 3, "comment": "Token is unchecked"}, {"line": 4', finished=False)
+
+    try:
+        start_deadline(1)
+        start = time.monotonic()
+        events = fake_pipeline(monkeypatch, files, generation=generation)
+        assert time.monotonic() - start < 1
+    finally:
+        start_deadline(0)
+
+    # The lower-risk file never started, the partial comment of the other one is posted
+    assert [event[1] for event in events if event[0] == "review"] == ["app/auth/login.py"]
+    assert [event for event in events if event[0] == "post"] == [("post", {"app/auth/login.py": [3]}, "head")]
+
+def test_docs_pr_is_summarized_without_a_line_review(monkeypatch):
+    files = [changed("docs/guide.md", "@@ -1 +1 @@\n-Old\n+New"), changed("README.md", "@@ -1 +1 @@\n-Old\n+New")]
+    events = fake_pipeline(monkeypatch, files, title="Update the guide")
+
+    assert ("fetch", ["docs/guide.md", "README.md"]) in events
+    assert not [event for event in events if event[0] in ("review", "post")]
+    # The draft from the diff comes first, then the summary with the fetched contents
+    assert [event for event in events if event[0] == "summary"] == [("summary", False), ("summary", True)]
+
+def test_dependency_bump_fetches_no_contents(monkeypatch):
+    files = [
+        changed("requirements.txt", "@@ -1 +1 @@\n-requests==2.31.0\n+requests==2.32.3"),
+        changed("package-lock.json", "@@ -1 +1 @@\n-x\n+y"),
+    ]
+    events = fake_pipeline(monkeypatch, files, title="Bump requests")
+
+    assert not [event for event in events if event[0] in ("fetch", "review", "post")]
+    assert [event for event in events if event[0] == "summary"] == [("summary", False)]
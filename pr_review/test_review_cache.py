@@ -0,0 +1,88 @@
+from pr_review import config, review_cache
+from pr_review.content_store import FileContentStore
+from pr_review.diff import parse_changed_lines
+from pr_review.review_cache import cached_review, hunk_hash, review_cache_key, store_review
+from pr_review.symbols import changed_code_excerpt
+
+DIFF = """diff --git a/app.py b/app.py
+index 1111111..2222222 100644
+--- a/app.py
++++ b/app.py
+@@ -10,2 +10,3 @@ def load(path):
+     data = read(path)
++    data = data.strip()
+     return data
+@@ -40,1 +41,2 @@ def save(path, data):
++    check(path)
+     write(path, data)"""
+
+def moved(diff, first, second):
+    """Return the diff with its hunks moved to new start lines, as after a rebase."""
+    return diff.replace("+10,3", f"+{first},3").replace("+41,2", f"+{second},2").replace("index 1111111", "index 3333333")
+
+def test_key_ignores_line_offsets():
+    assert hunk_hash(DIFF) == hunk_hash(moved(DIFF, 15, 60))
+    assert hunk_hash(DIFF) != hunk_hash(DIFF.replace("check(path)", "check(data)"))
+    assert review_cache_key("10: a\n11: b", DIFF)[0] == review_cache_key("20: a\n21: b", DIFF)[0]
+
+def test_cached_review_is_remapped(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "REVIEW_CACHE_DIR", str(tmp_path))
+    key = review_cache_key("11: data = data.strip()", DIFF)
+    store_review(key, DIFF, [{"line": 11, "comment": "strip twice"}, {"line": 41, "comment": "check first"}])
+
+    assert cached_review(key, DIFF)[0]["line"] == 11
+    # Each hunk follows its own offset, also when read back from disk
+    review_cache.REVIEW_CACHE.clear()
+    comments = cached_review(key, moved(DIFF, 15, 60))
+    assert [comment["line"] for comment in comments] == [16, 60]
+    assert cached_review(review_cache_key("other code", DIFF), DIFF) is None
+
+def test_only_finished_clean_reviews_are_stored(monkeypatch, tmp_path):
+    from pr_review import review
+    from pr_review.json_extract import JSONObjectExtractor
+
+    monkeypatch.setattr(config, "REVIEW_CACHE_DIR", str(tmp_path))
+    answers = []
+
+    def fake_generation(system_prompt, prompt, response_format, purpose="review", model=None):
+        extractor = JSONObjectExtractor()
+        output, finished = answers.pop(0)
+        extractor.feed(output)
+        extractor.finished = finished
+        return extractor
+
+    monkeypatch.setattr(review, "stream_json_generation", fake_generation)
+    complete = '{"comments": [{"line": 11, "comment": "strip twice"}]}'
+    for code, output, finished in [
+        ("10: cut", complete, False),                              # stream cut by its timeout
+        ("10: garbled", 'Sure: {"line": 11, "comm', True),        # no parseable JSON
+        ("10: clean", complete, True),
+    ]:
+        answers.extend([(output, finished), ("", True)])
+        review.review_file_content(None, "app.py", code, DIFF)
+        answers.clear()
+
+    assert cached_review(review_cache_key("10: cut", DIFF), DIFF) is None
+    assert cached_review(review_cache_key("10: garbled", DIFF), DIFF) is None
+    assert cached_review(review_cache_key("10: clean", DIFF), DIFF) == [{"line": 11, "comment": "strip twice"}]
+
+def test_moved_excerpt_hits_the_cache_with_remapped_lines(monkeypatch):
+    monkeypatch.setattr(config, "REVIEW_CACHE_DIR", "")
+    monkeypatch.setattr(review_cache, "REVIEW_CACHE", review_cache.OrderedDict())
+    function = "def save(path, data):\n    check(path)\n    write(path, data)\n    return path\n"
+    filler = "".join(f"SETTING_{n} = {n}\n" for n in range(30))
+    files = FileContentStore()
+    # The same function, 5 lines further down after a rebase
+    files["old.py"] = filler + "\n" + function + "\n" + filler
+    files["new.py"] = filler + "\n" + "".join(f"EXTRA_{n} = {n}\n" for n in range(5)) + function + "\n" + filler
+
+    def excerpt_and_diff(file_name, start):
+        diff = f"@@ -{start},3 +{start},4 @@\n def save(path, data):\n+    check(path)\n     write(path, data)\n     return path"
+        return changed_code_excerpt(files, file_name, parse_changed_lines(diff)), diff
+
+    old_excerpt, old_diff = excerpt_and_diff("old.py", 32)
+    new_excerpt, new_diff = excerpt_and_diff("new.py", 37)
+    assert "(lines 32-35)" in old_excerpt and "(lines 37-40)" in new_excerpt
+
+    store_review(review_cache_key(old_excerpt, old_diff), old_diff, [{"line": 33, "comment": "check before write"}])
+    assert cached_review(review_cache_key(new_excerpt, new_diff), new_diff) == [{"line": 38, "comment": "check before write"}]
@@ -0,0 +1,55 @@
+from collections import namedtuple
+
+from pr_review import config, scheduling
+from pr_review.scheduling import (
+    deadline_passed, generation_cutoff_passed, rank_files, risk_score, semgrep_hits, stage_timeout,
+    start_deadline, time_left
+)
+
+ChangedFile = namedtuple("ChangedFile", "filename additions deletions")
+
+def test_rank_files_orders_by_risk():
+    files = [
+        ChangedFile("README.md", 200, 50),
+        ChangedFile("tests/test_views.py", 40, 0),
+        ChangedFile("app/views.py", 40, 0),
+        ChangedFile("app/auth/login.py", 5, 1),
+    ]
+    ranked = [f.filename for f in rank_files(files)]
+    assert ranked == ["app/auth/login.py", "app/views.py", "tests/test_views.py", "README.md"]
+
+def test_semgrep_findings_raise_risk():
+    views, models = ChangedFile("app/views.py", 10, 0), ChangedFile("app/models.py", 30, 0)
+    findings = [{"file": "app/views.py", "rule": "sqli", "message": "..."}]
+    assert risk_score(views, findings) > risk_score(views)
+    assert [f.filename for f in rank_files([models, views], findings)] == ["app/views.py", "app/models.py"]
+
+def test_semgrep_findings_count_only_for_their_own_path():
+    package, other = ChangedFile("app/__init__.py", 10, 0), ChangedFile("lib/__init__.py", 10, 0)
+    findings = [{"file": "./app/__init__.py", "rule": "eval", "message": "..."}]
+    assert semgrep_hits(findings, "app/__init__.py") == 1 and semgrep_hits(findings, "lib/__init__.py") == 0
+    assert risk_score(package, findings) > risk_score(other, findings) == risk_score(other)
+
+def test_deadline():
+    try:
+        start_deadline(0)
+        assert time_left() is None and not deadline_passed()
+        start_deadline(60)
+        assert 0 < time_left() <= 60 and not deadline_passed()
+        start_deadline(1e-9)
+        assert deadline_passed() and time_left() == 0.0
+    finally:
+        scheduling.RUN_DEADLINE = None
+
+def test_generations_stop_before_the_deadline(monkeypatch):
+    monkeypatch.setattr(config, "DEADLINE_FLUSH_SECONDS", 10)
+    try:
+        start_deadline(600)
+        # Model calls leave the last 10 seconds to collect and post, other stages may use them
+        assert 589 < stage_timeout("ollama") <= 590 and stage_timeout("github") == config.STAGE_TIMEOUTS["github"]
+        start_deadline(5)
+        assert 4.4 < stage_timeout("ollama") <= 4.5 and not generation_cutoff_passed()
+        scheduling.RUN_DEADLINE -= 4.6
+        assert generation_cutoff_passed() and not deadline_passed()
+    finally:
+        start_deadline(0)
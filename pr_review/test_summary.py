@@ -0,0 +1,10 @@
+from types import SimpleNamespace
+
+from pr_review.summary import summary_needs_refinement
+
+PR_CONTEXT = {"title": "Add retry to the uploader", "description": "Retries failed uploads."}
+
+def test_summary_is_refined_only_for_material_context():
+    ctx = SimpleNamespace(diff="+    for attempt in range(3):\n+        upload(path)\n" * 20)
+    assert not summary_needs_refinement(ctx, PR_CONTEXT, "File: upload.py\n```\nimport os\n```\n")
+    assert summary_needs_refinement(ctx, PR_CONTEXT, "File: upload.py\n```\n" + "def upload(path):\n" * 200 + "```\n")
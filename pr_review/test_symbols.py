@@ -0,0 +1,63 @@
+from pr_review import symbols
+from pr_review.content_store import FileContentStore
+from pr_review.symbols import changed_code_excerpt, context_ranges, js_symbols, python_symbols, symbol_index
+
+PYTHON_SOURCE = """import os
+
+@cached
+def load(path):
+    return open(path).read()
+
+class Loader:
+    def read(self, path):
+        data = load(path)
+        return data.strip()
+"""
+
+JS_SOURCE = """export class Api extends Base {
+  async get(url: string): Promise<{ok: boolean}> {
+    return fetch(url);
+  }
+}
+function parse(text, {strict}) {
+  return items.map(x => { return x; });
+}
+const handler = async (event) => {
+  return event;
+};
+"""
+
+def test_python_symbols():
+    assert python_symbols(PYTHON_SOURCE) == [
+        symbols.Symbol("function", "load", 3, 5),
+        symbols.Symbol("class", "Loader", 7, 10),
+        symbols.Symbol("function", "read", 8, 10),
+    ]
+    assert python_symbols("def broken(:\n") == []
+
+def test_js_symbols():
+    assert sorted(js_symbols(JS_SOURCE), key=lambda symbol: symbol.start) == [
+        symbols.Symbol("class", "Api", 1, 5),
+        symbols.Symbol("function", "get", 2, 4),
+        symbols.Symbol("function", "parse", 6, 8),
+        symbols.Symbol("function", "handler", 9, 11),
+    ]
+
+def test_context_ranges_use_enclosing_definitions():
+    files = FileContentStore()
+    files["loader.py"] = PYTHON_SOURCE + "\n" * 40 + "VALUE = 1\n"
+    ranges = context_ranges(files, "loader.py", [9, 51], context=2)
+    assert ranges == [(8, 10, "function read"), (49, 51, None)]
+
+    excerpt = changed_code_excerpt(files, "loader.py", [9])
+    assert excerpt.splitlines()[0] == "... function read (lines 8-10)"
+    assert excerpt.splitlines()[2] == "9:         data = load(path)"
+
+def test_symbol_index_is_cached_by_blob():
+    files = FileContentStore()
+    files["a.py"] = PYTHON_SOURCE
+    files["copy/a.py"] = PYTHON_SOURCE
+    assert symbol_index(files, "a.py") is symbol_index(files, "copy/a.py")
+
+def test_blob_sha_matches_git():
+    assert symbols.blob_sha(b"hello\n") == "ce013625030ba8dba906f756967f9e9ca394464a"
@@ -0,0 +1,37 @@
+import json
+
+import pytest
+
+from pr_review import tracing
+from pr_review.tracing import trace_stage, traced_run
+
+def test_trace_is_written_when_the_command_fails(monkeypatch, tmp_path):
+    monkeypatch.setattr(tracing, "TRACE_SPANS", [])
+    path = tmp_path / "trace.json"
+    with pytest.raises(RuntimeError):
+        with traced_run(path):
+            with trace_stage("get_diff", bytes=10):
+                pass
+            raise RuntimeError("GitHub is down")
+    assert [span["stage"] for span in json.loads(path.read_text())["spans"]] == ["get_diff"]
+
+def test_worker_writes_and_clears_the_trace_of_each_command(monkeypatch, tmp_path):
+    from pr_review import chat
+    from pr_review.worker import ChatbotWorker
+
+    monkeypatch.setattr(tracing, "TRACE_SPANS", [])
+    monkeypatch.chdir(tmp_path)
+
+    def fake_command(ctx, comment_body, comment_id):
+        with trace_stage("ollama", purpose="chat"):
+            pass
+
+    monkeypatch.setattr(chat, "create_chatbot_command", fake_command)
+    worker = ChatbotWorker()
+    for comment_id in ("1", "2"):
+        assert worker.handle({"command": "process-comment", "pr_url": "https://github.com/o/r/pull/3",
+                              "comment_body": "/ai why?", "comment_id": comment_id}) == {"ok": True}
+        assert tracing.TRACE_SPANS == []
+
+    trace = json.loads((tmp_path / "downloaded_code" / "o_r_3" / "review_trace.json").read_text())
+    assert [span["purpose"] for span in trace["spans"]] == ["chat"]
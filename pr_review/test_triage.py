@@ -0,0 +1,32 @@
+from types import SimpleNamespace
+
+from pr_review import config, triage
+from pr_review.triage import triage_files
+
+def test_triage_sends_only_flagged_files_to_deep_review(monkeypatch):
+    monkeypatch.setattr(config, "TRIAGE_MODEL", "small-coder")
+    answers = {
+        "README.md": [{"deep_review": False, "reason": "Documentation only."}],
+        "auth.py": [{"deep_review": True, "reason": "Changes token checks."}],
+        "util.py": ["not an answer"],
+    }
+    screened = []
+
+    def fake_generation(system_prompt, prompt, response_format, purpose, model):
+        file_name = prompt.split("\n")[0].removeprefix("File: ")
+        screened.append((file_name, model))
+        return SimpleNamespace(objects=answers[file_name])
+
+    monkeypatch.setattr(triage, "stream_json_generation", fake_generation)
+    pending = [(name, f"+change in {name}") for name in ("README.md", "auth.py", "util.py", "db.py")]
+    findings = [{"file": "db.py", "rule": "sql-injection", "message": "Raw SQL"}]
+
+    flagged, cleared = triage_files(pending, findings)
+    assert [name for name, _ in flagged] == ["auth.py", "util.py", "db.py"]
+    assert cleared == ["README.md"]
+    # Files with Semgrep hits skip the screen, which always runs on the triage model
+    assert screened == [("README.md", "small-coder"), ("auth.py", "small-coder"), ("util.py", "small-coder")]
+
+def test_triage_is_off_without_a_triage_model(monkeypatch):
+    monkeypatch.setattr(config, "TRIAGE_MODEL", None)
+    assert triage_files([("app.py", "+x")]) == ([("app.py", "+x")], [])
@@ -0,0 +1,91 @@
+import os
+import subprocess
+import sys
+import time
+from multiprocessing.connection import Listener
+from threading import Thread
+
+import pr_chatbot
+from pr_review import chat, config
+from pr_review.worker import ChatbotWorker, create_worker_key, send_to_worker, worker_address
+
+def test_worker_address():
+    assert worker_address("localhost:6321") == ("localhost", 6321)
+    assert worker_address("::1:7000") == ("::1", 7000)
+
+def test_send_to_worker_without_worker_falls_back():
+    # Nothing listens on the discard port, so the caller runs the command itself
+    assert send_to_worker({"command": "ping"}, "localhost:9") is None
+
+def private_key(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "WORKER_AUTHKEY", None)
+    monkeypatch.setattr(config, "WORKER_KEY_FILE", str(tmp_path / "worker.key"))
+    return create_worker_key()
+
+def test_worker_key_is_private_and_a_dropped_connection_is_not_retried(monkeypatch, tmp_path):
+    key = private_key(monkeypatch, tmp_path)
+    assert os.stat(config.WORKER_KEY_FILE).st_mode & 0o777 == 0o600
+
+    with Listener(("localhost", 0), authkey=key) as listener:
+        # The worker accepts the command, then goes away without replying
+        dropper = Thread(target=lambda: listener.accept().close())
+        dropper.start()
+        host, port = listener.address
+        reply = send_to_worker({"command": "ping"}, f"{host}:{port}")
+        dropper.join()
+    assert reply["sent"] and not reply["ok"]
+
+def test_comment_sent_to_a_silent_worker_is_not_answered_again(monkeypatch, tmp_path):
+    key = private_key(monkeypatch, tmp_path)
+    monkeypatch.setattr(config, "WORKER_REPLY_TIMEOUT", 0.2)
+    answered = []
+    monkeypatch.setattr(chat, "create_chatbot_command", lambda *args: answered.append(args))
+    received = []
+
+    with Listener(("localhost", 0), authkey=key) as listener:
+        def silent_worker():
+            # The worker takes the comment but is still busy with it when the client gives up
+            with listener.accept() as conn:
+                received.append(conn.recv())
+                time.sleep(0.5)
+
+        worker = Thread(target=silent_worker)
+        worker.start()
+        host, port = listener.address
+        monkeypatch.setattr(config, "WORKER_ADDRESS", f"{host}:{port}")
+        status = pr_chatbot.main(["--pr-url", "https://github.com/o/r/pull/1", "--process-comment", "7", "/ai why?"])
+        worker.join()
+
+    assert received[0]["comment_id"] == "7"
+    assert status == 1 and not answered
+
+def test_comment_is_answered_in_process_without_a_worker(monkeypatch, tmp_path):
+    private_key(monkeypatch, tmp_path)
+    monkeypatch.setattr(config, "WORKER_ADDRESS", "localhost:9")
+    answered = []
+    monkeypatch.setattr(chat, "create_chatbot_command", lambda ctx, body, comment_id: answered.append(comment_id))
+    pr_chatbot.main(["--pr-url", "https://github.com/o/r/pull/1", "--process-comment", "7", "/ai why?"])
+    assert answered == ["7"]
+
+def test_worker_handles_ping_and_unknown_commands():
+    worker = ChatbotWorker()
+    assert worker.handle({"command": "ping"}) == {"ok": True, "prs": 0}
+    assert worker.handle({"command": "review"})["ok"] is False
+
+def test_worker_drops_least_recently_used_contexts():
+    worker = ChatbotWorker(max_prs=2)
+    for number in (1, 2, 1, 3):
+        worker.context_for(f"https://github.com/o/r/pull/{number}")
+    assert list(worker.contexts) == ["https://github.com/o/r/pull/1", "https://github.com/o/r/pull/3"]
+    assert set(worker.locks) == set(worker.contexts)
+
+def test_ping_runs_before_the_dependencies_are_installed():
+    # The workflow pings before installing requirements, so rich, requests and PyGithub are missing
+    script = ("import runpy, sys\n"
+              "sys.modules.update(rich=None, requests=None, github=None)\n"
+              "sys.argv = ['pr_chatbot.py', '--ping-worker']\n"
+              "runpy.run_path('pr_chatbot.py', run_name='__main__')\n")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, "-c", script], cwd=root, capture_output=True, text=True,
+                            env={**os.environ, "PR_REVIEW_WORKER": "localhost:9"})
+    assert result.returncode == 1 and not result.stderr
@@ -0,0 +1,120 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+from threading import Lock
+
+from pr_review import config
+
+# Run trace: one span per timed stage, shared by every review in the process
+TRACE_SPANS = []
+TRACE_LOCK = Lock()
+OLLAMA_METRIC_FIELDS = (
+    "prompt_eval_count", "prompt_eval_duration",
+    "eval_count", "eval_duration",
+    "load_duration", "total_duration"
+)
+
+@contextmanager
+def trace_stage(stage, **attributes):
+    """
+    Time a pipeline stage and record it in the run trace.
+
+    The yielded span is a dict that the caller can fill with extra measurements
+    such as transferred bytes or Ollama token counts.
+    """
+    span = {"stage": stage, **attributes, "started_at": time.time()}
+    start = time.perf_counter()
+    try:
+        yield span
+    except Exception as e:
+        span["error"] = repr(e)
+        raise
+    finally:
+        span["wall_time"] = time.perf_counter() - start
+        with TRACE_LOCK:
+            TRACE_SPANS.append(span)
+
+@contextmanager
+def traced_run(path=None):
+    """Run an entry point's command and write the run trace when it ends, even if it fails."""
+    try:
+        yield
+    finally:
+        write_trace_report(path)
+
+def record_ollama_metrics(span, result):
+    """Copy Ollama's token counts and durations (nanoseconds) from a final response into a span."""
+    for field in OLLAMA_METRIC_FIELDS:
+        if field in result:
+            span[field] = result[field]
+
+def write_trace_report(path=None):
+    """
+    Write the run trace as JSON and print a per-stage summary table.
+
+    The written spans are cleared, so a long-running process (the chatbot worker)
+    reports each command's spans once and does not keep them.
+    """
+    with TRACE_LOCK:
+        spans = list(TRACE_SPANS)
+        TRACE_SPANS.clear()
+    if not spans:
+        return
+
+    from pr_review.rate_limit import github_governor
+    from pr_review.resilience import circuit_metrics
+
+    # GitHub call counters, if this run made any GitHub calls
+    github_metrics = github_governor().metrics() if github_governor.cache_info().currsize else None
+    circuits = circuit_metrics()
+
+    path = path or config.TRACE_FILE
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"spans": spans, "github": github_metrics, "circuits": circuits}, f, indent=2, default=str)
+
+    # Group LLM calls by purpose so summary, review and repair calls are told apart
+    stages = {}
+    for span in spans:
+        name = span["stage"] if "purpose" not in span else f"{span['stage']}:{span['purpose']}"
+        stages.setdefault(name, []).append(span)
+
+    from rich.table import Table
+
+    from pr_review.console import console
+
+    table = Table(title="Review run trace")
+    for column in ("Stage", "Calls", "Wall (s)", "Max (s)", "Bytes", "Prompt tokens",
+                   "Output tokens", "Prefill (s)", "Generation (s)", "Tokens/s", "Errors"):
+        table.add_column(column, justify="left" if column == "Stage" else "right")
+
+    for name, stage_spans in stages.items():
+        total = lambda field: sum(span.get(field, 0) for span in stage_spans)
+        eval_seconds = total("eval_duration") / 1e9
+        table.add_row(
+            name,
+            str(len(stage_spans)),
+            f"{total('wall_time'):.2f}",
+            f"{max(span['wall_time'] for span in stage_spans):.2f}",
+            str(total("bytes")),
+            str(total("prompt_eval_count")),
+            str(total("eval_count")),
+            f"{total('prompt_eval_duration') / 1e9:.2f}",
+            f"{eval_seconds:.2f}",
+            f"{total('eval_count') / eval_seconds:.1f}" if eval_seconds else "-",
+            str(sum(1 for span in stage_spans if "error" in span))
+        )
+
+    console.print(table)
+    if github_metrics:
+        console.print(
+            f"GitHub API: {github_metrics['calls']} calls ({github_metrics['writes']} writes), "
+            f"{github_metrics['retries']} retries, {github_metrics['waits']} waits totalling "
+            f"{github_metrics['wait_seconds']:.1f}s, budget left {github_metrics['remaining']}/{github_metrics['limit']}"
+        )
+    for backend, metrics in circuits.items():
+        if metrics["failures"]:
+            console.print(f"[yellow]{backend}: {metrics['failures']} failed calls, circuit opened "
+                          f"{metrics['opened']} times, {metrics['rejected']} calls skipped")
+    console.print(f"[green]Wrote run trace to {path}")
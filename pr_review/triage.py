@@ -0,0 +1,62 @@
+"""
+Two-tier review: a small model screens files before the line review.
+
+With config.TRIAGE_MODEL set, each file's diff is first shown to that fast model with
+a cheap "needs deep review?" prompt. Only the files it flags, files with Semgrep
+findings and changes too large to screen are line-reviewed by config.DEEP_REVIEW_MODEL;
+the rest are cleared without comments. A screen that fails or gives an unreadable
+answer flags the file, so a broken triage model costs time, never findings.
+"""
+from pr_review import config
+from pr_review.console import console
+from pr_review.llm import stream_json_generation
+from pr_review.prompts import TRIAGE_PROMPT_TEMPLATE, TRIAGE_SCHEMA, TRIAGE_SYSTEM_PROMPT
+from pr_review.scheduling import semgrep_hits
+
+def needs_deep_review(file_name, diff_content):
+    """
+    Ask the triage model whether a file's changes need a line review.
+
+    Returns:
+        tuple: (True if the file needs a deep review, the reason given)
+    """
+    if len(diff_content) > config.TRIAGE_MAX_DIFF_CHARS:
+        return True, "too large to screen"
+
+    prompt = TRIAGE_PROMPT_TEMPLATE.substitute(file_name=file_name, diff=diff_content)
+    extractor = stream_json_generation(TRIAGE_SYSTEM_PROMPT, prompt, TRIAGE_SCHEMA,
+                                       purpose="triage", model=config.TRIAGE_MODEL)
+    if extractor is None:
+        return True, "screen failed"
+    for parsed in extractor.objects:
+        if isinstance(parsed, dict) and isinstance(parsed.get("deep_review"), bool):
+            return parsed["deep_review"], str(parsed.get("reason", ""))
+    return True, "screen answer unreadable"
+
+def triage_files(pending_files, semgrep_findings=()):
+    """
+    Split files into those that need a line review and those the screen cleared.
+
+    Args:
+        pending_files (list): List of (file_name, diff_content) tuples
+        semgrep_findings (list): Semgrep findings of the PR; files with any skip the screen
+
+    Returns:
+        tuple: (list of (file_name, diff_content) tuples to review, list of cleared file names)
+    """
+    if not config.TRIAGE_MODEL:
+        return list(pending_files), []
+
+    flagged, cleared = [], []
+    for file_name, diff_content in pending_files:
+        if semgrep_hits(semgrep_findings, file_name):
+            deep, reason = True, "Semgrep findings"
+        else:
+            deep, reason = needs_deep_review(file_name, diff_content)
+        if deep:
+            console.print(f"[cyan]Triage: {file_name} needs a deep review ({reason})")
+            flagged.append((file_name, diff_content))
+        else:
+            console.print(f"[green]Triage: {file_name} cleared ({reason})")
+            cleared.append(file_name)
+    return flagged, cleared
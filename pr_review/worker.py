@@ -0,0 +1,196 @@
+"""
+Resident chatbot worker.
+
+`pr_chatbot.py --worker` keeps one process alive with the dependencies imported,
+the GitHub and Ollama connections pooled, the model loaded and a ReviewContext per
+PR, so each `/ai` comment skips the cold start. Clients hand commands over a local
+authenticated socket and fall back to running the command themselves when no
+worker takes it. Clients only need the standard library, so `--ping-worker` works before
+the dependencies are installed; the console is imported where something is printed.
+
+multiprocessing.connection unpickles what it receives, so anyone holding the key can
+run code in the worker. Without PR_REVIEW_WORKER_KEY the worker generates a random key
+at startup and writes it to config.WORKER_KEY_FILE with owner-only permissions.
+"""
+import os
+import secrets
+import tempfile
+from collections import OrderedDict
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+from threading import Lock, Thread
+
+from pr_review import config
+
+def worker_address(address=None):
+    """Split a "host:port" worker address into the tuple used by multiprocessing.connection."""
+    host, port = (address or config.WORKER_ADDRESS).rsplit(":", 1)
+    return host, int(port)
+
+def read_worker_key():
+    """Return the worker key from PR_REVIEW_WORKER_KEY or the worker's key file, or None."""
+    if config.WORKER_AUTHKEY:
+        return config.WORKER_AUTHKEY
+    try:
+        with open(config.WORKER_KEY_FILE, "rb") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+def create_worker_key():
+    """
+    Return the key the worker listens with.
+
+    Without PR_REVIEW_WORKER_KEY a random key is generated and written to
+    config.WORKER_KEY_FILE, readable by the current user only.
+    """
+    if config.WORKER_AUTHKEY:
+        return config.WORKER_AUTHKEY
+    key = secrets.token_hex(32).encode()
+    key_dir = os.path.dirname(config.WORKER_KEY_FILE)
+    os.makedirs(key_dir, mode=0o700, exist_ok=True)
+    # mkstemp creates the file with mode 0600, and the rename replaces any earlier key at once
+    fd, tmp_path = tempfile.mkstemp(dir=key_dir, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+    os.replace(tmp_path, config.WORKER_KEY_FILE)
+    return key
+
+def send_to_worker(request, address=None, timeout=None):
+    """
+    Send a request to the resident worker and wait for its reply.
+
+    Args:
+        request (dict): Command with a "command" key and its arguments
+        address (str): Worker "host:port", defaults to config.WORKER_ADDRESS
+        timeout (float): Seconds to wait for the reply, defaults to config.WORKER_REPLY_TIMEOUT
+
+    Returns:
+        dict: The worker's reply, or None if no worker took the request and the caller should
+        run the command itself. Once the request is sent, a missing reply (timeout or lost
+        connection) gives {"ok": False, "sent": True, "error": ...}: the worker may still
+        carry the command out, so the caller must not run it again.
+    """
+    authkey = read_worker_key()
+    if authkey is None:
+        return None
+    try:
+        conn = Client(worker_address(address), authkey=authkey)
+    except AuthenticationError:
+        from pr_review.console import console
+        console.print("[yellow]A worker is running but rejected the worker key")
+        return None
+    except (EOFError, OSError):
+        return None
+
+    with conn:
+        try:
+            conn.send(request)
+        except (EOFError, OSError):
+            # The worker never got the request
+            return None
+        try:
+            if not conn.poll(config.WORKER_REPLY_TIMEOUT if timeout is None else timeout):
+                return {"ok": False, "sent": True, "error": "The worker did not reply in time"}
+            return conn.recv()
+        except (EOFError, OSError) as e:
+            return {"ok": False, "sent": True, "error": f"Lost the connection to the worker: {e!r}"}
+
+def warm_up_model():
+    """Load the model into Ollama ahead of the first command and keep it resident."""
+    from pr_review.clients import http_session
+    from pr_review.console import console
+
+    payload = {"model": config.MODEL_NAME, "keep_alive": config.OLLAMA_KEEP_ALIVE}
+    try:
+        http_session().post(config.OLLAMA_API_URL, json=payload, timeout=config.STAGE_TIMEOUTS["ollama"])
+    except OSError as e:
+        console.print(f"[yellow]Could not preload the model: {e}")
+
+class ChatbotWorker:
+    """Serves chatbot commands from one long-lived process, one ReviewContext per PR."""
+
+    def __init__(self, max_prs=None):
+        # Contexts by PR URL, least recently used first
+        self.contexts = OrderedDict()
+        self.locks = {}
+        self.max_prs = max_prs or config.WORKER_MAX_PRS
+        self._lock = Lock()
+
+    def context_for(self, pr_url):
+        """
+        Return the cached context for a PR and the lock that serializes its commands.
+
+        Beyond max_prs PRs, the least recently used contexts without a command in
+        progress are dropped along with their file contents.
+        """
+        from pr_review.context import ReviewContext
+
+        with self._lock:
+            if pr_url in self.contexts:
+                self.contexts.move_to_end(pr_url)
+            else:
+                self.contexts[pr_url] = ReviewContext.from_url(pr_url)
+                self.locks[pr_url] = Lock()
+            for stale_url in list(self.contexts):
+                if len(self.contexts) <= self.max_prs:
+                    break
+                if stale_url != pr_url and not self.locks[stale_url].locked():
+                    self.contexts.pop(stale_url).files_content.clear()
+                    del self.locks[stale_url]
+            return self.contexts[pr_url], self.locks[pr_url]
+
+    def handle(self, request):
+        """Run one request and return the reply sent back to the client."""
+        command = request.get("command")
+        if command == "ping":
+            return {"ok": True, "prs": len(self.contexts)}
+
+        if command == "process-comment":
+            from pr_review.chat import create_chatbot_command
+            from pr_review.tracing import traced_run
+
+            ctx, lock = self.context_for(request["pr_url"])
+            # Each command's trace is written next to its PR's files rather than piling up in the worker
+            with lock, traced_run(ctx.output_path(os.path.basename(config.TRACE_FILE))):
+                create_chatbot_command(ctx, request["comment_body"], request["comment_id"])
+            return {"ok": True}
+
+        return {"ok": False, "error": f"Unknown command: {command}"}
+
+    def serve_connection(self, conn):
+        """Answer the request on one client connection."""
+        from pr_review.console import console
+
+        with conn:
+            try:
+                request = conn.recv()
+                reply = self.handle(request)
+            except Exception as e:
+                console.print(f"[red]Worker command failed: {e}")
+                reply = {"ok": False, "error": str(e)}
+            try:
+                conn.send(reply)
+            except OSError:
+                pass
+
+    def serve(self, address=None):
+        """Accept commands until interrupted, each client on its own thread."""
+        # Import everything a command needs now rather than on the first comment
+        import pr_review.chat  # noqa: F401
+        from pr_review.clients import github_client
+        from pr_review.console import console
+
+        github_client()
+        warm_up_model()
+
+        with Listener(worker_address(address), authkey=create_worker_key()) as listener:
+            console.print(f"[green]Chatbot worker listening on {address or config.WORKER_ADDRESS}")
+            while True:
+                try:
+                    conn = listener.accept()
+                except (OSError, AuthenticationError) as e:
+                    # A client that fails authentication should not stop the worker
+                    console.print(f"[yellow]Rejected worker connection: {e}")
+                    continue
+                Thread(target=self.serve_connection, args=(conn,), daemon=True).start()